@@ -0,0 +1,508 @@
+"""
+CE49X Final Project - Task 1B: Content Extraction
+Asynchronous article fetcher
+
+Task 1B in the notebook opens every URL in Chrome (Selenium), waits 3-5 seconds and
+then downloads the page a second time with newspaper3k, one URL after another. This
+module fetches the pages concurrently over plain HTTP and only falls back to the
+browser for pages that need JavaScript:
+
+    - asyncio + aiohttp with one connection pool: at most `concurrency` requests in
+      flight, at most `per_host` connections per host (keep-alive connections are
+      reused, so most requests skip the TCP/TLS handshake)
+    - connection errors, timeouts, 429 and 5xx responses are retried with exponential
+      backoff and jitter (Retry-After is honoured), other 4xx are final
+    - text extraction (newspaper3k, CPU bound) runs in a thread pool so it does not
+      block the downloads
+    - a page goes to the browser only if plain HTTP could not get the article: Google
+      News redirect links, or a short text on a page that asks for JavaScript. The
+      browser runs in its own single thread, one page at a time.
+
+The results use the notebook's columns (Final_URL, Full_Text, Scrape_Status with
+"Success" / "Short Content" / the error text), so Task 1C works unchanged.
+
+Offline check: `python article_fetcher.py --selftest` starts a local HTTP server
+with generated fixture pages (normal, short, slow, flaky (503 before succeeding),
+missing and JavaScript-only pages), fetches them and reports pages/second, latency
+percentiles and connection reuse.
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+MIN_TEXT_LENGTH = 250                        # Same limit as get_full_content ("Short Content" below it)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+BROWSER_HOSTS = ('news.google.com',)         # Redirect pages that only work with JavaScript
+JS_MARKERS = ('enable javascript', 'javascript is required', 'javascript is disabled',
+              'turn on javascript', 'requires javascript')
+USER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+
+# -------------------------------
+# Extraction
+# -------------------------------
+def extract_text(html, url):
+    """Article body text of an HTML page (newspaper3k, like the notebook)."""
+    from newspaper import Article
+
+    article = Article(url)
+    article.download(input_html=html)
+    article.parse()
+    return article.text
+
+
+def needs_browser(url, html, text):
+    """True if the article can only be read after running the page's JavaScript."""
+    if urlsplit(url).hostname in BROWSER_HOSTS:
+        return True
+    if len(text) >= MIN_TEXT_LENGTH:
+        return False
+    lowered = html[:20000].lower()
+    return any(marker in lowered for marker in JS_MARKERS)
+
+
+class SeleniumBrowser:
+    """
+    The notebook's Chrome setup as a fallback: call it with a URL, get (final_url, html).
+    The driver is created on first use and restarted after a crash or every restart_every pages.
+    """
+
+    def __init__(self, restart_every=50, wait=3):
+        self.restart_every = restart_every
+        self.wait = wait
+        self.driver = None
+        self.pages = 0
+
+    def _setup_driver(self):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.chrome.service import Service
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        chrome_options = Options()
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--log-level=3")
+        chrome_options.page_load_strategy = 'eager'
+        driver = webdriver.Chrome(service=Service(ChromeDriverManager().install()), options=chrome_options)
+        driver.set_page_load_timeout(20)
+        return driver
+
+    def close(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception:
+                pass                                # Already closed
+            self.driver = None
+
+    def __call__(self, url):
+        if self.driver is None or (self.pages and self.pages % self.restart_every == 0):
+            self.close()
+            self.driver = self._setup_driver()
+        self.pages += 1
+        try:
+            self.driver.get(url)
+        except Exception:
+            self.close()                            # Browser crashed: restart and retry once
+            self.driver = self._setup_driver()
+            self.driver.get(url)
+        time.sleep(self.wait)                       # Let redirects and scripts finish
+        return self.driver.current_url, self.driver.page_source
+
+
+# -------------------------------
+# Fetcher
+# -------------------------------
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return float('nan')
+    pos = q * (len(sorted_values) - 1)
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+class ArticleFetcher:
+    """
+    Fetch and extract many articles concurrently.
+
+    Parameters:
+        concurrency (int): Requests in flight at the same time (over all hosts).
+        per_host (int): Connections per host (politeness towards a single site).
+        retries (int): Extra attempts after a retryable failure.
+        backoff (float): Base delay in seconds, attempt k waits about backoff * 2^k.
+        timeout (float): Total timeout of one request in seconds.
+        browser (callable or None): url -> (final_url, html) for pages that need
+            JavaScript, e.g. SeleniumBrowser(); None keeps the plain-HTTP result.
+        extract (callable): (html, url) -> text.
+        extract_threads (int): Threads for text extraction.
+    """
+
+    def __init__(self, concurrency=32, per_host=4, retries=3, backoff=0.5, timeout=20,
+                 browser=None, extract=extract_text, extract_threads=4):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.browser = browser
+        self.extract = extract
+        self.extract_threads = extract_threads
+        self.latencies = []                         # Seconds per page: first request to extracted text
+        self.attempts = Counter()
+
+    async def _get(self, session, url):
+        """GET with retries; returns (final_url, html, error)."""
+        import aiohttp
+
+        error = ''
+        for attempt in range(self.retries + 1):
+            delay = None
+            try:
+                async with session.get(url) as response:
+                    self.attempts['requests'] += 1
+                    if response.status == 200:
+                        html = await response.text(errors='replace')
+                        return str(response.url), html, ''
+                    error = f"HTTP {response.status}"
+                    if response.status not in RETRY_STATUSES:
+                        return str(response.url), '', error
+                    retry_after = response.headers.get('Retry-After', '')
+                    if retry_after.isdigit():
+                        delay = float(retry_after)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.attempts['requests'] += 1
+                error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+            if attempt < self.retries:
+                self.attempts['retries'] += 1
+                if delay is None:
+                    delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+                await asyncio.sleep(delay)
+        return url, '', error
+
+    async def _fetch_one(self, session, url, semaphore, extract_pool, browser_pool):
+        loop = asyncio.get_running_loop()
+        async with semaphore:
+            start = time.perf_counter()
+            final_url, html, error = await self._get(session, url)
+        result = await self._finish(loop, url, final_url, html, error, extract_pool, browser_pool)
+        self.latencies.append(time.perf_counter() - start)
+        return result
+
+    async def _finish(self, loop, url, final_url, html, error, extract_pool, browser_pool):
+        if error:
+            return {'URL': url, 'Final_URL': final_url, 'Full_Text': '', 'Scrape_Status': error, 'Via': 'http'}
+        try:
+            text = await loop.run_in_executor(extract_pool, self.extract, html, final_url)
+        except Exception as e:                      # e.g. newspaper's ArticleException on an empty body
+            return {'URL': url, 'Final_URL': final_url, 'Full_Text': '', 'Scrape_Status': f"Extract: {e}",
+                    'Via': 'http'}
+        via = 'http'
+        if self.browser is not None and needs_browser(final_url, html, text):
+            try:
+                final_url, html = await loop.run_in_executor(browser_pool, self.browser, url)
+            except Exception as e:
+                return {'URL': url, 'Final_URL': final_url, 'Full_Text': text,
+                        'Scrape_Status': f"Browser: {e}", 'Via': 'browser'}
+            try:
+                text = await loop.run_in_executor(extract_pool, self.extract, html, final_url)
+            except Exception as e:
+                return {'URL': url, 'Final_URL': final_url, 'Full_Text': '', 'Scrape_Status': f"Extract: {e}",
+                        'Via': 'browser'}
+            via = 'browser'
+        status = 'Success' if len(text) >= MIN_TEXT_LENGTH else 'Short Content'
+        return {'URL': url, 'Final_URL': final_url, 'Full_Text': text, 'Scrape_Status': status, 'Via': via}
+
+    async def fetch_all(self, urls, on_result=None):
+        """
+        Fetch every URL; returns one result dict per URL in input order
+        (URL, Final_URL, Full_Text, Scrape_Status, Via). on_result(i, result) is
+        called as soon as URL i is done (e.g. for checkpoints).
+        """
+        import aiohttp
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host,
+                                         ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = [None] * len(urls)
+        self.started = time.perf_counter()
+        with ThreadPoolExecutor(self.extract_threads) as extract_pool, ThreadPoolExecutor(1) as browser_pool:
+            async with aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                             headers={'User-Agent': USER_AGENT}) as session:
+                async def run(i, url):
+                    results[i] = await self._fetch_one(session, url, semaphore, extract_pool, browser_pool)
+                    if on_result is not None:
+                        on_result(i, results[i])
+                await asyncio.gather(*(run(i, url) for i, url in enumerate(urls)))
+        self.seconds = time.perf_counter() - self.started
+        self.results = results
+        return results
+
+    def fetch(self, urls, on_result=None):
+        """Synchronous wrapper of fetch_all (not usable inside a running event loop, e.g. Jupyter: await fetch_all there)."""
+        return asyncio.run(self.fetch_all(urls, on_result))
+
+    def stats(self):
+        """Pages/second, latency percentiles (ms), retries and status counts of the last run."""
+        latencies = sorted(self.latencies)
+        statuses = Counter(r['Scrape_Status'] for r in self.results)
+        return {
+            'pages': len(self.results),
+            'seconds': self.seconds,
+            'pages_per_second': len(self.results) / self.seconds if self.seconds > 0 else float('inf'),
+            'p50_ms': _percentile(latencies, 0.50) * 1000,
+            'p90_ms': _percentile(latencies, 0.90) * 1000,
+            'p99_ms': _percentile(latencies, 0.99) * 1000,
+            'max_ms': latencies[-1] * 1000 if latencies else float('nan'),
+            'requests': self.attempts['requests'],
+            'retries': self.attempts['retries'],
+            'browser_pages': sum(r['Via'] == 'browser' for r in self.results),
+            'statuses': dict(statuses),
+        }
+
+
+def print_stats(stats):
+    print(f"{stats['pages']} pages in {stats['seconds']:.2f} s -> {stats['pages_per_second']:.1f} pages/s")
+    print(f"latency p50 {stats['p50_ms']:.0f} ms | p90 {stats['p90_ms']:.0f} ms | "
+          f"p99 {stats['p99_ms']:.0f} ms | max {stats['max_ms']:.0f} ms")
+    print(f"{stats['requests']} requests, {stats['retries']} retries, {stats['browser_pages']} pages via browser")
+    print("statuses:", ', '.join(f"{k}: {v}" for k, v in sorted(stats['statuses'].items())))
+
+
+def fetch_articles(df, fetcher=None, url_column='URL', store=None, stage='text', save_every=50):
+    """
+    Task 1B on a DataFrame: fills Final_URL, Full_Text and Scrape_Status for every row
+    that has no text yet (rows with more than 50 characters are skipped, like the
+    notebook's resume logic). With an ArticleStore the frame is saved as `stage`
+    every save_every pages, by a background thread on a copy of the frame so the
+    fetches on the event loop do not wait for the write (a checkpoint is skipped
+    while the previous one is still being written), and once more at the end.
+    """
+    fetcher = fetcher or ArticleFetcher()
+    df = df.copy()
+    for column in ('Full_Text', 'Final_URL', 'Scrape_Status'):
+        if column not in df.columns:
+            df[column] = ''
+    todo = [i for i, text in zip(df.index, df['Full_Text']) if not (isinstance(text, str) and len(text) > 50)]
+    done = 0
+    checkpoint = None
+
+    def on_result(i, result):
+        nonlocal done, checkpoint
+        row = todo[i]
+        for column in ('Final_URL', 'Full_Text', 'Scrape_Status'):
+            df.at[row, column] = result[column]
+        done += 1
+        if store is not None and done % save_every == 0 and (checkpoint is None or checkpoint.done()):
+            checkpoint = save_pool.submit(store.save, stage, df.copy())
+
+    with ThreadPoolExecutor(1) as save_pool:
+        fetcher.fetch([df.at[i, url_column] for i in todo], on_result=on_result)
+    if store is not None:
+        store.save(stage, df)
+    return df
+
+
+# -------------------------------
+# Local stub server (offline testing)
+# -------------------------------
+NOUNS = ('bridge', 'concrete slab', 'sensor network', 'crack detector', 'steel beam', 'tunnel lining',
+         'soil model', 'traffic camera', 'drone survey', 'digital twin', 'inspection team', 'construction site')
+SENTENCE = ("The {0} was checked by the {1} and the results show that it can be used for the {2} "
+            "as well as for the {3} in the next years.")
+
+
+def make_fixture_pages(n=200, seed=0):
+    """
+    Generated pages: path -> dict(body, status, delay, fail_first, rendered).
+    Mix: ~70% articles, 8% short, 8% slow, 6% flaky (503 twice), 4% missing (404),
+    4% JavaScript-only (the article is in 'rendered', served with ?rendered=1),
+    plus one empty 200 page.
+    """
+    rng = random.Random(seed)
+
+    def article(i):
+        paragraphs = ''.join(
+            '<p>' + ' '.join(SENTENCE.format(*rng.sample(NOUNS, 4)) for _ in range(rng.randint(2, 4))) + '</p>'
+            for _ in range(rng.randint(4, 9)))
+        return (f'<html><head><title>Article {i}</title></head><body><nav>Home | News</nav>'
+                f'<article><h1>AI in civil engineering, part {i}</h1>{paragraphs}</article>'
+                f'<footer>Copyright</footer></body></html>')
+
+    pages = {}
+    for i in range(n):
+        kind = rng.random()
+        page = {'body': article(i), 'status': 200, 'delay': rng.uniform(0.005, 0.03), 'fail_first': 0, 'rendered': None}
+        if kind < 0.08:
+            page['body'] = f'<html><body><article><p>Short note {i}.</p></article></body></html>'
+        elif kind < 0.16:
+            page['delay'] = rng.uniform(0.2, 0.5)
+        elif kind < 0.22:
+            page['fail_first'] = 2
+        elif kind < 0.26:
+            page['status'] = 404
+        elif kind < 0.30:
+            page['rendered'] = page['body']
+            page['body'] = ('<html><body><noscript>Please enable JavaScript to view this article.</noscript>'
+                            '<div id="root"></div><script src="app.js"></script></body></html>')
+        pages[f'/article/{i}'] = page
+    # A 200 response without a body: extraction fails, the page must not abort the batch
+    pages['/article/empty'] = {'body': '', 'status': 200, 'delay': 0.01, 'fail_first': 0, 'rendered': None}
+    return pages
+
+
+class FixtureServer:
+    """
+    Threaded HTTP/1.1 (keep-alive) server for fixture pages on 127.0.0.1.
+    Counts requests and TCP connections, so connection reuse can be checked.
+
+        with FixtureServer(make_fixture_pages()) as server:
+            urls = server.urls()
+    """
+
+    def __init__(self, pages, port=0):
+        self.pages = pages
+        self.lock = threading.Lock()
+        self.failures_left = {path: page['fail_first'] for path, page in pages.items()}
+        self.requests = 0
+        self.connections = 0
+        fixture = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def setup(self):
+                super().setup()
+                with fixture.lock:
+                    fixture.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                path, _, query = self.path.partition('?')
+                page = fixture.pages.get(path)
+                with fixture.lock:
+                    fixture.requests += 1
+                    failing = page is not None and fixture.failures_left[path] > 0
+                    if failing:
+                        fixture.failures_left[path] -= 1
+                if page is None:
+                    status, body = 404, b'not found'
+                elif failing:
+                    status, body = 503, b'try again'
+                else:
+                    time.sleep(page['delay'])
+                    status = page['status']
+                    html = page['rendered'] if query == 'rendered=1' and page['rendered'] else page['body']
+                    body = html.encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+
+            def handle_error(self, request, client_address):
+                pass                                # Client closed a keep-alive connection
+
+        self.httpd = Server(('127.0.0.1', port), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.httpd.server_address[1]}'
+
+    def urls(self):
+        return [self.base_url + path for path in self.pages]
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def rendered_fixture_browser(url):
+    """Browser stand-in for the self-test: the fixture server serves the 'rendered' page at ?rendered=1."""
+    from urllib.request import urlopen
+
+    with urlopen(url + '?rendered=1', timeout=10) as response:
+        return response.geturl(), response.read().decode()
+
+
+def selftest(pages=300, concurrency=32, per_host=8, seed=0):
+    """Fetch generated fixture pages from a local server and print throughput and latency tails."""
+    fixtures = make_fixture_pages(pages, seed)
+    with FixtureServer(fixtures) as server:
+        fetcher = ArticleFetcher(concurrency=concurrency, per_host=per_host, backoff=0.05,
+                                 browser=rendered_fixture_browser)
+        results = fetcher.fetch(server.urls())
+        stats = fetcher.stats()
+        print_stats(stats)
+        print(f"server: {server.requests} requests over {server.connections} TCP connections")
+
+    # Every page must end up with the status its fixture was built for
+    expected = {}
+    for path, page in fixtures.items():
+        if page['status'] == 404:
+            expected[path] = 'HTTP 404'
+            continue
+        try:
+            text = extract_text(page['rendered'] or page['body'], 'http://x' + path)
+        except Exception as e:
+            expected[path] = f"Extract: {e}"
+            continue
+        expected[path] = 'Success' if len(text) >= MIN_TEXT_LENGTH else 'Short Content'
+    wrong = [r['URL'] for r in results if r['Scrape_Status'] != expected[urlsplit(r['URL']).path]]
+    print("OK: every page has the expected status" if not wrong else f"MISMATCH on {len(wrong)} pages, e.g. {wrong[:3]}")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Task 1B: concurrent article extraction")
+    parser.add_argument('--store', default='ce49x_store', help="ArticleStore directory (reads 'raw', writes 'text')")
+    parser.add_argument('--excel', action='store_true', help="also export the result to FILE_WITH_TEXT")
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--per-host', type=int, default=4)
+    parser.add_argument('--no-browser', action='store_true', help="never fall back to Chrome")
+    parser.add_argument('--selftest', action='store_true', help="run against a local fixture server (offline)")
+    parser.add_argument('--pages', type=int, default=300, help="number of fixture pages for --selftest")
+    args = parser.parse_args()
+
+    if args.selftest:
+        selftest(args.pages, args.concurrency)
+        return
+
+    from storage import ArticleStore
+
+    store = ArticleStore(args.store)
+    browser = None if args.no_browser else SeleniumBrowser()
+    fetcher = ArticleFetcher(concurrency=args.concurrency, per_host=args.per_host, browser=browser)
+    source = 'text' if store.exists('text') else 'raw'                      # Resume like the notebook
+    try:
+        fetch_articles(store.load(source), fetcher, store=store, stage='text')
+    finally:
+        if browser is not None:
+            browser.close()
+    print_stats(fetcher.stats())
+    if args.excel:
+        print("exported", store.export_excel('text'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,400 @@
+"""
+CE49X Final Project - Task 1C: Data sanitation
+Near-duplicate detection with URL normalization and MinHash / LSH
+
+Task 1C removes duplicates with drop_duplicates(subset=['URL']) and ['Title'].
+The same story syndicated by another site, a title with another capitalization or
+a URL with ?utm_source=... passes both checks and costs LLM calls in Task 2.
+
+DedupIndex checks every article in three steps:
+
+    - URL: scheme, "www.", fragments, tracking parameters (utm_*, fbclid, ...),
+      parameter order and trailing slashes are normalized before comparing
+    - Title: compared case and punctuation insensitive
+    - Text: a MinHash signature (num_perm values) of the 5-word shingles of
+      Full_Text. Locality-sensitive hashing puts the signatures in buckets, band by
+      band, so only articles sharing a bucket are compared (instead of all pairs).
+      A candidate is a duplicate when its estimated Jaccard similarity is at least
+      `threshold`; a group of duplicates keeps its first article
+    - the signatures, normalized URLs and titles are saved to disk (append-only npy
+      parts + meta.json), so a later scrape is checked against everything seen before
+      without recomputing old signatures
+
+    index = DedupIndex('dedup_index')                 # opens it if it exists
+    df_cleaned, df_duplicates = deduplicate(df_cleaned, index)
+    index.save()
+
+`python dedup.py` runs the benchmark on 100k synthetic articles with known
+near-duplicates.
+"""
+
+import json
+import os
+import re
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+
+TRACKING_PARAMETERS = {'fbclid', 'gclid', 'dclid', 'msclkid', 'mc_cid', 'mc_eid', 'igshid', 'ocid', 'cmpid',
+                       'ref', 'ref_src', 'src', 'source', 'share', 'smid', 'guccounter', '_ga', 'at_medium',
+                       'at_campaign', 'outputtype', 'amp'}
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+EMPTY = np.uint32(0xFFFFFFFF)                         # Signature value of texts without shingles
+MERSENNE = np.uint64(0x100000001B3)                   # Multiplier of the shingle / band hashes
+
+
+def normalize_url(url):
+    """Comparable form of a URL: lowercase host without www., no tracking parameters or fragment."""
+    if not isinstance(url, str) or not url.strip():
+        return ""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                   if not k.lower().startswith('utm_') and k.lower() not in TRACKING_PARAMETERS)
+    path = re.sub(r'/+', '/', parts.path).rstrip('/')
+    if path.endswith('/amp'):                          # AMP copy of the same page
+        path = path[:-4]
+    return urlunsplit(('https', host, path, urlencode(query), ''))
+
+
+def normalize_title(title):
+    """Title without case, punctuation and extra whitespace."""
+    if not isinstance(title, str):
+        return ""
+    return ' '.join(TOKEN_PATTERN.findall(title.casefold()))
+
+
+def lsh_bands(threshold, num_perm, recall=0.99):
+    """
+    (bands, rows) with bands * rows <= num_perm: the most rows per band (fewest
+    candidates) that still make a pair with similarity `threshold` share a bucket
+    with probability `recall`. The signatures then decide.
+    """
+    for rows in range(num_perm, 0, -1):
+        bands = num_perm // rows
+        if 1 - (1 - threshold ** rows) ** bands >= recall:
+            return bands, rows
+    return num_perm, 1
+
+
+# -------------------------------
+# MinHash signatures
+# -------------------------------
+_token_hashes = {}                                     # Per process cache: token -> crc32
+
+
+def _shingle_hashes(text, shingle):
+    """32-bit hashes of the `shingle`-word windows of a text (one window if it is shorter)."""
+    tokens = TOKEN_PATTERN.findall(text.lower()) if isinstance(text, str) else []
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    cache = _token_hashes
+    hashes = np.array([cache[t] if t in cache else cache.setdefault(t, zlib.crc32(t.encode()))
+                       for t in tokens], dtype=np.uint64)
+    width = max(len(hashes) - shingle + 1, 1)
+    h = np.zeros(width, dtype=np.uint64)
+    for j in range(min(shingle, len(hashes))):
+        h = h * MERSENNE + hashes[j:j + width]          # Wraps around modulo 2^64
+    return (h ^ (h >> np.uint64(32))) & np.uint64(0xFFFFFFFF)
+
+
+def _signature_chunk(job):
+    """MinHash signatures (len(texts) x num_perm, uint32) of a chunk of texts."""
+    texts, shingle, a, b = job
+    signatures = np.full((len(texts), len(a)), EMPTY, dtype=np.uint32)
+    shingles = [_shingle_hashes(text, shingle) for text in texts]
+    filled = [i for i, s in enumerate(shingles) if len(s)]
+    if not filled:
+        return signatures
+    values = np.concatenate([shingles[i] for i in filled])
+    starts = np.cumsum([0] + [len(shingles[i]) for i in filled[:-1]])
+    shift = np.uint64(32)
+    for p in range(len(a)):
+        # Multiply-shift hashing: one random permutation of the 32-bit shingle hashes per column
+        signatures[filled, p] = np.minimum.reduceat((a[p] * values + b[p]) >> shift, starts)
+    return signatures
+
+
+class DedupIndex:
+    """
+    URLs, titles and MinHash signatures of all articles seen so far.
+
+    Parameters:
+        path (str or None): Directory of the index. An existing index is opened;
+            None keeps it in memory only.
+        threshold (float): Estimated Jaccard similarity of shingles above which two
+            texts are duplicates.
+        num_perm (int): Signature length.
+        shingle (int): Words per shingle.
+        seed (int): Seed of the hash functions (fixed, the saved signatures depend on it).
+    """
+
+    def __init__(self, path=None, threshold=0.8, num_perm=128, shingle=5, seed=1):
+        self.path = path
+        self.params = {'threshold': threshold, 'num_perm': num_perm, 'shingle': shingle, 'seed': seed}
+        self.threshold = threshold
+        self.shingle = shingle
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, 2 ** 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.b = rng.integers(0, 2 ** 63, num_perm, dtype=np.uint64)
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+        self.signatures = np.empty((0, num_perm), dtype=np.uint32)
+        self.band_keys = np.empty((0, self.bands), dtype=np.uint64)
+        self.urls, self.titles, self.duplicate_of = [], [], []
+        self.url_rows, self.title_rows = {}, {}
+        self.saved = 0
+        self.parts = 0
+        if path and os.path.exists(os.path.join(path, 'meta.json')):
+            self._load()
+
+    def __len__(self):
+        return len(self.urls)
+
+    def _band_keys(self, signatures):
+        keys = np.zeros((len(signatures), self.bands), dtype=np.uint64)
+        for band in range(self.bands):
+            for col in range(band * self.rows, (band + 1) * self.rows):
+                keys[:, band] = keys[:, band] * MERSENNE + signatures[:, col]
+        return keys
+
+    def signatures_of(self, texts, processes=None, chunksize=2000):
+        """MinHash signatures of texts, computed in chunks over processes."""
+        jobs = [(texts[s:s + chunksize], self.shingle, self.a, self.b) for s in range(0, len(texts), chunksize)]
+        workers = processes or os.cpu_count() or 1
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_signature_chunk, jobs))
+        else:
+            results = [_signature_chunk(job) for job in jobs]
+        return np.concatenate(results) if results else np.empty((0, len(self.a)), dtype=np.uint32)
+
+    def _candidates(self, first_new):
+        """Pairs (earlier row, new row) sharing a bucket in at least one band."""
+        filled = self.signatures[:, 0] != EMPTY
+        pairs = []
+        for band in range(self.bands):
+            rows = np.nonzero(filled)[0]
+            keys = self.band_keys[rows, band]
+            order = np.argsort(keys, kind='stable')            # Rows stay ascending inside a bucket
+            keys, rows = keys[order], rows[order]
+            same = np.r_[False, keys[1:] == keys[:-1]]
+            bucket_start = np.maximum.accumulate(np.where(same, 0, np.arange(len(keys))))
+            later = same & (rows >= first_new)
+            # Each member is compared with the first member of its bucket and with its predecessor
+            for earlier in (rows[bucket_start[later]], rows[np.nonzero(later)[0] - 1]):
+                pairs.append(np.stack([earlier, rows[later]], axis=1))
+        if not pairs:
+            return np.empty((0, 2), dtype=np.int64)
+        return np.unique(np.concatenate(pairs), axis=0)
+
+    def similarity(self, pairs, block=200_000):
+        """Estimated Jaccard similarity (share of equal signature values) of row pairs."""
+        result = np.empty(len(pairs))
+        for s in range(0, len(pairs), block):
+            i, j = pairs[s:s + block, 0], pairs[s:s + block, 1]
+            result[s:s + block] = (self.signatures[i] == self.signatures[j]).mean(axis=1)
+        return result
+
+    def add(self, urls, titles, texts, processes=None):
+        """
+        Check new articles against the index and each other, then add them.
+
+        Returns:
+            list[tuple]: Per article (row of the kept article or None, reason) with
+                reason '' (unique), 'url', 'title' or 'text'.
+        """
+        first_new = len(self.urls)
+        self.signatures = np.concatenate([self.signatures, self.signatures_of(list(texts), processes)])
+        self.band_keys = np.concatenate([self.band_keys, self._band_keys(self.signatures[first_new:])])
+
+        result = []
+        for row, (url, title) in enumerate(zip(urls, titles), first_new):
+            url, title = normalize_url(url), normalize_title(title)
+            self.urls.append(url)
+            self.titles.append(title)
+            match = None
+            if url and url in self.url_rows:
+                match = (self.url_rows[url], 'url')
+            elif title and title in self.title_rows:
+                match = (self.title_rows[title], 'title')
+            self.url_rows.setdefault(url, row)
+            self.title_rows.setdefault(title, row)
+            result.append(match)
+            self.duplicate_of.append(match[0] if match else -1)
+
+        pairs = self._candidates(first_new)
+        pairs = pairs[self.similarity(pairs) >= self.threshold]
+        for earlier, row in pairs[np.lexsort((pairs[:, 0], pairs[:, 1]))]:
+            if result[row - first_new] is None:
+                kept = self.duplicate_of[earlier]
+                kept = earlier if kept < 0 else kept        # Groups point to their first article
+                self.duplicate_of[row] = int(kept)
+                result[row - first_new] = (int(kept), 'text')
+        for row in range(first_new, len(self.urls)):
+            kept = self.duplicate_of[row]
+            if kept >= 0 and self.duplicate_of[kept] >= 0:     # A URL / title match of a text duplicate
+                self.duplicate_of[row] = self.duplicate_of[kept]
+                result[row - first_new] = (self.duplicate_of[row], result[row - first_new][1])
+        return [match if match else (None, '') for match in result]
+
+    # ---------------------------
+    # Persistence
+    # ---------------------------
+    def save(self):
+        """Write the signatures added since the last save as a new part, and the metadata."""
+        if not self.path:
+            raise ValueError("This index has no path")
+        os.makedirs(self.path, exist_ok=True)
+        if len(self.urls) > self.saved:
+            np.save(os.path.join(self.path, f"part-{self.parts:05d}.npy"), self.signatures[self.saved:])
+            self.parts += 1
+            self.saved = len(self.urls)
+        meta = {'params': self.params, 'parts': self.parts, 'urls': self.urls, 'titles': self.titles,
+                'duplicate_of': self.duplicate_of}
+        tmp = os.path.join(self.path, 'meta.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(self.path, 'meta.json'))
+
+    def _load(self):
+        with open(os.path.join(self.path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['params'] != self.params:
+            raise ValueError(f"The index in '{self.path}' was built with {meta['params']}; "
+                             f"open it with the same parameters or use a new directory")
+        self.parts = meta['parts']
+        self.urls, self.titles, self.duplicate_of = meta['urls'], meta['titles'], meta['duplicate_of']
+        self.signatures = np.concatenate([np.load(os.path.join(self.path, f"part-{p:05d}.npy"))
+                                          for p in range(self.parts)] or [self.signatures])
+        self.band_keys = self._band_keys(self.signatures)
+        self.saved = len(self.urls)
+        for row, (url, title) in enumerate(zip(self.urls, self.titles)):
+            self.url_rows.setdefault(url, row)
+            self.title_rows.setdefault(title, row)
+
+
+def deduplicate(df, index=None, url_column='URL', title_column='Title', text_column='Full_Text', processes=None):
+    """
+    Task 1C's duplicate removal with DedupIndex.
+
+    Returns:
+        tuple: (unique articles, duplicates with Duplicate_Reason and Duplicate_Of_URL)
+    """
+    index = index if index is not None else DedupIndex()
+    first = len(index)
+    matches = index.add(df[url_column].tolist(), df[title_column].tolist(), df[text_column].tolist(), processes)
+    reasons = np.array([reason for _, reason in matches], dtype=object)
+    duplicates = df[reasons != ''].copy()
+    duplicates['Duplicate_Reason'] = reasons[reasons != '']
+    # The kept article is either in this frame or in an earlier scrape (by its normalized URL)
+    original = {first + i: url for i, url in enumerate(df[url_column].tolist())}
+    duplicates['Duplicate_Of_URL'] = [original.get(row, index.urls[row]) for row, reason in matches if reason]
+    return df[reasons == ''].copy(), duplicates
+
+
+# -------------------------------
+# Benchmark
+# -------------------------------
+def synthetic_articles(n=100_000, duplicate_share=0.1, length=(200, 500), seed=0):
+    """
+    Articles with known near-duplicates. A duplicate copies an earlier article with
+    1% of its words replaced and the first or last sentence dropped; it has either
+    the same URL with tracking parameters, the same title in other case, or a new
+    URL and title (only the text gives it away).
+
+    Returns:
+        tuple: (DataFrame with URL, Title, Full_Text, original row of each article or -1)
+    """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    syllables = np.array(['ka', 'to', 'ri', 'men', 'sa', 'lo', 'ver', 'di', 'pa', 'nu', 'ste', 'gra', 'bo', 'el'])
+    vocabulary = np.unique([''.join(rng.choice(syllables, rng.integers(2, 5))) for _ in range(40_000)])
+    weights = 1 / np.arange(10, len(vocabulary) + 10)
+    weights /= weights.sum()
+    hosts = ['news.example.com', 'www.civilwire.org', 'aiconstruct.net', 'www.infra-today.com', 'eng.example.org']
+
+    urls, titles, texts, original = [], [], [], np.full(n, -1)
+    for i in range(n):
+        if i > 100 and rng.random() < duplicate_share:
+            source = int(rng.integers(0, i))
+            while original[source] >= 0:
+                source = int(original[source])
+            words = texts[source].split(' ')
+            words = words[12:] if rng.random() < 0.5 else words[:-12]
+            for j in rng.choice(len(words), len(words) // 100, replace=False):
+                words[j] = vocabulary[rng.integers(len(vocabulary))]
+            texts.append(' '.join(words))
+            kind = rng.integers(3)
+            urls.append(urls[source].replace('https://', 'http://www.') + f"?utm_source=feed&utm_medium=rss{i}"
+                        if kind == 0 else f"https://{hosts[rng.integers(len(hosts))]}/syndicated/{i}")
+            titles.append(titles[source].upper() + '!' if kind == 1 else f"Copy {i}: " + titles[source])
+            original[i] = source
+        else:
+            words = rng.choice(vocabulary, rng.integers(*length), p=weights)
+            texts.append(' '.join(words))
+            urls.append(f"https://{hosts[rng.integers(len(hosts))]}/article/{i}")
+            titles.append(' '.join(words[:8]).capitalize())
+    return pd.DataFrame({'URL': urls, 'Title': titles, 'Full_Text': texts}), original
+
+
+def _exact_jaccard_seconds(texts, shingle):
+    """Time of exact pairwise Jaccard similarities over all pairs of texts."""
+    sets = [set(_shingle_hashes(t, shingle).tolist()) for t in texts]
+    start = time.perf_counter()
+    for i in range(len(sets)):
+        for j in range(i):
+            len(sets[i] & sets[j]) / len(sets[i] | sets[j])
+    return time.perf_counter() - start
+
+
+def benchmark(n=100_000, new_share=0.1, processes=None, path='dedup_benchmark'):
+    """Detect the known duplicates of n synthetic articles: first (1 - new_share) of them, then the rest."""
+    import shutil
+
+    df, original = synthetic_articles(n)
+    split = int(n * (1 - new_share))
+    shutil.rmtree(path, ignore_errors=True)
+    try:
+        notebook = df.drop_duplicates(subset=['URL']).drop_duplicates(subset=['Title'])
+        print(f"{n} articles, {(original >= 0).sum()} near-duplicates: "
+              f"drop_duplicates(URL, Title) removes {n - len(notebook)}")
+
+        sample = df['Full_Text'].tolist()[:1000]
+        seconds = _exact_jaccard_seconds(sample, 5)
+        print(f"exact pairwise Jaccard: {seconds:.1f} s for 1000 articles -> "
+              f"~{seconds * (n / 1000) ** 2 / 3600:.0f} h for {n}")
+
+        start = time.perf_counter()
+        index = DedupIndex(path)
+        kept, _ = deduplicate(df.iloc[:split], index, processes=processes)
+        index.save()
+        seconds = time.perf_counter() - start
+        print(f"DedupIndex, first {split}: {seconds:.1f} s ({split / seconds:.0f} articles/s)")
+
+        start = time.perf_counter()
+        index = DedupIndex(path)                     # Reopen from disk
+        more, _ = deduplicate(df.iloc[split:], index, processes=processes)
+        index.save()
+        seconds = time.perf_counter() - start
+        print(f"reopen + check {n - split} new articles: {seconds:.1f} s")
+
+        found = np.array(index.duplicate_of) >= 0
+        truth = original >= 0
+        true_positive = (found & truth).sum()
+        print(f"duplicates found {found.sum()}: recall {true_positive / truth.sum():.3f}, "
+              f"precision {true_positive / max(found.sum(), 1):.3f}; {len(kept) + len(more)} articles kept")
+        print(f"index on disk: {sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 1e6:.0f} MB")
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,342 @@
+"""
+CE49X Final Project - Task 3 / Task 4: Discipline classification
+Compiled keyword tagger with sparse count matrices
+
+Task 3 and Task 4 each declare ce_keywords / ai_keywords again and score an article
+with `text.count(word)` for every keyword of every category: one pass over the text
+per keyword (~120 passes per article), and substring hits such as "earth" in
+"unearthed", "ann" in "annual" or "transport" inside "transportation".
+
+KeywordTagger compiles the keywords of all categories (CE and AI together) once:
+
+    - every document is scanned once: punctuation becomes whitespace (str.translate),
+      the words are counted in C (collections.Counter) and single-word keywords are
+      a set intersection with the counted words. Whole words only, so "earth" no
+      longer matches "unearthed"
+    - a multi-word keyword ("building information", "3d printing") is only looked for
+      when all of its tokens occur in the document, with a precompiled pattern that
+      allows any separator between the words ("object-detection" counts too);
+      overlapping keywords ("object detection" / "detection") both count, as with
+      text.count
+    - the result is a sparse documents x keywords count matrix (scipy CSR); category
+      scores are one sparse product with the keyword -> category membership matrix
+    - the notebook's rules (per-category thresholds, "recovery mode" = best category
+      if none passes, "Other") run vectorized on the score matrix, separately for
+      the CE and the AI categories
+    - the heatmap (CE area x AI technology), network graph pairs and dominant area of
+      Task 4 come from the same matrix
+    - large corpora are split into chunks over processes
+
+`python keyword_tagger.py` benchmarks 100k synthetic documents against the
+notebook's get_flexible_tags.
+"""
+
+import os
+import re
+import string
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+CE_KEYWORDS = {
+    "Structural": ["structural", "structure", "beam", "column", "concrete", "steel", "bridge", "seismic", "earthquake", "health monitoring", "shm", "crack", "damage", "masonry", "reinforced", "compressive", "tensile"],
+    "Geotechnical": ["geotechnical", "soil", "rock", "foundation", "tunnel", "excavation", "slope", "stability", "landslide", "underground", "pile", "earth", "clay", "sand", "liquefaction"],
+    "Transportation": ["transport", "transportation", "traffic", "road", "highway", "vehicle", "autonomous", "driverless", "logistics", "pavement", "asphalt", "flow", "pedestrian", "congestion"],
+    "Construction Mgmt": ["management", "scheduling", "schedule", "cost", "estimation", "safety", "site", "worker", "risk", "bim", "building information", "planning", "contract", "supply chain"],
+    "Environmental": ["environmental", "sustainability", "sustainable", "waste", "green", "energy", "carbon", "emission", "water", "pollution", "climate", "lifecycle", "lca"]
+}
+
+AI_KEYWORDS = {
+    "Computer Vision": ["vision", "image", "camera", "video", "detection", "recognition", "cnn", "convolutional", "object detection", "segmentation", "drone", "uav", "surveillance"],
+    "Predictive Analytics": ["prediction", "predictive", "forecast", "forecasting", "regression", "classification", "machine learning", "deep learning", "neural network", "ann", "lstm", "random forest", "svm", "risk assessment", "decision tree"],
+    "Generative Design": ["generative", "optimization", "genetic algorithm", "evolutionary", "parametric", "topology", "design optimization"],
+    "Robotics/Automation": ["robot", "robotics", "automation", "automated", "autonomous", "3d printing", "additive manufacturing", "sensor", "iot", "internet of things"]
+}
+
+# Thresholds of Task 3 (the same CE values are DYNAMIC_THRESHOLDS in Task 4)
+CE_THRESHOLDS = {"Structural": 4, "Transportation": 4, "Construction Mgmt": 4, "Geotechnical": 2, "Environmental": 2}
+AI_THRESHOLDS = {"Robotics/Automation": 4, "Predictive Analytics": 4, "Computer Vision": 3, "Generative Design": 2}
+
+TOKEN_PATTERN = re.compile(r'[^\W_]+')          # Letters and digits; everything else is a boundary
+PUNCTUATION_TABLE = str.maketrans(dict.fromkeys(string.punctuation, ' '))
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _phrase_pattern(tokens):
+    """
+    Regex for consecutive tokens with any separators in between, ending on a word
+    boundary. The start boundary is checked by the caller: a leading look-behind
+    would stop re from searching for the first word as a plain literal (~20x slower).
+    """
+    return re.compile(r'[\W_]+'.join(map(re.escape, tokens)) + r'(?![^\W_])')
+
+
+def _count_chunk(job):
+    """Keyword counts of a chunk of documents; returns (rows, keyword ids, counts)."""
+    singles, phrases, texts, offset = job
+    single_words = singles.keys()
+    findall = TOKEN_PATTERN.findall
+    rows, cols, data = [], [], []
+    for doc, text in enumerate(texts, offset):
+        if not isinstance(text, str):
+            continue
+        lowered = text.lower()
+        # ASCII punctuation -> spaces, split and count in C; other characters (curly
+        # quotes, dashes) only occur in non-ASCII texts, which use the token pattern
+        if lowered.isascii():
+            counts = Counter(lowered.translate(PUNCTUATION_TABLE).split())
+        else:
+            counts = Counter(findall(lowered))
+        for word in single_words & counts.keys():
+            rows.append(doc)
+            cols.append(singles[word])
+            data.append(counts[word])
+        for tokens, pattern, kw_id in phrases:
+            if all(t in counts for t in tokens):
+                n = sum(1 for m in pattern.finditer(lowered)
+                        if m.start() == 0 or not lowered[m.start() - 1].isalnum())
+                if n:
+                    rows.append(doc)
+                    cols.append(kw_id)
+                    data.append(n)
+    return (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64),
+            np.array(data, dtype=np.int32))
+
+
+class KeywordTagger:
+    """
+    Compiled keyword lists of one or more category groups.
+
+    Parameters:
+        groups (dict): Group name -> {category: [keywords]}, default CE and AI. Keywords
+            may be multi-word and may belong to several categories ("autonomous").
+    """
+
+    def __init__(self, groups=None):
+        from scipy import sparse
+
+        groups = groups or {'CE': CE_KEYWORDS, 'AI': AI_KEYWORDS}
+        self.groups = {name: list(categories) for name, categories in groups.items()}
+        self.categories = [c for categories in groups.values() for c in categories]
+        self.keywords = []
+        self.keyword_groups = []                    # Groups each keyword belongs to
+        index = {}
+        members = set()
+        for name, categories in groups.items():
+            for category, words in categories.items():
+                for word in words:
+                    tokens = tuple(tokenize(word))
+                    if tokens not in index:
+                        index[tokens] = len(self.keywords)
+                        self.keywords.append(' '.join(tokens))
+                        self.keyword_groups.append(set())
+                    self.keyword_groups[index[tokens]].add(name)
+                    members.add((index[tokens], self.categories.index(category)))
+        self.singles = {tokens[0]: i for tokens, i in index.items() if len(tokens) == 1}
+        self.phrases = [(tokens, _phrase_pattern(tokens), i) for tokens, i in index.items() if len(tokens) > 1]
+        rows, cols = zip(*sorted(members))
+        # keywords x categories, 1 where the keyword belongs to the category
+        self.membership = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)),
+                                            shape=(len(self.keywords), len(self.categories)))
+
+    def count(self, texts, processes=None, chunksize=5000):
+        """
+        Keyword counts per document (one scan per document for all groups).
+
+        Returns:
+            scipy.sparse.csr_matrix: documents x keywords (int32), column order self.keywords.
+        """
+        from scipy import sparse
+
+        texts = list(texts)
+        jobs = [(self.singles, self.phrases, texts[s:s + chunksize], s) for s in range(0, len(texts), chunksize)]
+        workers = processes or os.cpu_count() or 1
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(_count_chunk, jobs))
+        else:
+            parts = [_count_chunk(job) for job in jobs]
+        rows, cols, data = (np.concatenate([p[k] for p in parts]) if parts else np.empty(0, np.int64)
+                            for k in range(3))
+        counts = sparse.csr_matrix((data.astype(np.int32), (rows, cols)), shape=(len(texts), len(self.keywords)))
+        counts.sort_indices()
+        return counts
+
+    def _columns(self, group):
+        return [self.categories.index(c) for c in self.groups[group]]
+
+    def scores(self, counts, group):
+        """Category scores of a group (documents x categories): summed counts of the category's keywords."""
+        return np.asarray((counts @ self.membership[:, self._columns(group)]).todense())
+
+    def tag(self, counts, group, thresholds=None, default_threshold=2):
+        """
+        The notebook's get_flexible_tags for every document at once: categories of the
+        group whose score reaches their threshold; if none does, the best scoring
+        categories (ties included); if all scores are 0, none.
+
+        Returns:
+            np.ndarray: documents x categories-of-the-group boolean matrix.
+        """
+        scores = self.scores(counts, group)
+        limits = np.array([(thresholds or {}).get(c, default_threshold) for c in self.groups[group]])
+        winners = scores >= limits
+        best = scores.max(axis=1, keepdims=True)
+        recovery = ~winners.any(axis=1, keepdims=True) & (best > 0)
+        return winners | (recovery & (scores == best))
+
+    def labels(self, tags, group, other="Other"):
+        """Boolean tag matrix -> list of category names per document ([other] if none)."""
+        names = np.array(self.groups[group], dtype=object)
+        return [list(names[row]) or ([other] if other else []) for row in tags]
+
+    def dominant(self, counts, group):
+        """Category with the most distinct keywords in the document (first on ties), None if no keyword."""
+        present = counts.copy()
+        present.data[:] = 1
+        distinct = self.scores(present, group)
+        names = np.array(self.groups[group], dtype=object)
+        return np.where(distinct.max(axis=1) > 0, names[distinct.argmax(axis=1)], None)
+
+    def cross_pairs(self, counts, first='CE', second='AI', min_count=2, top=35):
+        """
+        Task 4 network graph: (keyword of first group, keyword of second group) pairs by
+        number of documents that contain both; pairs with at least min_count documents,
+        the `top` largest. A keyword is not paired with itself.
+        """
+        a = [i for i, g in enumerate(self.keyword_groups) if first in g]
+        b = [i for i, g in enumerate(self.keyword_groups) if second in g]
+        present = (counts > 0).astype(np.int32)
+        pairs = (present[:, a].T @ present[:, b]).tocoo()
+        result = [((self.keywords[a[i]], self.keywords[b[j]]), int(v))
+                  for i, j, v in zip(pairs.row, pairs.col, pairs.data)
+                  if v >= min_count and a[i] != b[j]]
+        return sorted(result, key=lambda x: x[1], reverse=True)[:top]
+
+
+def combined_text(df):
+    """Task 3's search_text / Task 4's Combined_Text: Cleaned_Text_NLP + AI_Summary, lowercased."""
+    col1 = 'Cleaned_Text_NLP' if 'Cleaned_Text_NLP' in df.columns else ''
+    col2 = 'AI_Summary' if 'AI_Summary' in df.columns else ''
+    if not col1 and not col2:
+        return df['Full_Text'].fillna("").astype(str).str.lower()
+    parts = [df[c].fillna("").astype(str) for c in (col1, col2) if c]
+    text = parts[0] + " " + parts[1] if len(parts) == 2 else parts[0]
+    return text.str.lower()
+
+
+def tag_articles(df, text=None, tagger=None, processes=None):
+    """
+    Task 3 tagging for a DataFrame.
+
+    Returns:
+        (pd.DataFrame, dict): df with CE_Area / AI_Tech (lists, "Other" if nothing
+        matched), CE_Area_Str / AI_Tech_Str and Dominant_Area; and {'counts', 'ce_tags',
+        'ai_tags'} for heatmap_matrix() and KeywordTagger.cross_pairs().
+    """
+    text = combined_text(df) if text is None else text
+    tagger = tagger or KeywordTagger()
+    counts = tagger.count(text, processes)
+    ce_tags, ai_tags = tagger.tag(counts, 'CE', CE_THRESHOLDS), tagger.tag(counts, 'AI', AI_THRESHOLDS)
+    df = df.copy()
+    df['CE_Area'] = tagger.labels(ce_tags, 'CE')
+    df['AI_Tech'] = tagger.labels(ai_tags, 'AI')
+    df['CE_Area_Str'] = df['CE_Area'].apply(", ".join)
+    df['AI_Tech_Str'] = df['AI_Tech'].apply(", ".join)
+    df['Dominant_Area'] = tagger.dominant(counts, 'CE')
+    return df, {'counts': counts, 'ce_tags': ce_tags, 'ai_tags': ai_tags}
+
+
+def heatmap_matrix(ce_tags, ai_tags):
+    """Task 3 heatmap: articles per (CE area, AI technology), articles tagged "Other" on either side excluded."""
+    import pandas as pd
+
+    keep = ce_tags.any(axis=1) & ai_tags.any(axis=1)
+    matrix = ce_tags[keep].astype(np.int64).T @ ai_tags[keep].astype(np.int64)
+    return pd.DataFrame(matrix, index=list(CE_KEYWORDS), columns=list(AI_KEYWORDS))
+
+
+# -------------------------------
+# Benchmark
+# -------------------------------
+def get_flexible_tags(text, keyword_dict, threshold_dict=None, default_threshold=2):
+    """The notebook's tagging function (reference for the benchmark)."""
+    scores = {category: 0 for category in keyword_dict}
+    for category, words in keyword_dict.items():
+        for word in words:
+            scores[category] += text.count(word)
+    winners = []
+    for cat, score in scores.items():
+        limit = threshold_dict.get(cat, default_threshold) if threshold_dict else default_threshold
+        if score >= limit:
+            winners.append(cat)
+    if not winners and max(scores.values()) > 0:
+        max_val = max(scores.values())
+        winners = [cat for cat, score in scores.items() if score == max_val]
+    return winners if winners else ["Other"]
+
+
+def synthetic_documents(n=100_000, length=(300, 900), seed=0):
+    """
+    Lowercased article-like documents: about 3% keywords, 1% look-alike words
+    (unearthed, annual, ...) and punctuation, the rest filler words.
+    """
+    rng = np.random.default_rng(seed)
+    keywords = sorted({w for d in (CE_KEYWORDS, AI_KEYWORDS) for words in d.values() for w in words})
+    traps = ['unearthed', 'annual', 'planned', 'costume', 'website', 'overflow', 'pilework', 'greenhouse',
+             'bridgehead', 'rockets', 'imagery', 'scanned', 'columnist', 'riskier', 'robotic', 'flows']
+    syllables = ['ka', 'to', 'ri', 'men', 'sa', 'lo', 'ver', 'di', 'pa', 'nu', 'ste', 'gra']
+    filler = sorted({''.join(rng.choice(syllables, rng.integers(2, 4))) for _ in range(3000)})
+    filler += 'the of and to in for with on is that by as are from this will be new said, year.'.split()
+    vocabulary = np.array(keywords + traps + filler, dtype=object)
+    weights = np.concatenate([np.full(len(keywords), 0.03 / len(keywords)),
+                              np.full(len(traps), 0.01 / len(traps)),
+                              np.full(len(filler), 0.96 / len(filler))])
+    lengths = rng.integers(length[0], length[1], n)
+    words = rng.choice(len(vocabulary), size=lengths.sum(), p=weights / weights.sum()).astype(np.int32)
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    return [' '.join(vocabulary[words[bounds[i]:bounds[i + 1]]]) for i in range(n)]
+
+
+def benchmark(n=100_000, processes=None):
+    """Tagging time and agreement: notebook get_flexible_tags vs. KeywordTagger on n synthetic documents."""
+    texts = synthetic_documents(n)
+    print(f"{n} documents, {sum(map(len, texts)) / 1e6:.1f} MB of text")
+
+    start = time.perf_counter()
+    ce_ref = [get_flexible_tags(t, CE_KEYWORDS, CE_THRESHOLDS) for t in texts]
+    ai_ref = [get_flexible_tags(t, AI_KEYWORDS, AI_THRESHOLDS) for t in texts]
+    notebook_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tagger = KeywordTagger()
+    counts = tagger.count(texts, processes)
+    count_seconds = time.perf_counter() - start
+    ce_labels = tagger.labels(tagger.tag(counts, 'CE', CE_THRESHOLDS), 'CE')
+    ai_labels = tagger.labels(tagger.tag(counts, 'AI', AI_THRESHOLDS), 'AI')
+    tagger_seconds = time.perf_counter() - start
+
+    same_ce = np.mean([a == b for a, b in zip(ce_ref, ce_labels)])
+    same_ai = np.mean([a == b for a, b in zip(ai_ref, ai_labels)])
+    print(f"notebook get_flexible_tags : {notebook_seconds:7.2f} s  ({n / notebook_seconds:8.0f} docs/s)")
+    print(f"KeywordTagger              : {tagger_seconds:7.2f} s  ({n / tagger_seconds:8.0f} docs/s, "
+          f"scan {count_seconds:.2f} s) -> {notebook_seconds / tagger_seconds:.1f}x faster")
+    print(f"count matrix: {counts.shape} documents x keywords, nnz {counts.nnz} "
+          f"({counts.nnz / np.prod(counts.shape):.1%} filled)")
+    print(f"same labels as the notebook: CE {same_ce:.1%}, AI {same_ai:.1%} "
+          f"(differences are substring hits, e.g. 'earth' in 'unearthed')")
+
+    sample = "unearthed annual report"
+    print(f"'{sample}': notebook {get_flexible_tags(sample, CE_KEYWORDS, CE_THRESHOLDS)}, "
+          f"tagger {tagger.labels(tagger.tag(tagger.count([sample]), 'CE', CE_THRESHOLDS), 'CE')[0]}")
+    return {'notebook_seconds': notebook_seconds, 'tagger_seconds': tagger_seconds,
+            'same_ce': same_ce, 'same_ai': same_ai}
+
+
+if __name__ == "__main__":
+    benchmark()
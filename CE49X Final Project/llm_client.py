@@ -0,0 +1,537 @@
+"""
+CE49X Final Project - Task 2A / 2B: LLM calls
+Rate-limited, batched and cached client for the Groq chat API
+
+Task 2A (get_summary_groq) and Task 2B (ask_groq_safe) send one blocking request at
+a time, sleep a fixed 1.2 s before every summary, retry 429 errors recursively or in
+a `while True` loop, and pay again for the same texts on every rerun.
+
+LLMClient talks to the OpenAI compatible endpoint of Groq with aiohttp:
+
+    - two token buckets keep the requests/minute and (estimated) tokens/minute under
+      the account limits, instead of a fixed sleep; requests wait only as long as needed
+    - up to `concurrency` requests are in flight at the same time
+    - 429 / 5xx / connection errors and malformed replies are retried with exponential
+      backoff and jitter, at most max_retries times (Retry-After is honoured); then the
+      call fails
+    - several articles go into one prompt (summaries: batch_size articles -> one JSON
+      object, relevance: the notebook's 10-paper prompt -> JSON list of accepted IDs)
+    - results are cached in SQLite per article, keyed by sha256(model, prompt of that
+      article), so a rerun or a different batch split does not pay again
+
+    client = LLMClient(api_key=GROQ_API_KEY)
+    summaries = client.run(client.summarize(df['Full_Text'].tolist()))
+    accepted = client.run(client.filter_relevant(df['Title'].tolist(), df['AI_Summary'].tolist()))
+
+`python llm_client.py --selftest` starts a local mock of the chat endpoint (with its
+own rate limit, latency and random 500 errors) and reports throughput and the
+cache hit rate of a second run.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+GROQ_URL = 'https://api.groq.com/openai/v1/chat/completions'
+SUMMARY_MODEL = "llama-3.1-8b-instant"          # Task 2A
+FILTER_MODEL = "llama-3.3-70b-versatile"        # Task 2B
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+SUMMARY_PROMPT = (
+    "Summarize this Civil Engineering news in 1 concise sentence (max 23 words). "
+    "You MUST explicitly mention which specific construction field "
+    "(e.g., Structural, Geotechnical, Materials, Transport) is involved: {text}"
+)
+BATCH_SUMMARY_PROMPT = (
+    "Summarize each Civil Engineering news article below in 1 concise sentence (max 23 words). "
+    "You MUST explicitly mention which specific construction field "
+    "(e.g., Structural, Geotechnical, Materials, Transport) is involved.\n\n"
+    "{articles}\n"
+    "OUTPUT FORMAT:\nReturn ONLY a JSON object that maps the article number to its summary. "
+    'Example: {{"1": "...", "2": "..."}}'
+)
+# Task 2B prompt of the notebook
+FILTER_PROMPT = """
+Act as a Civil Engineering Professor.
+Filter papers to keep ONLY those relevant to Civil Engineering, Construction, and the Built Environment.
+
+CRITERIA FOR INCLUSION (YES - KEEP):
+1. Core Civil: Structures, Geotechnics, Transport, Materials, Hydraulics.
+2. Construction: Management, Safety, BIM, Digital Twins, Heavy Equipment.
+3. Related Built Environment: Architecture, Urban Planning, Smart Cities.
+4. AI Applications: ANY AI/ML paper applied to the domains above.
+
+CRITERIA FOR EXCLUSION (NO - REJECT):
+1. Pure Non-Civil Fields: Medical, Finance, Pure Biology, Agriculture.
+2. General CS: Pure algorithms, NLP, or Gaming without a construction use case.
+
+DECISION RULE:
+If a paper is borderline, INCLUDE IT.
+
+INPUT LIST:
+{batch_text}
+
+OUTPUT FORMAT:
+Return ONLY a JSON list of ACCEPTED Paper_ID integers. Example: [102, 105]
+If none are relevant, return [].
+"""
+
+
+def estimate_tokens(text):
+    """Rough token count (about 4 characters per token for English text)."""
+    return len(text) // 4 + 1
+
+
+def _key(*parts):
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False).encode()).hexdigest()
+
+
+class TokenBucket:
+    """
+    `rate` units per second, at most `capacity` saved up. acquire() reserves the units
+    immediately (the balance may go negative) and sleeps until they are covered, so
+    waiting coroutines are served in arrival order without a lock.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    async def acquire(self, amount=1):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= min(amount, self.capacity)
+        if self.tokens < 0:
+            await asyncio.sleep(-self.tokens / self.rate)
+
+
+class ResponseCache:
+    """SQLite key -> JSON value store; counts hits and misses."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        row = self.conn.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put_many(self, items):
+        self.conn.executemany("INSERT OR REPLACE INTO responses VALUES (?, ?)",
+                              [(key, json.dumps(value)) for key, value in items])
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+class LLMClient:
+    """
+    Chat completions with rate limiting, retries, batching and a disk cache.
+
+    Parameters:
+        api_key (str): Groq API key (or the GROQ_API_KEY environment variable).
+        url (str): Chat completions endpoint (a mock server for tests).
+        requests_per_minute (float): Request limit of the account.
+        tokens_per_minute (float or None): Token limit of the account, None = no limit.
+        concurrency (int): Requests in flight at the same time.
+        max_retries (int): Retries of one request before it fails.
+        backoff (float): First retry delay in seconds (doubles every retry).
+        max_backoff (float): Upper bound of one retry delay.
+        cache_path (str or None): SQLite file of the cache, None disables it.
+    """
+
+    def __init__(self, api_key=None, url=GROQ_URL, requests_per_minute=30, tokens_per_minute=None,
+                 concurrency=8, max_retries=6, backoff=1.0, max_backoff=60.0,
+                 cache_path='llm_cache.sqlite', timeout=60):
+        self.api_key = api_key or os.environ.get('GROQ_API_KEY', '')
+        self.url = url
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.cache = ResponseCache(cache_path) if cache_path else None
+        self.counts = Counter()
+
+    def run(self, coroutine):
+        """Run one of the async methods to completion (in Jupyter, `await` it instead)."""
+        return asyncio.run(coroutine)
+
+    # ---------------------------
+    # Requests
+    # ---------------------------
+    async def _post(self, state, payload):
+        """One chat completion with rate limiting and bounded retries; returns the message text."""
+        import aiohttp
+
+        session, semaphore, request_bucket, token_bucket = state
+        tokens = estimate_tokens(payload['messages'][-1]['content']) + payload.get('max_tokens', 256)
+        last_error = ''
+        for attempt in range(self.max_retries + 1):
+            await request_bucket.acquire()
+            if token_bucket is not None:
+                await token_bucket.acquire(tokens)
+            delay = None
+            async with semaphore:
+                self.counts['requests'] += 1
+                try:
+                    async with session.post(self.url, json=payload) as response:
+                        if response.status == 200:
+                            try:
+                                data = await response.json()
+                                content = data['choices'][0]['message']['content'].strip()
+                                usage = data.get('usage') or {}
+                                self.counts['tokens'] += usage.get('total_tokens', tokens)
+                                return content
+                            except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+                                # Truncated body, HTML error page or a reply without content: retry it
+                                self.counts['bad_responses'] += 1
+                                last_error = f"malformed response ({type(e).__name__}: {e})"
+                        else:
+                            last_error = f"HTTP {response.status}: {(await response.text())[:200]}"
+                            if response.status not in RETRY_STATUSES:
+                                raise RuntimeError(last_error)
+                            if response.status == 429:
+                                self.counts['rate_limited'] += 1
+                            retry_after = response.headers.get('Retry-After', '')
+                            try:
+                                delay = float(retry_after)
+                            except ValueError:
+                                pass
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    last_error = f"{type(e).__name__}: {e}"
+            if attempt < self.max_retries:
+                self.counts['retries'] += 1
+                if delay is None:
+                    delay = min(self.max_backoff, self.backoff * 2 ** attempt) * random.uniform(0.5, 1.0)
+                await asyncio.sleep(delay)
+        raise RuntimeError(f"Request failed after {self.max_retries + 1} attempts ({last_error})")
+
+    async def _open(self):
+        import aiohttp
+
+        session = aiohttp.ClientSession(
+            headers={'Authorization': f'Bearer {self.api_key}'},
+            timeout=aiohttp.ClientTimeout(total=self.timeout),
+            connector=aiohttp.TCPConnector(limit=self.concurrency))
+        request_bucket = TokenBucket(self.requests_per_minute / 60.0, max(1.0, self.requests_per_minute / 60.0))
+        token_bucket = (TokenBucket(self.tokens_per_minute / 60.0, self.tokens_per_minute / 6.0)
+                        if self.tokens_per_minute else None)
+        return session, asyncio.Semaphore(self.concurrency), request_bucket, token_bucket
+
+    async def _cached_batches(self, items, keys, batch_size, call):
+        """
+        Results for items, from the cache where possible. The missing items are sent in
+        batches: call(state, batch_items) -> list of results (None = no answer, not cached).
+        """
+        results = [self.cache.get(key) if self.cache else None for key in keys]
+        todo = [i for i, r in enumerate(results) if r is None]
+        if not todo:
+            return results
+        state = await self._open()
+        try:
+            async def run(batch):
+                answers = await call(state, [items[i] for i in batch])
+                new = [(keys[i], a) for i, a in zip(batch, answers) if a is not None]
+                if self.cache and new:
+                    self.cache.put_many(new)
+                for i, answer in zip(batch, answers):
+                    results[i] = answer
+            await asyncio.gather(*(run(todo[s:s + batch_size]) for s in range(0, len(todo), batch_size)))
+        finally:
+            await state[0].close()
+        return results
+
+    async def chat_many(self, prompts, model=SUMMARY_MODEL, temperature=0.0, max_tokens=256):
+        """One completion per prompt (cached per prompt); failed requests give None."""
+        async def call(state, batch):
+            payload = {'model': model, 'messages': [{'role': 'user', 'content': batch[0]}],
+                       'temperature': temperature, 'max_tokens': max_tokens}
+            try:
+                return [await self._post(state, payload)]
+            except RuntimeError:
+                self.counts['failed'] += 1
+                return [None]
+
+        keys = [_key(model, temperature, max_tokens, p) for p in prompts]
+        return await self._cached_batches(list(prompts), keys, 1, call)
+
+    # ---------------------------
+    # Task 2A: summaries
+    # ---------------------------
+    async def summarize(self, texts, batch_size=5, model=SUMMARY_MODEL, max_chars=2500, temperature=0.5):
+        """
+        One-sentence summary per article (Task 2A). batch_size articles share one request;
+        articles the model skipped in a batch answer are asked again on their own.
+        Failures give "Summary Error" like get_summary_groq.
+        """
+        texts = [str(t)[:max_chars] for t in texts]
+
+        async def single(state, text):
+            payload = {'model': model, 'temperature': temperature, 'max_tokens': 100,
+                       'messages': [{'role': 'user', 'content': SUMMARY_PROMPT.format(text=text)}]}
+            try:
+                return await self._post(state, payload)
+            except RuntimeError:
+                self.counts['failed'] += 1
+                return None
+
+        async def call(state, batch):
+            if len(batch) == 1:
+                return [await single(state, batch[0])]
+            articles = ''.join(f"Article {i + 1}: {text}\n\n" for i, text in enumerate(batch))
+            payload = {'model': model, 'temperature': temperature, 'max_tokens': 60 * len(batch),
+                       'messages': [{'role': 'user', 'content': BATCH_SUMMARY_PROMPT.format(articles=articles)}]}
+            answers = [None] * len(batch)
+            try:
+                response = await self._post(state, payload)
+                match = re.search(r'\{.*\}', response, re.DOTALL)
+                parsed = json.loads(match.group(0)) if match else {}
+                for i in range(len(batch)):
+                    summary = parsed.get(str(i + 1))
+                    if isinstance(summary, str) and summary.strip():
+                        answers[i] = summary.strip()
+            except (RuntimeError, ValueError, AttributeError):
+                pass                                # Everything is retried one by one below
+            missing = [i for i, a in enumerate(answers) if a is None]
+            self.counts['batch_fallbacks'] += len(missing)
+            for i, answer in zip(missing, await asyncio.gather(*(single(state, batch[i]) for i in missing))):
+                answers[i] = answer
+            return answers
+
+        # Cache key: the single-article prompt, so batch size and order do not matter
+        keys = [_key(model, temperature, SUMMARY_PROMPT.format(text=t)) for t in texts]
+        results = await self._cached_batches(texts, keys, batch_size, call)
+        return [r if r is not None else "Summary Error" for r in results]
+
+    # ---------------------------
+    # Task 2B: relevance filter
+    # ---------------------------
+    async def filter_relevant(self, titles, summaries, batch_size=10, model=FILTER_MODEL):
+        """
+        True for the articles the model accepts as Civil Engineering / Built Environment
+        (Task 2B prompt, batch_size papers per request). A batch that still fails after
+        the retries raises RuntimeError; its decisions are not cached.
+        """
+        items = [(str(t)[:150], str(s)[:700].replace("\n", " ")) for t, s in zip(titles, summaries)]
+
+        async def call(state, batch):
+            batch_text = ''.join(f"Paper_ID {i}: [TITLE: {title}] [SUMMARY: {summary}]\n\n"
+                                 for i, (title, summary) in enumerate(batch))
+            payload = {'model': model, 'temperature': 0, 'max_tokens': 150,
+                       'messages': [{'role': 'user', 'content': FILTER_PROMPT.format(batch_text=batch_text)}]}
+            response = await self._post(state, payload)
+            accepted = []
+            match = re.search(r'\[.*?\]', response, re.DOTALL)
+            if match:
+                try:
+                    accepted = json.loads(match.group(0))
+                except ValueError:
+                    pass
+            return [i in accepted for i in range(len(batch))]
+
+        keys = [_key(model, 'relevance', title, summary) for title, summary in items]
+        return await self._cached_batches(items, keys, batch_size, call)
+
+    def stats(self):
+        return {**self.counts, 'cache_hits': self.cache.hits if self.cache else 0,
+                'cache_misses': self.cache.misses if self.cache else 0}
+
+    def close(self):
+        if self.cache:
+            self.cache.close()
+
+
+# -------------------------------
+# Mock chat endpoint (offline testing)
+# -------------------------------
+class MockChatServer:
+    """
+    Local stand-in for the chat completions endpoint on 127.0.0.1.
+
+    Answers deterministically: batch summary prompts get a JSON object, relevance
+    prompts accept papers whose title mentions a construction word, other prompts get
+    one sentence. It enforces its own requests/minute limit (429 + Retry-After),
+    sleeps `latency` seconds per request, fails with 500 at `error_rate` and answers
+    200 without a message at `malformed_rate`.
+    """
+
+    KEEP_WORDS = ('bridge', 'concrete', 'tunnel', 'construction', 'building', 'road', 'bim')
+
+    def __init__(self, requests_per_minute=600, latency=0.05, error_rate=0.02, malformed_rate=0.01, seed=0):
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.rate = requests_per_minute / 60.0
+        self.allowance = max(1.0, self.rate)
+        self.updated = time.monotonic()
+        self.counts = Counter()
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, headers=()):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                status, retry_after = mock._admit()
+                if status == 429:
+                    return self._send(429, {'error': {'message': 'Rate limit reached'}},
+                                      [('Retry-After', f"{retry_after:.2f}")])
+                if status == 500:
+                    return self._send(500, {'error': {'message': 'Internal error'}})
+                time.sleep(mock.latency)
+                with mock.lock:
+                    malformed = mock.rng.random() < mock.malformed_rate
+                    mock.counts['malformed'] += malformed
+                if malformed:                               # A 200 without a message
+                    return self._send(200, {'choices': []})
+                content = mock.answer(payload['messages'][-1]['content'])
+                self._send(200, {'choices': [{'message': {'role': 'assistant', 'content': content}}],
+                                 'usage': {'total_tokens': estimate_tokens(content)}})
+
+        class Server(ThreadingHTTPServer):
+            daemon_threads = True
+
+            def handle_error(self, request, client_address):
+                pass
+
+        self.httpd = Server(('127.0.0.1', 0), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def _admit(self):
+        with self.lock:
+            self.counts['requests'] += 1
+            now = time.monotonic()
+            self.allowance = min(max(1.0, self.rate), self.allowance + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.allowance < 1.0:
+                self.counts['429'] += 1
+                return 429, (1.0 - self.allowance) / self.rate
+            self.allowance -= 1.0
+            if self.rng.random() < self.error_rate:
+                self.counts['500'] += 1
+                return 500, 0.0
+            return 200, 0.0
+
+    def answer(self, prompt):
+        def sentence(text):
+            words = re.findall(r'[a-z]+', text.lower())
+            return f"Structural news about {' '.join(words[:8])}."
+
+        if 'Paper_ID' in prompt:
+            papers = re.findall(r'Paper_ID (\d+): \[TITLE: (.*?)\]', prompt)
+            return json.dumps([int(i) for i, title in papers if any(w in title.lower() for w in self.KEEP_WORDS)])
+        articles = re.findall(r'Article (\d+): (.*?)\n\n', prompt, re.DOTALL)
+        if articles:
+            return json.dumps({number: sentence(text) for number, text in articles})
+        return sentence(prompt.rsplit('involved:', 1)[-1])
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.httpd.server_address[1]}/openai/v1/chat/completions'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def _synthetic_articles(n, seed=0):
+    rng = random.Random(seed)
+    topics = ['bridge', 'concrete', 'tunnel', 'road', 'hospital', 'bank', 'football', 'building']
+    titles, texts = [], []
+    for i in range(n):
+        topic = rng.choice(topics)
+        titles.append(f"AI for {topic} project {i}")
+        texts.append(f"News {i}: a new {topic} system uses machine learning to monitor sensors. " * 20)
+    return titles, texts
+
+
+def selftest(n=200, batch_size=5, concurrency=8, server_rpm=600, path='llm_selftest_cache.sqlite'):
+    """
+    Summaries and the relevance filter for n synthetic articles against the mock server:
+    one summary per request and one request at a time (like the notebook, without its
+    1.2 s sleeps) vs. batched and concurrent, then the batched run again to measure the
+    cache hit rate. The relevance filter uses the notebook's 10 papers per request.
+    """
+    if os.path.exists(path):
+        os.remove(path)
+    titles, texts = _synthetic_articles(n)
+    with MockChatServer(requests_per_minute=server_rpm) as server:
+        runs = (('one per request', dict(concurrency=1, cache_path=None), 1),
+                ('batched + concurrent', dict(concurrency=concurrency, cache_path=path), batch_size),
+                ('rerun (cache)', dict(concurrency=concurrency, cache_path=path), batch_size))
+        for name, options, size in runs:
+            client = LLMClient(api_key='test', url=server.url, requests_per_minute=server_rpm,
+                               backoff=0.05, max_backoff=1.0, **options)
+            start = time.perf_counter()
+            summaries = client.run(client.summarize(texts, batch_size=size))
+            accepted = client.run(client.filter_relevant(titles, summaries, batch_size=10))
+            seconds = time.perf_counter() - start
+            stats = client.stats()
+            lookups = stats['cache_hits'] + stats['cache_misses']
+            hit_rate = stats['cache_hits'] / lookups if lookups else 0.0
+            print(f"{name:22s} {seconds:6.2f} s  {2 * n / seconds:7.1f} items/s  "
+                  f"requests {stats.get('requests', 0):4d}  retries {stats.get('retries', 0):3d}  "
+                  f"cache hit rate {hit_rate:5.1%}  errors {summaries.count('Summary Error')}  "
+                  f"accepted {sum(accepted)}")
+            client.close()
+        print(f"mock server: {dict(server.counts)}")
+    os.remove(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Task 2A/2B LLM client")
+    parser.add_argument('--selftest', action='store_true', help="run against a local mock server (offline)")
+    parser.add_argument('-n', type=int, default=200, help="articles for --selftest")
+    parser.add_argument('--batch-size', type=int, default=5)
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+    if args.selftest:
+        selftest(args.n, args.batch_size, args.concurrency)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
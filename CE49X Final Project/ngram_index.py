@@ -0,0 +1,499 @@
+"""
+CE49X Final Project - Task 2A / 2C: TF-IDF keywords and n-gram report
+Persistent, incrementally updated sparse n-gram index
+
+Task 2C fits three CountVectorizers (unigrams, bigrams, trigrams) over the whole
+corpus on every run, and Task 2A fits a separate TfidfVectorizer. A few newly
+scraped articles mean recounting everything.
+
+NgramIndex keeps exact sparse counts instead (no hashing: the report needs the terms
+and exact frequencies):
+
+    - one documents x terms count matrix per n-gram size, with the vocabulary in
+      order of first appearance, so top-k ties are broken like CountVectorizer's
+      (after a document is replaced or removed, by the first appearance in the
+      remaining documents)
+    - stop words are removed before n-grams are formed, like CountVectorizer with
+      the notebook's stops_soft; unigrams are stored unfiltered, so TF-IDF (no stop
+      words in Task 2A) and the unigram report (stops_hard) come from the same counts
+    - corpus totals per term are kept up to date, so the top-k report is one sort of
+      a vector
+    - add() ingests only new documents (key: URL, or a hash of the text); a changed
+      text replaces the old row. New documents are tokenized in partitions over
+      processes and merged into the global vocabulary
+    - on disk every add() is one more part file (npz) plus the new vocabulary lines;
+      nothing already written is rewritten
+
+    index = NgramIndex('ngram_index')                 # opens it if it exists
+    index.add(texts, keys=urls)
+    index.save()
+    report = ngram_report(index)                      # Top20_Words / Bigrams / Trigrams
+    keywords = index.top_keywords(5)                  # Task 2A Top_TFIDF_Keywords
+
+The results equal the notebook's CountVectorizer / TfidfVectorizer code on the same
+texts; `python ngram_index.py` checks that and times a full build and an update.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+TOKEN_PATTERN = re.compile(r"(?u)\b\w\w+\b")     # CountVectorizer's default token_pattern
+NGRAM_SIZES = (1, 2, 3)
+
+# Task 2C stop word lists
+COMMON_JUNK = [
+    'google', 'scholar', 'crossref', 'text', 'full', 'view', 'download', 'pdf',
+    'citation', 'cited', 'copyright', 'author', 'rights', 'reserved', 'license',
+    'journal', 'publishing', 'publisher', 'volume', 'issue', 'peer', 'review',
+    'online', 'library', 'access', 'open', 'website', 'page', 'web', 'homepage',
+    'prediction', 'error', 'accuracy', 'mean', 'absolute', 'training', 'testing',
+    'validation', 'train', 'test', 'predict', 'predicted', 'values', 'value',
+    'dataset', 'data', 'point', 'points', 'set', 'sets', 'center', 'centers',
+    'proposed', 'approach', 'method', 'methodology', 'result', 'results',
+    'performance', 'comparison', 'compared', 'experimental', 'study', 'studies',
+    'using', 'used', 'use', 'based', 'table', 'figure', 'fig', 'doi', 'vol', 'no',
+    'pp', 'al', 'et', 'url', 'http', 'https', 'click', 'size',
+    'image', 'shown', 'presented', 'article', 'paper', 'work',
+    'usd', 'billion', 'million', 'market', 'growth', 'report', 'forecast',
+    'correlation', 'coefficient', 'input', 'feature', 'hidden', 'layer',
+    'north', 'america', 'new', 'like', 'good', 'better', 'best', 'high', 'low',
+    'different', 'real', 'case', 'making', 'potential', 'need', 'needs',
+    'company', 'companies', 'parameter', 'parameters', 'information', 'technology',
+    'significant', 'significantly', 'increase', 'decreased', 'impact'
+]
+SINGLE_WORD_BANS = [
+    'system', 'systems', 'model', 'models', 'analysis', 'algorithm', 'algorithms',
+    'application', 'applications', 'process', 'project', 'design', 'development',
+    'research', 'time', 'year', 'number', 'level', 'quality', 'state',
+    'machine', 'learning', 'artificial', 'intelligence', 'deep', 'neural', 'network', 'networks',
+    'make', 'said', 'including', 'problem', 'solution', 'engineering', 'civil'
+]
+REPORT_SHEETS = {1: ('Top20_Words', 'Word'), 2: ('Top20_Bigrams', 'BiGram'), 3: ('Top20_Trigrams', 'TriGram')}
+
+
+def soft_stop_words():
+    """stops_soft of Task 2C: scikit-learn's English stop words + COMMON_JUNK."""
+    from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+
+    return frozenset(ENGLISH_STOP_WORDS) | frozenset(COMMON_JUNK)
+
+
+def _text_hash(text):
+    return hashlib.sha1(text.encode()).hexdigest()
+
+
+def _ingest_partition(job):
+    """
+    Count the n-grams of a partition of documents.
+
+    Returns:
+        dict: n -> (terms in order of first appearance, local rows, local term ids, counts)
+    """
+    texts, stop_words, sizes = job
+    out = {}
+    vocabularies = {n: {} for n in sizes}
+    entries = {n: ([], [], []) for n in sizes}
+    for row, text in enumerate(texts):
+        tokens = TOKEN_PATTERN.findall(text.lower())
+        kept = [t for t in tokens if t not in stop_words]
+        for n in sizes:
+            if n == 1:
+                grams = Counter(tokens)             # Unfiltered: TF-IDF uses all words
+            else:
+                grams = Counter(' '.join(kept[i:i + n]) for i in range(len(kept) - n + 1))
+            vocabulary = vocabularies[n]
+            rows, cols, data = entries[n]
+            for gram, count in grams.items():
+                rows.append(row)
+                cols.append(vocabulary.setdefault(gram, len(vocabulary)))
+                data.append(count)
+    for n in sizes:
+        rows, cols, data = entries[n]
+        out[n] = (list(vocabularies[n]), np.array(rows, dtype=np.int32),
+                  np.array(cols, dtype=np.int32), np.array(data, dtype=np.int32))
+    return out
+
+
+class NgramIndex:
+    """
+    Exact sparse n-gram counts of an article corpus, updated incrementally.
+
+    Parameters:
+        path (str or None): Directory of the index. An existing index is opened;
+            None keeps it in memory only.
+        stop_words (iterable or None): Removed before forming n-grams of size > 1
+            (default: the notebook's stops_soft).
+        sizes (tuple): N-gram sizes to index.
+    """
+
+    def __init__(self, path=None, stop_words=None, sizes=NGRAM_SIZES):
+        self.path = path
+        self.stop_words = frozenset(stop_words) if stop_words is not None else soft_stop_words()
+        self.stop_hash = _text_hash('\n'.join(sorted(self.stop_words)))
+        self.sizes = tuple(sizes)
+        self.vocabulary = {n: {} for n in self.sizes}   # term -> id, in order of first appearance
+        self.terms = {n: [] for n in self.sizes}
+        self.totals = {n: np.zeros(0, dtype=np.int64) for n in self.sizes}
+        self.parts = []                             # [{n: (rows, cols, data)}] with global ids
+        self.saved_parts = 0
+        self.saved_terms = {n: 0 for n in self.sizes}
+        self.docs = {}                              # key -> [row, text hash]
+        self.deleted = set()
+        self.n_rows = 0
+        self._matrices = {}                         # Cached matrices and tie orders, reset on every change
+        if path and os.path.exists(os.path.join(path, 'meta.json')):
+            self._load()
+
+    # ---------------------------
+    # Ingestion
+    # ---------------------------
+    def add(self, texts, keys=None, processes=None, partition_size=2000):
+        """
+        Add documents; returns the number of new rows. Documents whose key is already
+        indexed with the same text are skipped, a changed text replaces the old row.
+
+        Parameters:
+            texts (iterable of str): Document texts (non-strings count as "").
+            keys (iterable or None): Document keys (e.g. URLs, or the DataFrame index),
+                default the text hash. Keys are stored as str(key).
+            processes (int or None): Worker processes for tokenizing (default: all cores).
+        """
+        texts = [t if isinstance(t, str) else "" for t in texts]
+        hashes = [_text_hash(t) for t in texts]
+        keys = [str(key) for key in keys] if keys is not None else hashes   # meta.json stores string keys
+        new, seen = [], set()
+        for i, (key, h) in enumerate(zip(keys, hashes)):
+            if key in seen or self.docs.get(key, [None, None])[1] == h:
+                continue                            # Duplicate in this batch or unchanged
+            seen.add(key)
+            if key in self.docs:
+                self._remove_row(key)
+            new.append(i)
+        if not new:
+            return 0
+
+        jobs = [([texts[i] for i in new[s:s + partition_size]], self.stop_words, self.sizes)
+                for s in range(0, len(new), partition_size)]
+        workers = processes or os.cpu_count() or 1
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                results = list(pool.map(_ingest_partition, jobs))
+        else:
+            results = [_ingest_partition(job) for job in jobs]
+
+        # Merge the partitions in order, so the vocabulary stays in order of first appearance
+        part = {n: ([], [], []) for n in self.sizes}
+        offset = self.n_rows
+        for job, result in zip(jobs, results):
+            for n in self.sizes:
+                local_terms, rows, cols, data = result[n]
+                vocabulary = self.vocabulary[n]
+                global_ids = np.array([vocabulary.setdefault(t, len(vocabulary)) for t in local_terms],
+                                      dtype=np.int32)
+                part[n][0].append(rows + offset)
+                part[n][1].append(global_ids[cols] if len(cols) else cols)
+                part[n][2].append(data)
+            offset += len(job[0])
+        merged = {}
+        for n in self.sizes:
+            self.terms[n].extend(list(self.vocabulary[n])[len(self.terms[n]):])
+            rows, cols, data = (np.concatenate(a) for a in part[n])
+            merged[n] = (rows, cols, data)
+            totals = np.zeros(len(self.terms[n]), dtype=np.int64)
+            totals[:len(self.totals[n])] = self.totals[n]
+            np.add.at(totals, cols, data)
+            self.totals[n] = totals
+        self.parts.append(merged)
+        for row, i in enumerate(new, self.n_rows):
+            self.docs[keys[i]] = [row, hashes[i]]
+        self.n_rows = offset
+        self._matrices = {}
+        return len(new)
+
+    def _remove_row(self, key):
+        row = self.docs.pop(key)[0]
+        self.deleted.add(row)
+        for n in self.sizes:
+            counts = self.matrix(n, live_only=False).getrow(row)
+            np.subtract.at(self.totals[n], counts.indices, counts.data)
+
+    def remove(self, keys):
+        """Drop documents from the index (their counts no longer appear in any result)."""
+        for key in map(str, keys):
+            if key in self.docs:
+                self._remove_row(key)
+        self._matrices = {}
+
+    # ---------------------------
+    # Queries
+    # ---------------------------
+    def matrix(self, n, live_only=True):
+        """documents x terms CSR counts for n-grams of size n (rows of removed documents dropped)."""
+        from scipy import sparse
+
+        if (n, live_only) not in self._matrices:
+            arrays = [p[n] for p in self.parts]
+            rows, cols, data = ((np.concatenate([a[k] for a in arrays]) if arrays else np.empty(0, np.int32))
+                                for k in range(3))
+            m = sparse.csr_matrix((data, (rows, cols)), shape=(self.n_rows, len(self.terms[n])))
+            if live_only and self.deleted:
+                m = m[self.live_rows()]
+            self._matrices[(n, live_only)] = m
+        return self._matrices[(n, live_only)]
+
+    def live_rows(self):
+        return np.array(sorted(row for row, _ in self.docs.values()), dtype=np.int64)
+
+    def keys(self):
+        """Document keys in the row order of matrix() / tfidf()."""
+        return [key for key, _ in sorted(self.docs.items(), key=lambda item: item[1][0])]
+
+    def top_ngrams(self, n, k=20, exclude=()):
+        """
+        The k most frequent n-grams, like the notebook's get_clean_top_n: excluded terms
+        are skipped, n-grams that repeat a word are skipped, ties keep the order of
+        first appearance in the live documents.
+        """
+        exclude = set(exclude)
+        if n == 1:
+            exclude |= self.stop_words              # Unigrams are stored unfiltered
+        totals = self.totals[n]
+        if self.deleted:                            # Term ids follow the first appearance in all rows, removed ones too
+            order = np.lexsort((self._first_live(n), -totals))
+        else:
+            order = np.argsort(-totals, kind='stable')
+        result = []
+        for i in order:
+            if totals[i] <= 0 or len(result) == k:
+                break
+            term = self.terms[n][i]
+            parts = term.split()
+            if term in exclude or len(set(parts)) != len(parts):
+                continue
+            result.append((term, int(totals[i])))
+        return result
+
+    def _first_live(self, n):
+        """Per term, the position of its first occurrence in the live rows (the parts are in text order)."""
+        if (n, 'first_live') not in self._matrices:
+            rows = np.concatenate([p[n][0] for p in self.parts])
+            cols = np.concatenate([p[n][1] for p in self.parts])
+            live = np.ones(self.n_rows, dtype=bool)
+            live[list(self.deleted)] = False
+            cols = cols[live[rows]]
+            first = np.full(len(self.terms[n]), len(cols), dtype=np.int64)
+            terms, position = np.unique(cols, return_index=True)
+            first[terms] = position
+            self._matrices[(n, 'first_live')] = first
+        return self._matrices[(n, 'first_live')]
+
+    def tfidf(self, max_features=1000):
+        """
+        TF-IDF matrix as TfidfVectorizer(max_features=...) would fit it on the indexed
+        documents (smooth idf, l2 norm). Returns (CSR matrix, feature names).
+        """
+        from scipy import sparse
+
+        counts = self.matrix(1)
+        totals = np.asarray(counts.sum(axis=0)).ravel()
+        present = np.nonzero(totals)[0]
+        # CountVectorizer sorts the features alphabetically, then keeps the max_features most frequent
+        alphabetical = present[np.argsort(np.array(self.terms[1], dtype=object)[present])]
+        if max_features is not None and len(alphabetical) > max_features:
+            keep = np.sort((-totals[alphabetical]).argsort()[:max_features])
+            alphabetical = alphabetical[keep]
+        X = counts[:, alphabetical].astype(np.float64)
+        n_docs = X.shape[0]
+        df = np.bincount(X.indices, minlength=X.shape[1])
+        idf = np.log((1 + n_docs) / (1 + df)) + 1
+        X = X @ sparse.diags(idf)
+        norms = np.sqrt(np.asarray(X.multiply(X).sum(axis=1)).ravel())
+        norms[norms == 0] = 1
+        X = sparse.csr_matrix(sparse.diags(1 / norms) @ X)
+        return X, [self.terms[1][i] for i in alphabetical]
+
+    def top_keywords(self, k=5, max_features=1000, block=5000):
+        """Task 2A's Top_TFIDF_Keywords: the k highest TF-IDF terms per document, ", " joined."""
+        X, names = self.tfidf(max_features)
+        names = np.array(names, dtype=object)
+        result = []
+        for start in range(0, X.shape[0], block):
+            dense = X[start:start + block].toarray()
+            top = dense.argsort(axis=1)[:, -k:][:, ::-1]         # Same sort as the notebook's per-row argsort
+            for row, idx in zip(dense, top):
+                result.append(", ".join(names[idx[row[idx] > 0]]))
+        return result
+
+    # ---------------------------
+    # Persistence
+    # ---------------------------
+    def save(self):
+        """Write the parts and vocabulary lines added since the last save."""
+        if not self.path:
+            raise ValueError("This index has no path")
+        os.makedirs(self.path, exist_ok=True)
+        for number in range(self.saved_parts, len(self.parts)):
+            arrays = {f"{name}_{n}": a for n, values in self.parts[number].items()
+                      for name, a in zip(('rows', 'cols', 'data'), values)}
+            np.savez_compressed(os.path.join(self.path, f"part-{number:05d}.npz"), **arrays)
+        self.saved_parts = len(self.parts)
+        for n in self.sizes:
+            with open(os.path.join(self.path, f"vocab_{n}.txt"), 'a', encoding='utf-8') as f:
+                f.writelines(term + '\n' for term in self.terms[n][self.saved_terms[n]:])
+            self.saved_terms[n] = len(self.terms[n])
+        meta = {'stop_hash': self.stop_hash, 'sizes': self.sizes, 'n_rows': self.n_rows,
+                'parts': len(self.parts), 'docs': self.docs, 'deleted': sorted(self.deleted)}
+        tmp = os.path.join(self.path, 'meta.json.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(self.path, 'meta.json'))    # The parts above only count once meta lists them
+
+    def _load(self):
+        with open(os.path.join(self.path, 'meta.json'), encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta['stop_hash'] != self.stop_hash or tuple(meta['sizes']) != self.sizes:
+            raise ValueError(f"The index in '{self.path}' was built with other stop words or n-gram sizes; "
+                             f"rebuild it in a new directory")
+        self.n_rows = meta['n_rows']
+        self.docs = meta['docs']
+        self.deleted = set(meta['deleted'])
+        for number in range(meta['parts']):
+            with np.load(os.path.join(self.path, f"part-{number:05d}.npz")) as arrays:
+                self.parts.append({n: tuple(arrays[f"{name}_{n}"] for name in ('rows', 'cols', 'data'))
+                                   for n in self.sizes})
+        self.saved_parts = len(self.parts)
+        for n in self.sizes:
+            with open(os.path.join(self.path, f"vocab_{n}.txt"), encoding='utf-8') as f:
+                self.terms[n] = f.read().split('\n')[:-1]
+            self.vocabulary[n] = {term: i for i, term in enumerate(self.terms[n])}
+            self.saved_terms[n] = len(self.terms[n])
+            live = self.matrix(n)
+            self.totals[n] = np.zeros(len(self.terms[n]), dtype=np.int64)
+            np.add.at(self.totals[n], live.indices, live.data)
+
+
+def ngram_report(index, k=20):
+    """Task 2C report as one frame (Sheet, term column, Frequency); ArticleStore.export_excel writes the three sheets."""
+    import pandas as pd
+
+    frames = []
+    for n, (sheet, column) in REPORT_SHEETS.items():
+        exclude = SINGLE_WORD_BANS if n == 1 else ()
+        top = index.top_ngrams(n, k, exclude=exclude)
+        frames.append(pd.DataFrame(top, columns=[column, 'Frequency']).assign(Sheet=sheet))
+    return pd.concat(frames, ignore_index=True)
+
+
+# -------------------------------
+# Benchmark
+# -------------------------------
+def _notebook_top_n(corpus, n=20, n_gram=(1, 1), custom_stops=None):
+    """Task 2C's get_clean_top_n (reference)."""
+    from sklearn.feature_extraction.text import CountVectorizer
+
+    vec = CountVectorizer(stop_words=custom_stops, ngram_range=n_gram, max_features=10000).fit(corpus)
+    sum_words = vec.transform(corpus).sum(axis=0)
+    words_freq = [(word, sum_words[0, idx]) for word, idx in vec.vocabulary_.items()]
+    clean_list = []
+    for word, freq in sorted(words_freq, key=lambda x: x[1], reverse=True):
+        if " " in word:
+            parts = word.split()
+            if len(set(parts)) != len(parts):
+                continue
+        clean_list.append((word, int(freq)))
+        if len(clean_list) == n:
+            break
+    return clean_list
+
+
+def _notebook_keywords(corpus):
+    """Task 2A's TF-IDF keywords (reference)."""
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
+    vectorizer = TfidfVectorizer(max_features=1000)
+    tfidf_matrix = vectorizer.fit_transform(corpus)
+    feature_names = vectorizer.get_feature_names_out()
+    top_keywords = []
+    for i in range(tfidf_matrix.shape[0]):
+        row = tfidf_matrix[i]
+        if row.nnz > 0:
+            top_indices = row.toarray()[0].argsort()[-5:][::-1]
+            top_keywords.append(", ".join(feature_names[idx] for idx in top_indices if row[0, idx] > 0))
+        else:
+            top_keywords.append("")
+    return top_keywords
+
+
+def _notebook_run(corpus):
+    soft = list(soft_stop_words())
+    hard = soft + SINGLE_WORD_BANS
+    tops = {1: _notebook_top_n(corpus, 20, (1, 1), hard), 2: _notebook_top_n(corpus, 20, (2, 2), soft),
+            3: _notebook_top_n(corpus, 20, (3, 3), soft)}
+    return tops, _notebook_keywords(corpus)
+
+
+def benchmark(n=20_000, new=2_000, processes=None, path='ngram_index_benchmark'):
+    """
+    Build an index over n synthetic articles, then add `new` more: time and results
+    against the notebook's code (which reruns on the whole corpus every time).
+    """
+    import shutil
+
+    from keyword_tagger import synthetic_documents
+
+    texts = synthetic_documents(n + new, length=(150, 450), seed=1)
+    old, added = texts[:n], texts[n:]
+    shutil.rmtree(path, ignore_errors=True)
+    try:
+        start = time.perf_counter()
+        nb_tops, nb_keywords = _notebook_run(old)
+        notebook_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = NgramIndex(path)
+        index.add(old, processes=processes)
+        index.save()
+        tops = {k: index.top_ngrams(k, 20, SINGLE_WORD_BANS if k == 1 else ()) for k in (1, 2, 3)}
+        keywords = index.top_keywords()
+        build_seconds = time.perf_counter() - start
+        same = tops == nb_tops and keywords == nb_keywords
+        print(f"{n} documents: notebook {notebook_seconds:.2f} s, index build {build_seconds:.2f} s "
+              f"-> same top-20 and TF-IDF keywords: {same}")
+
+        start = time.perf_counter()
+        nb_tops, nb_keywords = _notebook_run(texts)
+        notebook_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        index = NgramIndex(path)                    # Reopen from disk
+        index.add(added, processes=processes)
+        index.save()
+        tops = {k: index.top_ngrams(k, 20, SINGLE_WORD_BANS if k == 1 else ()) for k in (1, 2, 3)}
+        update_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        keywords = index.top_keywords()
+        keyword_seconds = time.perf_counter() - start
+        same = tops == nb_tops and keywords == nb_keywords
+        print(f"+{new} documents: notebook rerun {notebook_seconds:.2f} s, index update + top-20 "
+              f"{update_seconds:.2f} s (+ TF-IDF keywords {keyword_seconds:.2f} s) -> same results: {same}")
+        print(f"vocabulary: {', '.join(f'{len(index.terms[k])} {k}-grams' for k in index.sizes)}")
+
+        # Removing the oldest documents drops the first appearance of many tied terms
+        removed = len(texts) // 10
+        index.remove(index.keys()[:removed])
+        nb_tops, nb_keywords = _notebook_run(texts[removed:])
+        tops = {k: index.top_ngrams(k, 20, SINGLE_WORD_BANS if k == 1 else ()) for k in (1, 2, 3)}
+        same = tops == nb_tops and index.top_keywords() == nb_keywords
+        print(f"-{removed} documents: same results as the notebook on the remaining ones: {same}")
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,361 @@
+"""
+CE49X Final Project - Pipeline runner
+Resumable stage graph with per-row checkpoints
+
+The notebook resumes each task with an all-or-nothing check ("if FILE_WITH_TEXT
+exists, skip Task 1B"), and Task 2B keeps its own completed_indices.txt and backup
+xlsx. After a crash at row 900, or after a changed parameter, the whole task is run
+again by hand.
+
+Here every task is a stage in a small graph:
+
+    pipe = Pipeline('checkpoints.sqlite')
+    pipe.frame('raw', collect_news)                                   # Task 1A: () -> DataFrame
+    pipe.rows('scrape', fetch_rows, after='raw', inputs=['URL'],
+              outputs=['Final_URL', 'Full_Text', 'Scrape_Status'], batch=True)
+    pipe.frame('sanitize', sanitize, after='scrape')                 # Task 1C: df -> df
+    pipe.rows('clean', clean_pipeline, after='sanitize', inputs=['Full_Text'], outputs=['Clean_Text'])
+    pipe.rows('summary', summarize, after='sanitize', inputs=['Full_Text'], outputs=['AI_Summary'])
+    frames = pipe.run()
+
+    - row stages: func(value, ..., **params) per row (in `workers` threads), or with
+      batch=True func(chunk_df, **params) -> DataFrame of the outputs for a chunk of rows
+    - frame stages: func(*upstream_frames, **params) -> DataFrame (dedupe, TF-IDF, plots)
+    - every result is stored in SQLite under a content address:
+          row:   sha1(stage fingerprint, input values of the row)
+          frame: sha1(stage fingerprint, contents of the upstream frames)
+      where the fingerprint is the stage name, the source code of func and params.
+      A rerun recomputes only rows whose inputs, code or params changed; all other
+      rows (and everything downstream of unchanged rows) come from the checkpoints
+    - row results are committed every commit_every rows, so a crash loses at most
+      one chunk
+    - stages whose dependencies are done run at the same time (threads: the slow
+      stages wait for the network or an LLM, not for the CPU)
+"""
+
+import hashlib
+import inspect
+import pickle
+import sqlite3
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+def _fingerprint(name, func, params, version):
+    """Stage identity: changes whenever the code or the parameters change."""
+    try:
+        code = inspect.getsource(func)
+    except (OSError, TypeError):                    # Built-ins, some notebook lambdas
+        code = getattr(func, '__code__', None)
+        code = repr((code.co_code, code.co_consts)) if code is not None else repr(func)
+    return hashlib.sha1(repr((name, code, sorted(params.items()), version)).encode()).hexdigest()
+
+
+def _frame_digest(df):
+    """Content hash of a DataFrame (values, index and column names)."""
+    import pandas as pd
+
+    h = hashlib.sha1(repr(list(df.columns)).encode())
+    try:
+        h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    except TypeError:                               # Unhashable cells (lists, dicts)
+        h.update(pickle.dumps(df))
+    return h.hexdigest()
+
+
+class Stage:
+    def __init__(self, name, func, kind, after=(), inputs=(), outputs=(), params=None,
+                 batch=False, workers=1, commit_every=50, version=None):
+        self.name = name
+        self.func = func
+        self.kind = kind                            # 'rows' or 'frame'
+        self.after = [after] if isinstance(after, str) else list(after)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.params = dict(params or {})
+        self.batch = batch
+        self.workers = workers
+        self.commit_every = commit_every
+        self.fingerprint = _fingerprint(name, func, self.params, version)
+
+
+class CheckpointStore:
+    """SQLite table (stage, key) -> pickled result, shared by all stages."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS checkpoints "
+                          "(stage TEXT, key TEXT, value BLOB, PRIMARY KEY (stage, key))")
+        self.conn.commit()
+
+    def get_many(self, stage, keys):
+        found = {}
+        keys = list(set(keys))
+        with self.lock:
+            for i in range(0, len(keys), 900):      # SQLite limit on bound parameters
+                chunk = keys[i:i + 900]
+                rows = self.conn.execute(
+                    f"SELECT key, value FROM checkpoints WHERE stage = ? AND key IN ({','.join('?' * len(chunk))})",
+                    [stage, *chunk])
+                found.update((key, pickle.loads(value)) for key, value in rows)
+        return found
+
+    def put_many(self, stage, items):
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)",
+                                  [(stage, key, pickle.dumps(value)) for key, value in items])
+            self.conn.commit()
+
+    def prune(self, stage, keep):
+        """Delete the checkpoints of a stage that are not in keep; returns how many."""
+        with self.lock:
+            self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS keep (key TEXT PRIMARY KEY)")
+            self.conn.execute("DELETE FROM keep")
+            self.conn.executemany("INSERT OR IGNORE INTO keep VALUES (?)", [(k,) for k in keep])
+            deleted = self.conn.execute("DELETE FROM checkpoints WHERE stage = ? AND key NOT IN (SELECT key FROM keep)",
+                                        (stage,)).rowcount
+            self.conn.commit()
+        return deleted
+
+    def close(self):
+        self.conn.close()
+
+
+class Pipeline:
+    """
+    Stage graph with content-addressed checkpoints.
+
+    Parameters:
+        checkpoint_path (str): SQLite file for the checkpoints (created if missing).
+        max_parallel_stages (int): Stages that may run at the same time.
+    """
+
+    def __init__(self, checkpoint_path='pipeline_checkpoints.sqlite', max_parallel_stages=4):
+        self.store = CheckpointStore(checkpoint_path)
+        self.max_parallel_stages = max_parallel_stages
+        self.stages = {}
+        self.stats = {}
+        self.used_keys = {}
+
+    def _add(self, stage):
+        if stage.name in self.stages:
+            raise ValueError(f"Stage '{stage.name}' already exists")
+        missing = [s for s in stage.after if s not in self.stages]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stages {missing} (add them first)")
+        self.stages[stage.name] = stage
+        return stage
+
+    def frame(self, name, func, after=(), params=None, version=None):
+        """Whole-frame stage: func(*upstream_frames, **params) -> DataFrame."""
+        return self._add(Stage(name, func, 'frame', after, params=params, version=version))
+
+    def rows(self, name, func, after, inputs, outputs, params=None, batch=False, workers=1,
+             commit_every=50, version=None):
+        """
+        Row stage on the single upstream frame `after`. The result is the upstream frame
+        with the output columns added (or replaced).
+
+        func(*input_values, **params) returns one value per output column (a tuple if
+        there are several); with batch=True func(chunk_df, **params) gets the input
+        columns of up to commit_every rows and returns a DataFrame with the output columns.
+        version (any) can be bumped to force a recompute when something outside func changed.
+        """
+        if isinstance(after, (list, tuple)) and len(after) != 1:
+            raise ValueError("A row stage has exactly one upstream stage")
+        return self._add(Stage(name, func, 'rows', after, inputs, outputs, params, batch,
+                               workers, commit_every, version))
+
+    # ---------------------------
+    # Execution
+    # ---------------------------
+    def _row_keys(self, stage, df):
+        prefix = stage.fingerprint.encode()
+        columns = [df[c].tolist() for c in stage.inputs]
+        return [hashlib.sha1(prefix + repr(values).encode()).hexdigest() for values in zip(*columns)]
+
+    def _compute_rows(self, stage, chunk):
+        if stage.batch:
+            out = stage.func(chunk[stage.inputs], **stage.params)
+            return list(zip(*(out[c].tolist() for c in stage.outputs)))
+
+        def one(values):
+            result = stage.func(*values, **stage.params)
+            return result if len(stage.outputs) > 1 else (result,)
+
+        rows = list(zip(*(chunk[c].tolist() for c in stage.inputs)))
+        if stage.workers > 1:
+            with ThreadPoolExecutor(stage.workers) as pool:
+                return list(pool.map(one, rows))
+        return [one(values) for values in rows]
+
+    def _run_rows(self, stage, upstream):
+        keys = self._row_keys(stage, upstream)
+        cached = self.store.get_many(stage.name, keys)
+        todo = [i for i, key in enumerate(keys) if key not in cached]
+        # Identical rows (same inputs) are computed once
+        first = {}
+        for i in todo:
+            first.setdefault(keys[i], i)
+        pending = list(first.values())
+        for start in range(0, len(pending), stage.commit_every):
+            positions = pending[start:start + stage.commit_every]
+            results = self._compute_rows(stage, upstream.iloc[positions])
+            items = [(keys[i], tuple(r)) for i, r in zip(positions, results)]
+            self.store.put_many(stage.name, items)           # Checkpoint before the next chunk
+            cached.update(items)
+        df = upstream.copy()
+        values = [cached[key] for key in keys]
+        for j, column in enumerate(stage.outputs):
+            df[column] = [v[j] for v in values]
+        self.used_keys[stage.name] = set(keys)
+        return df, len(keys) - len(pending), len(pending)
+
+    def _run_frame(self, stage, upstream_frames):
+        h = hashlib.sha1(stage.fingerprint.encode())
+        for df in upstream_frames:
+            h.update(_frame_digest(df).encode())
+        key = h.hexdigest()
+        self.used_keys[stage.name] = {key}
+        cached = self.store.get_many(stage.name, [key])
+        if key in cached:
+            return cached[key], 1, 0
+        df = stage.func(*upstream_frames, **stage.params)
+        self.store.put_many(stage.name, [(key, df)])
+        return df, 0, 1
+
+    def _run_stage(self, stage, frames):
+        start = time.perf_counter()
+        upstream = [frames[name] for name in stage.after]
+        if stage.kind == 'rows':
+            df, reused, computed = self._run_rows(stage, upstream[0])
+        else:
+            df, reused, computed = self._run_frame(stage, upstream)
+        self.stats[stage.name] = {'reused': reused, 'computed': computed,
+                                  'seconds': time.perf_counter() - start}
+        return df
+
+    def _needed(self, targets):
+        needed, stack = set(), list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.stages[name].after)
+        return needed
+
+    def run(self, targets=None):
+        """
+        Run the stages needed for targets (default: all) and return {stage name: DataFrame}.
+        Stages start as soon as their upstream stages are done; independent stages run in parallel.
+        """
+        needed = self._needed(targets or list(self.stages))
+        frames, running = {}, {}
+        self.stats = {}
+        with ThreadPoolExecutor(self.max_parallel_stages) as pool:
+            while len(frames) < len(needed):
+                for name in needed:
+                    stage = self.stages[name]
+                    if name not in frames and name not in running and all(a in frames for a in stage.after):
+                        running[name] = pool.submit(self._run_stage, stage, frames)
+                done, _ = wait(running.values(), return_when=FIRST_COMPLETED)
+                for name in [n for n, f in running.items() if f in done]:
+                    frames[name] = running.pop(name).result()       # Re-raises a stage error
+        return frames
+
+    def prune(self):
+        """Drop checkpoints the last run did not use (old code versions, removed rows)."""
+        return {name: self.store.prune(name, keys) for name, keys in self.used_keys.items()}
+
+    def report(self):
+        """Rows reused from checkpoints / computed, and seconds, per stage of the last run."""
+        print(f"{'stage':12s} {'reused':>8s} {'computed':>9s} {'seconds':>8s}")
+        for name, s in self.stats.items():
+            print(f"{name:12s} {s['reused']:8d} {s['computed']:9d} {s['seconds']:8.2f}")
+
+    def close(self):
+        self.store.close()
+
+
+# -------------------------------
+# Demo with synthetic stages
+# -------------------------------
+def _demo_raw(n):
+    import pandas as pd
+
+    return pd.DataFrame({'URL': [f'https://example.com/news/{i}' for i in range(n)],
+                         'Title': [f'Article {i}' for i in range(n)]})
+
+
+_crash_at = None                                    # Row number where _demo_scrape fails (demo only)
+
+
+def _demo_scrape(url, delay):
+    time.sleep(delay)                               # Network wait
+    if _crash_at is not None and url.endswith(f'/{_crash_at}'):
+        raise RuntimeError(f"simulated crash at {url}")
+    number = int(url.rsplit('/', 1)[1])
+    return f"Text of article {number} about bridge monitoring with machine learning. " * 5, 'Success'
+
+
+def _demo_sanitize(df):
+    return df[df['Scrape_Status'] == 'Success'].drop_duplicates(subset=['URL'])
+
+
+def _demo_clean(text, min_length):
+    return ' '.join(w for w in text.lower().split() if len(w) > min_length)
+
+
+def _demo_summary(text, delay):
+    time.sleep(delay)                               # LLM call
+    return text[:60]
+
+
+def demo(path='pipeline_demo.sqlite', n=200, delay=0.005):
+    """Crash, resume, rerun and a parameter change on synthetic stages; prints what was recomputed."""
+    import os
+    global _crash_at
+
+    if os.path.exists(path):
+        os.remove(path)
+
+    def build(min_length=2):
+        pipe = Pipeline(path)
+        pipe.frame('raw', _demo_raw, params={'n': n})
+        pipe.rows('scrape', _demo_scrape, after='raw', inputs=['URL'], outputs=['Full_Text', 'Scrape_Status'],
+                  params={'delay': delay}, workers=8)
+        pipe.frame('sanitize', _demo_sanitize, after='scrape')
+        pipe.rows('clean', _demo_clean, after='sanitize', inputs=['Full_Text'], outputs=['Clean_Text'],
+                  params={'min_length': min_length})
+        pipe.rows('summary', _demo_summary, after='sanitize', inputs=['Full_Text'], outputs=['AI_Summary'],
+                  params={'delay': delay}, workers=4)
+        return pipe
+
+    _crash_at = n // 2 + 10
+    print(f"1) crash in the scrape stage at row {_crash_at}")
+    pipe = build()
+    try:
+        pipe.run()
+    except RuntimeError as e:
+        print("   stopped:", e)
+    pipe.report()
+    pipe.close()
+    _crash_at = None
+
+    for title, kwargs in (("2) resume after the crash", {}),
+                          ("3) rerun without changes", {}),
+                          ("4) min_length of 'clean' changed", {'min_length': 3})):
+        print(title)
+        pipe = build(**kwargs)
+        pipe.run()
+        pipe.report()
+        pipe.close()
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    demo()
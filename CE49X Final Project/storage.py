@@ -0,0 +1,298 @@
+"""
+CE49X Final Project - Storage
+Parquet / SQLite store for the intermediate tables of the pipeline
+
+Every task of the notebook writes its result with to_excel and the next task reads
+it back with read_excel. With the full article texts in the frames this is the
+slowest part between the stages: openpyxl writes and parses every cell as XML, and
+each task reads all columns even if it only needs two of them.
+
+ArticleStore keeps one table per stage instead:
+
+    - backend 'parquet': one compressed columnar file per stage (needs pyarrow);
+      load(columns=[...]) reads only those columns from disk
+    - backend 'sqlite': one database file with a table per stage and indexes on
+      URL and Title, so lookups of single articles do not scan the table
+    - Excel is only an export: export_excel() writes the file names the notebook
+      and the report use, import_excel() converts xlsx files of earlier runs
+
+    store = ArticleStore('ce49x_store')
+    store.save('text', df)
+    df = store.load('text', columns=['URL', 'Full_Text'])
+    store.export_excel('text')                       # -> CE49X_FINAL_DATASET_WITH_TEXT.xlsx
+
+`python storage.py benchmark` compares the write and read time of every stage
+for xlsx, Parquet and SQLite on a synthetic 1000 article dataset.
+"""
+
+import argparse
+import contextlib
+import os
+import sqlite3
+import time
+
+# Stage -> Excel file of the notebook (Cell 2: Global Settings)
+EXCEL_FILES = {
+    'raw': "CE49X_RAW_DATA_1000_FULL.xlsx",                    # Task 1A
+    'text': "CE49X_FINAL_DATASET_WITH_TEXT.xlsx",              # Task 1B
+    'clean': "CE49X_TASK1_FINAL_CLEAN.xlsx",                   # Task 1C
+    'summary': "CE49X_TASK2_FINAL_SUBMISSIONBRT.xlsx",         # Task 2A
+    'nlp_final': "CE49X_Final_Clean_Related_Articles.xlsx",    # Task 2B
+    'ngrams': "CE49X_Project_Top20Words_Top20bigrams_Top20Trigrams.xlsx",  # Task 2C
+    'tagged': "CE49X_Task3_Classification of Diciplines.xlsx",  # Task 3
+}
+INDEX_COLUMNS = ('URL', 'Title')
+NGRAM_SHEETS = ('Top20_Words', 'Top20_Bigrams', 'Top20_Trigrams')
+
+
+def _has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class ArticleStore:
+    """
+    Tables of the pipeline stages in one directory.
+
+    Parameters:
+        path (str): Directory of the store (created if missing).
+        backend (str): 'parquet', 'sqlite' or 'auto' (Parquet if pyarrow is installed).
+        compression (str): Parquet codec ('zstd', 'snappy', ...).
+    """
+
+    def __init__(self, path='ce49x_store', backend='auto', compression='zstd'):
+        if backend == 'auto':
+            backend = 'parquet' if _has_pyarrow() else 'sqlite'
+        if backend not in ('parquet', 'sqlite'):
+            raise ValueError(f"Unknown backend '{backend}' (use 'parquet' or 'sqlite')")
+        self.path = path
+        self.backend = backend
+        self.compression = compression
+        os.makedirs(path, exist_ok=True)
+
+    def _parquet_file(self, stage):
+        return os.path.join(self.path, f"{stage}.parquet")
+
+    @contextlib.contextmanager
+    def _connect(self):
+        """Connection that commits (rolls back on error) and is closed on exit."""
+        conn = sqlite3.connect(os.path.join(self.path, 'store.sqlite'))
+        try:
+            with conn:                                      # sqlite3's own context only ends the transaction
+                yield conn
+        finally:
+            conn.close()
+
+    def stages(self):
+        """Names of the stored stages."""
+        if self.backend == 'parquet':
+            return sorted(f[:-len('.parquet')] for f in os.listdir(self.path) if f.endswith('.parquet'))
+        with self._connect() as conn:
+            return [r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' ORDER BY name")]
+
+    def exists(self, stage):
+        return stage in self.stages()
+
+    def save(self, stage, df):
+        """Replace the table of a stage with df (the index is not stored, like to_excel(index=False))."""
+        df = df.reset_index(drop=True)
+        if self.backend == 'parquet':
+            tmp = self._parquet_file(stage) + '.tmp'
+            df.to_parquet(tmp, compression=self.compression, index=False)
+            os.replace(tmp, self._parquet_file(stage))          # Never leave a half-written file
+            return
+        with self._connect() as conn:
+            df.to_sql(stage, conn, if_exists='replace', index=False, chunksize=500)
+            for column in INDEX_COLUMNS:
+                if column in df.columns:
+                    conn.execute(f'CREATE INDEX IF NOT EXISTS "{stage}_{column}" ON "{stage}" ("{column}")')
+
+    def load(self, stage, columns=None, urls=None):
+        """
+        Read a stage.
+
+        Parameters:
+            columns (list or None): Columns to read, None reads all.
+            urls (list or None): Only the rows with these URLs (index lookup with SQLite,
+                row-group filter with Parquet).
+        """
+        import pandas as pd
+
+        if not self.exists(stage):
+            raise FileNotFoundError(f"Stage '{stage}' is not in the store '{self.path}'. Run the task first "
+                                    f"or import its Excel file.")
+        if self.backend == 'parquet':
+            urls = list(urls) if urls is not None else None
+            if urls == []:                                  # pyarrow cannot filter on an empty (null typed) list
+                import pyarrow.parquet as pq
+
+                empty = pq.read_schema(self._parquet_file(stage)).empty_table().to_pandas()
+                return empty[columns] if columns else empty
+            filters = [('URL', 'in', urls)] if urls is not None else None
+            return pd.read_parquet(self._parquet_file(stage), columns=columns, filters=filters)
+        select = ', '.join(f'"{c}"' for c in columns) if columns else '*'
+        with self._connect() as conn:
+            if urls is None:
+                return pd.read_sql_query(f'SELECT {select} FROM "{stage}"', conn)
+            urls = list(dict.fromkeys(urls))
+            parts = []
+            for start in range(0, max(len(urls), 1), 900):     # SQLite limits the ? parameters
+                part = urls[start:start + 900]
+                query = f'SELECT rowid AS _rowid, {select} FROM "{stage}" WHERE "URL" IN ({",".join("?" * len(part))})'
+                parts.append(pd.read_sql_query(query, conn, params=part))
+        # Back to table order, as one query would return the rows
+        df = pd.concat(parts, ignore_index=True) if len(parts) > 1 else parts[0]
+        return df.sort_values('_rowid', kind='stable').drop(columns='_rowid').reset_index(drop=True)
+
+    def size_mb(self, stage):
+        if self.backend == 'parquet':
+            return os.path.getsize(self._parquet_file(stage)) / 1e6
+        return os.path.getsize(os.path.join(self.path, 'store.sqlite')) / 1e6      # Whole database
+
+    # ---------------------------
+    # Excel import / export
+    # ---------------------------
+    def export_excel(self, stage, file_path=None):
+        """Write a stage to its notebook file name (or file_path); the n-gram report gets its three sheets."""
+        import pandas as pd
+
+        file_path = file_path or EXCEL_FILES.get(stage, f"{stage}.xlsx")
+        df = self.load(stage)
+        if stage == 'ngrams' and 'Sheet' in df.columns:
+            with pd.ExcelWriter(file_path) as writer:
+                for sheet, part in df.groupby('Sheet', sort=False):
+                    part.drop(columns='Sheet').dropna(axis=1, how='all').to_excel(writer, sheet_name=sheet, index=False)
+        else:
+            df.to_excel(file_path, index=False)
+        return file_path
+
+    def import_excel(self, stage, file_path=None):
+        """Store an xlsx file of an earlier run as a stage (all sheets of the n-gram report)."""
+        import pandas as pd
+
+        file_path = file_path or EXCEL_FILES[stage]
+        if stage == 'ngrams':
+            sheets = pd.read_excel(file_path, sheet_name=None)
+            df = pd.concat([part.assign(Sheet=name) for name, part in sheets.items()], ignore_index=True)
+        else:
+            df = pd.read_excel(file_path)
+        self.save(stage, df)
+        return df
+
+
+# -------------------------------
+# Benchmark
+# -------------------------------
+def synthetic_stages(n=1000, seed=0):
+    """Frames shaped like the notebook's stage outputs, with ~5000 character article texts."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    words = np.array(('bridge concrete sensor crack beam seismic tunnel soil traffic drone model neural '
+                      'network monitoring inspection structure load safety construction site digital twin '
+                      'the of and to in for with on is that by as are from this will be').split())
+
+    def texts(low, high):
+        return [' '.join(words[rng.integers(0, len(words), rng.integers(low, high))]) for _ in range(n)]
+
+    raw = pd.DataFrame({'Title': [f"AI and civil engineering news {i}" for i in range(n)],
+                        'Date': pd.date_range('2024-01-01', periods=n, freq='8h').strftime('%a, %d %b %Y %H:%M:%S GMT'),
+                        'Source': rng.choice(['ENR', 'Construction Dive', 'Reuters', 'Google News RSS'], n),
+                        'URL': [f"https://news.example.com/{i}" for i in range(n)]})
+    text = raw.assign(Final_URL=raw['URL'], Full_Text=texts(500, 1200), Scrape_Status='Success')
+    clean = text.copy()
+    summary = clean.assign(Cleaned_Text_NLP=texts(300, 700), AI_Summary=texts(30, 60),
+                           Top_TFIDF_Keywords=texts(5, 6))
+    nlp_final = summary.iloc[: int(n * 0.8)].copy()
+    tagged = nlp_final.assign(CE_Area=rng.choice(['Structural', 'Geotechnical', 'Transportation'], len(nlp_final)),
+                              AI_Tech=rng.choice(['Computer Vision', 'Machine Learning', 'Robotics'], len(nlp_final)))
+    ngrams = pd.concat([pd.DataFrame({'Word': words[:20], 'Frequency': rng.integers(10, 999, 20), 'Sheet': sheet})
+                        for sheet in NGRAM_SHEETS], ignore_index=True)
+    return {'raw': raw, 'text': text, 'clean': clean, 'summary': summary,
+            'nlp_final': nlp_final, 'ngrams': ngrams, 'tagged': tagged}
+
+
+# Columns the next task actually uses (for the "read only what you need" column)
+READ_COLUMNS = {'raw': ['Title', 'URL'], 'text': ['URL', 'Title', 'Full_Text', 'Scrape_Status'],
+                'clean': ['Title', 'Full_Text'], 'summary': ['Title', 'AI_Summary', 'Cleaned_Text_NLP'],
+                'nlp_final': ['Title', 'Cleaned_Text_NLP', 'Date'], 'tagged': ['CE_Area', 'AI_Tech', 'Date'],
+                'ngrams': None}
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def benchmark(n=1000, path='storage_benchmark'):
+    """Per stage write/read seconds and file size for xlsx (notebook), Parquet and SQLite."""
+    import shutil
+
+    import pandas as pd
+
+    frames = synthetic_stages(n)
+    os.makedirs(path, exist_ok=True)
+    rows = []
+    stores = [ArticleStore(os.path.join(path, backend), backend) for backend in ('parquet', 'sqlite')
+              if backend != 'parquet' or _has_pyarrow()]
+    try:
+        for stage, df in frames.items():
+            xlsx = os.path.join(path, f"{stage}.xlsx")
+            _, write = _timed(df.to_excel, xlsx, index=False)
+            back, read = _timed(pd.read_excel, xlsx)
+            rows.append({'stage': stage, 'format': 'xlsx', 'write_s': write, 'read_s': read,
+                         'read_needed_s': read, 'mb': os.path.getsize(xlsx) / 1e6})
+            for store in stores:
+                before = store.size_mb(stage) if store.backend == 'sqlite' and store.stages() else 0.0
+                _, write = _timed(store.save, stage, df)
+                back, read = _timed(store.load, stage)
+                assert back.equals(df.reset_index(drop=True)), f"{store.backend} round trip changed '{stage}'"
+                none = store.load(stage, urls=[])
+                assert none.empty and list(none.columns) == list(df.columns), f"{store.backend} urls=[] on '{stage}'"
+                _, read_needed = _timed(store.load, stage, READ_COLUMNS[stage])
+                rows.append({'stage': stage, 'format': store.backend, 'write_s': write, 'read_s': read,
+                             'read_needed_s': read_needed, 'mb': store.size_mb(stage) - before})
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+    table = pd.DataFrame(rows)
+    pd.set_option('display.width', 120)
+    print(table.to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    totals = table.groupby('format', sort=False)[['write_s', 'read_s', 'read_needed_s']].sum()
+    print("\nTotal over all stages (s):")
+    print(totals.to_string(float_format=lambda x: f"{x:.3f}"))
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Intermediate tables of the final project")
+    parser.add_argument('command', choices=['import', 'export', 'list', 'benchmark'])
+    parser.add_argument('stages', nargs='*', help="stages (default: all)")
+    parser.add_argument('--store', default='ce49x_store')
+    parser.add_argument('--backend', default='auto', choices=['auto', 'parquet', 'sqlite'])
+    parser.add_argument('-n', type=int, default=1000, help="articles for the benchmark")
+    args = parser.parse_args()
+
+    if args.command == 'benchmark':
+        benchmark(args.n)
+        return
+    store = ArticleStore(args.store, args.backend)
+    if args.command == 'list':
+        for stage in store.stages():
+            print(stage)
+    elif args.command == 'import':
+        for stage in args.stages or EXCEL_FILES:
+            if os.path.exists(EXCEL_FILES[stage]):
+                print(f"{EXCEL_FILES[stage]} -> {stage}: {len(store.import_excel(stage))} rows")
+    else:
+        for stage in args.stages or store.stages():
+            print(f"{stage} -> {store.export_excel(stage)}")
+
+
+if __name__ == "__main__":
+    main()
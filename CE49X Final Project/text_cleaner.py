@@ -0,0 +1,290 @@
+"""
+CE49X Final Project - Task 2A: NLP preprocessing
+Parallel, memoized version of clean_pipeline
+
+clean_pipeline lowercases an article, strips punctuation and digits with two regexes,
+runs nltk.word_tokenize and lemmatizes every remaining word that is not a stop word,
+one article after the other. The same few thousand words are lemmatized (a WordNet
+lookup each) again in every article and on every run.
+
+TextCleaner gives the same output, token for token:
+
+    - one precompiled regex removes punctuation and digits (deleting two sets of
+      characters gives the same text in either order)
+    - after that the text has only word characters and whitespace. Punkt finds no
+      sentence end in it, and NLTK's word tokenizer only splits a few contractions
+      (cannot, gimme, gonna, gotta, lemme, wanna) before splitting on whitespace.
+      So str.split() plus a contraction table gives the same tokens
+    - the stop-word check, the length check and the lemma of a word are computed
+      once per word and kept in a bounded LRU cache, shared by all documents of a
+      process
+    - the corpus is cleaned in chunks over processes, each with its own word cache
+    - cleaned documents are cached by text hash (in memory, or in SQLite with
+      cache_path), so a rerun only cleans new or changed articles
+
+    cleaner = TextCleaner(cache_path='clean_cache.sqlite')
+    df['Cleaned_Text_NLP'] = cleaner.clean(df['Full_Text'].astype(str).tolist())
+    print(cleaner.stats())          # docs/s, word and document cache hit rates
+
+`python text_cleaner.py` compares it with the notebook's clean_pipeline on
+synthetic articles.
+"""
+
+import hashlib
+import os
+import random
+import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+EXTRA_STOP_WORDS = ['subscribe', 'click', 'here', 'read', 'more', 'advertisement', 'copyright', 'share',
+                    'civil', 'engineering']
+STRIP_PATTERN = re.compile(r'[^\w\s]|\d+')        # The notebook's two re.sub calls in one pass
+# The contractions NLTKWordTokenizer splits in text without punctuation
+CONTRACTIONS = {'cannot': ('can', 'not'), 'gimme': ('gim', 'me'), 'gonna': ('gon', 'na'),
+                'gotta': ('got', 'ta'), 'lemme': ('lem', 'me'), 'wanna': ('wan', 'na')}
+
+# Per process state, set by _init_worker
+_stop_words = frozenset()
+_lemmatize = None
+
+
+def custom_stop_words():
+    """Task 2A's custom_stop_words: NLTK's English stop words + EXTRA_STOP_WORDS."""
+    from nltk.corpus import stopwords
+
+    return frozenset(stopwords.words('english')) | frozenset(EXTRA_STOP_WORDS)
+
+
+def notebook_clean_pipeline(text, stop_words=None, _state={}):
+    """Task 2A's clean_pipeline (reference)."""
+    import nltk
+    from nltk.stem import WordNetLemmatizer
+
+    if 'lemmatizer' not in _state:
+        _state['lemmatizer'] = WordNetLemmatizer()
+        _state['stop_words'] = custom_stop_words()
+    lemmatizer = _state['lemmatizer']
+    stops = stop_words if stop_words is not None else _state['stop_words']
+
+    if not isinstance(text, str) or len(text) < 10: return ""
+    text = re.sub(r'[^\w\s]', '', text.lower())
+    text = re.sub(r'\d+', '', text)
+    tokens = nltk.word_tokenize(text)
+    cleaned = [lemmatizer.lemmatize(w) for w in tokens if w not in stops and len(w) > 2]
+    return " ".join(cleaned)
+
+
+def _init_worker(stop_words, cache_size):
+    """Set the stop words and a fresh word cache of this process."""
+    global _stop_words, _lemmatize, _clean_word
+    from nltk.stem import WordNetLemmatizer
+
+    _stop_words = stop_words
+    _lemmatize = WordNetLemmatizer().lemmatize
+    _clean_word = lru_cache(maxsize=cache_size)(_clean_word.__wrapped__)
+
+
+@lru_cache(maxsize=None)
+def _clean_word(word):
+    """Output words of one whitespace separated word (empty if all are filtered)."""
+    words = CONTRACTIONS.get(word, (word,))
+    return tuple(_lemmatize(w) for w in words if w not in _stop_words and len(w) > 2)
+
+
+def _clean_text(text):
+    words = []
+    for word in STRIP_PATTERN.sub('', text.lower()).split():
+        words.extend(_clean_word(word))
+    return " ".join(words)
+
+
+def _clean_chunk(texts):
+    """Clean a chunk; returns (cleaned texts, word cache hits, word cache misses)."""
+    before = _clean_word.cache_info()
+    cleaned = [_clean_text(text) for text in texts]
+    after = _clean_word.cache_info()
+    return cleaned, after.hits - before.hits, after.misses - before.misses
+
+
+class TextCleaner:
+    """
+    clean_pipeline for a whole corpus, with word and document caches.
+
+    Parameters:
+        stop_words (iterable or None): Removed words (default: the notebook's custom_stop_words).
+        cache_size (int): Words kept in the LRU lemma cache of each process.
+        cache_path (str or None): SQLite file of the document cache, None keeps it in memory.
+        processes (int or None): Worker processes (default: all cores).
+        chunksize (int): Documents per job.
+    """
+
+    def __init__(self, stop_words=None, cache_size=200_000, cache_path=None, processes=None, chunksize=500):
+        self.stop_words = frozenset(stop_words) if stop_words is not None else custom_stop_words()
+        self.stop_hash = hashlib.sha1('\n'.join(sorted(self.stop_words)).encode()).hexdigest()
+        self.cache_size = cache_size
+        self.processes = processes
+        self.chunksize = chunksize
+        self.memory = {}
+        self.conn = None
+        if cache_path:
+            self.conn = sqlite3.connect(cache_path)
+            self.conn.execute("CREATE TABLE IF NOT EXISTS cleaned (key TEXT PRIMARY KEY, value TEXT)")
+            self.conn.commit()
+        self.pool = None
+        self.docs = 0
+        self.seconds = 0.0
+        self.doc_hits = 0
+        self.word_hits = 0
+        self.word_misses = 0
+
+    def _key(self, text):
+        # The stop words are part of the key: other stop words give another text
+        return hashlib.sha1((self.stop_hash + text).encode()).hexdigest()
+
+    def _cached(self, keys):
+        if self.conn is None:
+            return {key: self.memory[key] for key in keys if key in self.memory}
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), 900):             # SQLite limits the ? parameters
+            part = keys[start:start + 900]
+            query = f"SELECT key, value FROM cleaned WHERE key IN ({','.join('?' * len(part))})"
+            found.update(self.conn.execute(query, part).fetchall())
+        return found
+
+    def _store(self, items):
+        if self.conn is None:
+            self.memory.update(items)
+        else:
+            self.conn.executemany("INSERT OR REPLACE INTO cleaned VALUES (?, ?)", items)
+            self.conn.commit()
+
+    def _map(self, chunks):
+        workers = self.processes or os.cpu_count() or 1
+        if workers > 1 and len(chunks) > 1:
+            if self.pool is None:                          # Kept open: the word caches live in the workers
+                self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                                initargs=(self.stop_words, self.cache_size))
+            return list(self.pool.map(_clean_chunk, chunks))
+        if _stop_words is not self.stop_words:
+            _init_worker(self.stop_words, self.cache_size)
+        return [_clean_chunk(chunk) for chunk in chunks]
+
+    def clean(self, texts):
+        """
+        Clean a list of texts like clean_pipeline.
+
+        Returns:
+            list[str]: Cleaned texts ("" for non-strings and texts under 10 characters).
+        """
+        start = time.perf_counter()
+        result = ["" for _ in texts]
+        todo = {}                                          # key -> (text, positions)
+        for i, text in enumerate(texts):
+            if isinstance(text, str) and len(text) >= 10:
+                key = self._key(text)
+                todo.setdefault(key, (text, []))[1].append(i)
+        cached = self._cached(todo)
+        self.doc_hits += len(cached)
+        missing = [key for key in todo if key not in cached]
+        chunks = [[todo[key][0] for key in missing[s:s + self.chunksize]]
+                  for s in range(0, len(missing), self.chunksize)]
+        cleaned = []
+        for values, hits, misses in self._map(chunks):
+            cleaned.extend(values)
+            self.word_hits += hits
+            self.word_misses += misses
+        new = list(zip(missing, cleaned))
+        self._store(new)
+        cached.update(new)
+        for key, (_, positions) in todo.items():
+            for i in positions:
+                result[i] = cached[key]
+        self.docs += len(texts)
+        self.seconds += time.perf_counter() - start
+        return result
+
+    def stats(self):
+        """Documents per second and cache hit rates since the cleaner was created."""
+        words = self.word_hits + self.word_misses
+        return {'docs': self.docs, 'seconds': round(self.seconds, 2),
+                'docs_per_s': round(self.docs / self.seconds, 1) if self.seconds else 0.0,
+                'doc_cache_hit_rate': round(self.doc_hits / self.docs, 3) if self.docs else 0.0,
+                'word_cache_hit_rate': round(self.word_hits / words, 3) if words else 0.0}
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+# -------------------------------
+# Benchmark
+# -------------------------------
+def synthetic_articles(n=5_000, length=(300, 900), seed=0):
+    """
+    Article-like texts: words from WordNet with a Zipf-like frequency, some plurals,
+    capitals, stop words, numbers, punctuation and contractions.
+    """
+    from nltk.corpus import wordnet
+
+    rng = random.Random(seed)
+    nouns = sorted(w for w in wordnet.all_lemma_names('n') if w.isalpha())
+    words = rng.sample(nouns, 20_000)
+    words = [w + rng.choice(['s', 'es', '', '', '']) for w in words]
+    weights = [1 / (rank + 10) for rank in range(len(words))]
+    stop = ['the', 'of', 'and', 'to', 'in', 'is', 'that', 'for', 'it', 'was', 'more', 'click', 'here']
+    extras = ['cannot', 'gonna', "don't", 'U.S.', '3D', 'COVID-19', '(2023)', '$4.5', 'e-mail', 'AI-based',
+              'well-known', 'café', 'naïve', 'über', 'km/h', 'engineering,', 'Civil', '10,000']
+    texts = []
+    for _ in range(n):
+        size = rng.randint(*length)
+        tokens = rng.choices(words, weights, k=size)
+        for i in rng.sample(range(size), size // 3):
+            tokens[i] = rng.choice(stop)
+        for i in rng.sample(range(size), size // 40):
+            tokens[i] = rng.choice(extras)
+        for i in range(0, size, rng.randint(8, 20)):
+            tokens[i] = tokens[i].capitalize()
+            if i:
+                tokens[i - 1] += rng.choice(['.', ',', '.', ';', ':', '?'])
+        texts.append(' '.join(tokens) + '.')
+    return texts
+
+
+def benchmark(n=5_000, processes=None):
+    """clean_pipeline vs TextCleaner (cold, then again with the document cache)."""
+    texts = synthetic_articles(n) + ['short', float('nan'), '']
+    notebook_clean_pipeline('warm up the lemmatizer')
+
+    start = time.perf_counter()
+    expected = [notebook_clean_pipeline(t) for t in texts]
+    notebook_seconds = time.perf_counter() - start
+    print(f"notebook clean_pipeline: {len(texts)} docs in {notebook_seconds:.2f} s "
+          f"({len(texts) / notebook_seconds:.1f} docs/s)")
+
+    cleaner = TextCleaner(processes=processes)
+    result = cleaner.clean(texts)
+    stats = cleaner.stats()
+    print(f"TextCleaner, cold: {stats['seconds']:.2f} s ({stats['docs_per_s']} docs/s), "
+          f"word cache hit rate {stats['word_cache_hit_rate']:.1%} -> identical: {result == expected}")
+
+    updated = texts + synthetic_articles(n // 10, seed=1)
+    expected_new = [notebook_clean_pipeline(t) for t in updated[len(texts):]]
+    start = time.perf_counter()
+    result = cleaner.clean(updated)
+    seconds = time.perf_counter() - start
+    print(f"rerun with {n // 10} new docs: {seconds:.2f} s ({len(updated) / seconds:.1f} docs/s) -> "
+          f"identical: {result == expected + expected_new}")
+    print(cleaner.stats())
+    cleaner.close()
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,396 @@
+"""
+Lab 1: Building Energy Calculator
+Vectorized energy intensity, ratings and costs for a portfolio of meters
+
+Lab 1 computes energy intensity, annual intensity, A-F ratings and peak/off-peak
+costs with `for i, building in enumerate(buildings)` loops over 5 buildings. This
+module computes the same values on columnar NumPy arrays, one call per array:
+
+    - intensity: consumption / floor area; monthly consumption (n,) is scaled by 12
+      like Exercise 3A, a (n, 12) matrix of months is summed over the year
+    - ratings: np.digitize on the 50/100/150/200 kWh/m^2/year thresholds gives the
+      same A-F as the if/elif chain of Exercise 3B (x < 50 -> A, 50 <= x < 100 -> B,
+      ..., x >= 200 and NaN -> F)
+    - rating histogram: np.bincount of the rating codes (Exercise 3C)
+    - costs: calculate_monthly_cost and calculate_tiered_cost (Exercise 4) on arrays;
+      the peak share may be one number or one per meter
+    - savings potential to rating B (Exercise 5B) with np.maximum instead of an if
+
+Files larger than memory are read in chunks (CSV with pandas, Parquet with pyarrow
+record batches) and reduced into a PortfolioSummary; the per-meter results can be
+written chunk by chunk to another CSV / Parquet file.
+
+Input columns: meter_id, floor_area and either monthly_kwh (one month, Lab 1) or
+kwh_01 ... kwh_12 (one column per month).
+"""
+
+import os
+import time
+
+import numpy as np
+
+RATING_THRESHOLDS = np.array([50, 100, 150, 200])          # kWh/m^2/year, Exercise 3
+RATING_LABELS = np.array(['A', 'B', 'C', 'D', 'F'])
+RATING_NAMES = ['Excellent', 'Good', 'Average', 'Poor', 'Very Poor']
+STANDARD_RATE = 0.12                                       # USD/kWh
+PEAK_RATE = 0.15                                           # USD/kWh
+OFF_PEAK_RATE = 0.08                                       # USD/kWh
+TARGET_INTENSITY = 100                                     # kWh/m^2/year for rating B (Exercise 5B)
+MONTH_COLUMNS = [f'kwh_{m:02d}' for m in range(1, 13)]
+
+
+# -------------------------------
+# Vectorized calculations
+# -------------------------------
+def energy_intensity(consumption, floor_area):
+    """Consumption per m^2 (kWh/m^2 per month for monthly values), element-wise."""
+    consumption = np.asarray(consumption, dtype=np.float64)
+    floor_area = np.asarray(floor_area, dtype=np.float64)
+    if consumption.ndim == 2:
+        floor_area = floor_area[:, None]                   # One area per meter, for every month
+    return consumption / floor_area
+
+
+def annual_consumption(consumption):
+    """kWh/year: a month times 12 (Lab 1), or the sum of 12 monthly columns."""
+    consumption = np.asarray(consumption, dtype=np.float64)
+    return consumption.sum(axis=1) if consumption.ndim == 2 else consumption * 12
+
+
+def annual_intensity(consumption, floor_area):
+    """kWh/m^2/year (Exercise 3A)."""
+    consumption = np.asarray(consumption, dtype=np.float64)
+    if consumption.ndim == 2:
+        return energy_intensity(consumption, floor_area).sum(axis=1)
+    return energy_intensity(consumption, floor_area) * 12
+
+
+def rating_codes(intensity):
+    """Rating index 0..4 (A..F) of annual intensities, as uint8."""
+    return np.digitize(intensity, RATING_THRESHOLDS).astype(np.uint8)
+
+
+def rating_labels(codes):
+    """'A'..'F' strings of rating codes."""
+    return RATING_LABELS[codes]
+
+
+def rating_histogram(codes):
+    """Number of meters per rating: {'A': count, ..., 'F': count}."""
+    counts = np.bincount(codes, minlength=len(RATING_LABELS))
+    return dict(zip(RATING_LABELS.tolist(), counts.tolist()))
+
+
+def monthly_cost(consumption_kwh, rate_per_kwh=STANDARD_RATE):
+    """calculate_monthly_cost on arrays."""
+    return np.asarray(consumption_kwh, dtype=np.float64) * rate_per_kwh
+
+
+def tiered_cost(total_consumption, peak_percentage=0.6, peak_rate=PEAK_RATE, off_peak_rate=OFF_PEAK_RATE):
+    """
+    calculate_tiered_cost on arrays.
+
+    Parameters:
+        total_consumption (array): Consumption in kWh per meter
+        peak_percentage (float or array): Fraction of consumption during peak hours
+
+    Returns:
+        tuple: (peak_cost, off_peak_cost, total_cost) arrays
+    """
+    total_consumption = np.asarray(total_consumption, dtype=np.float64)
+    peak_cost = total_consumption * peak_percentage * peak_rate
+    off_peak_cost = total_consumption * (1 - np.asarray(peak_percentage)) * off_peak_rate
+    return peak_cost, off_peak_cost, peak_cost + off_peak_cost
+
+
+def savings_potential(intensity, floor_area, target_intensity=TARGET_INTENSITY):
+    """kWh/year saved if every meter worse than the target reached it (0 for the others)."""
+    return np.maximum(intensity - target_intensity, 0) * np.asarray(floor_area, dtype=np.float64)
+
+
+def portfolio_metrics(consumption, floor_area, peak_percentage=0.6):
+    """
+    All per-meter results of Lab 1 for one block of meters.
+
+    Parameters:
+        consumption (array): (n,) monthly kWh or (n, 12) kWh per month
+        floor_area (array): (n,) m^2
+        peak_percentage (float or array): Fraction of consumption during peak hours
+
+    Returns:
+        dict: annual_kwh, annual_intensity, rating (codes), peak_cost, off_peak_cost,
+            total_cost (per year) and savings_kwh
+    """
+    annual = annual_consumption(consumption)
+    intensity = annual_intensity(consumption, floor_area)
+    peak_cost, off_peak_cost, total_cost = tiered_cost(annual, peak_percentage)
+    return {'annual_kwh': annual, 'annual_intensity': intensity, 'rating': rating_codes(intensity),
+            'peak_cost': peak_cost, 'off_peak_cost': off_peak_cost, 'total_cost': total_cost,
+            'savings_kwh': savings_potential(intensity, floor_area)}
+
+
+# -------------------------------
+# Chunked files
+# -------------------------------
+class PortfolioSummary:
+    """
+    Totals of a portfolio, merged block by block: meters, consumption, costs,
+    savings, the rating histogram and the most / least efficient meter.
+
+    Meters without a finite annual intensity (a missing reading or floor area gives
+    NaN, a floor area of 0 gives inf) are left out of every total, the ratings and the
+    min / max, and counted in `missing` instead; portfolio_metrics itself still rates
+    them F like Lab 1. An empty summary has no most common rating (None).
+    """
+
+    def __init__(self):
+        self.meters = 0
+        self.missing = 0                                   # Meters left out: NaN or inf intensity
+        self.annual_kwh = 0.0
+        self.total_cost = 0.0
+        self.savings_kwh = 0.0
+        self.ratings = np.zeros(len(RATING_LABELS), dtype=np.int64)
+        self.min_intensity, self.min_meter = np.inf, None
+        self.max_intensity, self.max_meter = -np.inf, None
+
+    def update(self, meter_ids, metrics):
+        """Add the portfolio_metrics of one block."""
+        valid = np.isfinite(metrics['annual_intensity'])
+        self.missing += int((~valid).sum())
+        if not valid.any():
+            return
+        meter_ids = np.asarray(meter_ids)[valid]
+        intensity = metrics['annual_intensity'][valid]
+        self.meters += len(intensity)
+        self.annual_kwh += float(metrics['annual_kwh'][valid].sum())
+        self.total_cost += float(metrics['total_cost'][valid].sum())
+        self.savings_kwh += float(metrics['savings_kwh'][valid].sum())
+        self.ratings += np.bincount(metrics['rating'][valid], minlength=len(RATING_LABELS))
+        low, high = np.argmin(intensity), np.argmax(intensity)
+        if intensity[low] < self.min_intensity:            # First meter wins ties, like list.index()
+            self.min_intensity, self.min_meter = float(intensity[low]), meter_ids[low]
+        if intensity[high] > self.max_intensity:
+            self.max_intensity, self.max_meter = float(intensity[high]), meter_ids[high]
+
+    def report(self):
+        """Summary dict (Exercises 2B, 3C, 5A and 5B for the whole portfolio)."""
+        histogram = dict(zip(RATING_LABELS.tolist(), self.ratings.tolist()))
+        most_common = max(histogram, key=histogram.get) if self.meters else None
+        return {'meters': self.meters, 'missing': self.missing, 'annual_kwh': self.annual_kwh, 'total_cost': self.total_cost,
+                'ratings': histogram, 'most_common_rating': most_common,
+                'most_efficient': (self.min_meter, self.min_intensity),
+                'least_efficient': (self.max_meter, self.max_intensity),
+                'savings_kwh': self.savings_kwh, 'savings_cost': self.savings_kwh * STANDARD_RATE}
+
+
+def _consumption_columns(columns):
+    if all(c in columns for c in MONTH_COLUMNS):
+        return MONTH_COLUMNS
+    if 'monthly_kwh' in columns:
+        return ['monthly_kwh']
+    raise ValueError(f"Expected the columns {MONTH_COLUMNS[0]}..{MONTH_COLUMNS[-1]} or monthly_kwh, got {list(columns)}")
+
+
+def iter_blocks(file_path, chunksize=1_000_000):
+    """Yield (meter_ids, consumption, floor_area) NumPy blocks of a CSV or Parquet file."""
+    if file_path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+
+        parquet = pq.ParquetFile(file_path)
+        kwh = _consumption_columns(parquet.schema_arrow.names)
+        for batch in parquet.iter_batches(batch_size=chunksize, columns=['meter_id', 'floor_area'] + kwh):
+            consumption = np.column_stack([batch.column(c).to_numpy().astype(np.float64) for c in kwh])
+            yield (batch.column('meter_id').to_numpy(zero_copy_only=False),
+                   consumption if len(kwh) > 1 else consumption[:, 0],
+                   batch.column('floor_area').to_numpy().astype(np.float64))
+    else:
+        import pandas as pd
+
+        kwh = _consumption_columns(pd.read_csv(file_path, nrows=0).columns)
+        for chunk in pd.read_csv(file_path, usecols=['meter_id', 'floor_area'] + kwh, chunksize=chunksize,
+                                 dtype={c: 'float64' for c in kwh + ['floor_area']}):
+            consumption = chunk[kwh].to_numpy()
+            yield (chunk['meter_id'].to_numpy(), consumption if len(kwh) > 1 else consumption[:, 0],
+                   chunk['floor_area'].to_numpy())
+
+
+class _ResultWriter:
+    """Appends per-meter results to a CSV or Parquet file, block by block."""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.writer = None
+        self.header = True
+
+    def write(self, meter_ids, metrics):
+        import pandas as pd
+
+        frame = pd.DataFrame({'meter_id': meter_ids, **metrics})
+        frame['rating'] = rating_labels(frame['rating'].to_numpy())
+        if self.file_path.endswith('.parquet'):
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if self.writer is None:
+                self.writer = pq.ParquetWriter(self.file_path, table.schema)
+            self.writer.write_table(table)
+        else:
+            frame.to_csv(self.file_path, mode='w' if self.header else 'a', header=self.header, index=False)
+            self.header = False
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def analyze_portfolio(file_path, output_path=None, peak_percentage=0.6, chunksize=1_000_000):
+    """
+    Stream a meter file through portfolio_metrics chunk by chunk.
+
+    Parameters:
+        file_path (str): CSV or .parquet file (meter_id, floor_area, monthly_kwh or kwh_01..kwh_12)
+        output_path (str or None): CSV or .parquet file for the per-meter results
+        peak_percentage (float): Fraction of consumption during peak hours
+        chunksize (int): Meters per block, memory is O(chunksize)
+
+    Returns:
+        PortfolioSummary: Call report() on it.
+    """
+    summary = PortfolioSummary()
+    writer = _ResultWriter(output_path) if output_path else None
+    try:
+        for meter_ids, consumption, floor_area in iter_blocks(file_path, chunksize):
+            metrics = portfolio_metrics(consumption, floor_area, peak_percentage)
+            summary.update(meter_ids, metrics)
+            if writer:
+                writer.write(meter_ids, metrics)
+    finally:
+        if writer:
+            writer.close()
+    return summary
+
+
+# -------------------------------
+# Benchmark
+# -------------------------------
+def loop_portfolio(buildings, monthly_consumption, floor_area, peak_percentage=0.6):
+    """Lab 1's loops (Exercises 2A, 3A, 3B, 3C, 4B), as the reference."""
+    energy_intensity = []
+    for i, building in enumerate(buildings):
+        energy_intensity.append(monthly_consumption[i] / floor_area[i])
+    annual_intensity = []
+    for intensity in energy_intensity:
+        annual_intensity.append(intensity * 12)
+    ratings = []
+    for i, building in enumerate(buildings):
+        intensity = annual_intensity[i]
+        if intensity < 50:
+            rating = 'A'
+        elif intensity < 100:
+            rating = 'B'
+        elif intensity < 150:
+            rating = 'C'
+        elif intensity < 200:
+            rating = 'D'
+        else:
+            rating = 'F'
+        ratings.append(rating)
+    counts = {label: ratings.count(label) for label in RATING_LABELS}
+    costs = []
+    for i, building in enumerate(buildings):
+        peak_consumption = monthly_consumption[i] * peak_percentage
+        off_peak_consumption = monthly_consumption[i] * (1 - peak_percentage)
+        peak_cost = peak_consumption * PEAK_RATE
+        off_peak_cost = off_peak_consumption * OFF_PEAK_RATE
+        costs.append((peak_cost, off_peak_cost, peak_cost + off_peak_cost))
+    return annual_intensity, ratings, counts, costs
+
+
+def synthetic_meters(n, months=False, seed=0):
+    """n meters: lognormal floor areas and intensities around the Lab 1 buildings (~200-600 kWh/m^2/year)."""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    area = np.round(rng.lognormal(np.log(2500), 0.5, n), 1)
+    monthly = area * rng.lognormal(np.log(25), 0.6, n)
+    frame = pd.DataFrame({'meter_id': np.char.add('M', np.arange(n).astype(str)), 'floor_area': area})
+    if months:
+        season = 1 + 0.25 * np.cos(2 * np.pi * np.arange(12) / 12)       # Winter peak
+        values = np.round(monthly[:, None] * season * rng.lognormal(0, 0.1, (n, 12)), 1)
+        for m, column in enumerate(MONTH_COLUMNS):
+            frame[column] = values[:, m]
+    else:
+        frame['monthly_kwh'] = np.round(monthly, 1)
+    return frame
+
+
+def benchmark(n=1_000_000, file_meters=2_000_000, chunksize=500_000, path='energy_benchmark'):
+    """
+    Loops vs arrays on n meters (one month each, Lab 1's input), then the chunked
+    CSV and Parquet paths on file_meters meters x 12 months.
+    """
+    data = synthetic_meters(n)
+    buildings, consumption, area = data['meter_id'].tolist(), data['monthly_kwh'].tolist(), data['floor_area'].tolist()
+
+    start = time.perf_counter()
+    annual, ratings, counts, costs = loop_portfolio(buildings, consumption, area)
+    loop_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    metrics = portfolio_metrics(data['monthly_kwh'].to_numpy(), data['floor_area'].to_numpy())
+    monthly_costs = tiered_cost(data['monthly_kwh'].to_numpy())
+    histogram = rating_histogram(metrics['rating'])
+    vector_seconds = time.perf_counter() - start
+
+    same = (np.array_equal(metrics['annual_intensity'], annual)
+            and rating_labels(metrics['rating']).tolist() == ratings and histogram == counts
+            and all(np.array_equal(monthly_costs[k], [c[k] for c in costs]) for k in range(3)))
+    print(f"{n:,} meters: loops {loop_seconds:.2f} s, arrays {vector_seconds:.3f} s "
+          f"-> {loop_seconds / vector_seconds:.0f}x faster, identical results: {same}")
+    print(f"ratings: {histogram}")
+
+    os.makedirs(path, exist_ok=True)
+    try:
+        files = synthetic_meters(file_meters, months=True, seed=1)
+        files.to_parquet(os.path.join(path, 'meters.parquet'), index=False)
+        files.to_csv(os.path.join(path, 'meters.csv'), index=False)
+        for name in ('meters.parquet', 'meters.csv'):
+            start = time.perf_counter()
+            report = analyze_portfolio(os.path.join(path, name), chunksize=chunksize).report()
+            seconds = time.perf_counter() - start
+            print(f"{name}: {file_meters:,} meters x 12 months in {seconds:.2f} s "
+                  f"({file_meters / seconds / 1e6:.2f} M meters/s), most common rating "
+                  f"{report['most_common_rating']}, savings to B {report['savings_kwh'] / 1e9:.1f} GWh/year")
+    finally:
+        for name in os.listdir(path):
+            os.remove(os.path.join(path, name))
+        os.rmdir(path)
+
+
+def lab_report():
+    """The Lab 1 buildings through the vectorized functions."""
+    buildings = ['Office A', 'Retail B', 'School C', 'Hospital D', 'Apartment E']
+    monthly_consumption = np.array([85000, 62000, 48000, 125000, 71000])  # kWh
+    floor_area = np.array([2500, 1800, 3200, 4000, 2800])  # m^2
+
+    metrics = portfolio_metrics(monthly_consumption, floor_area)
+    _, _, monthly_total = tiered_cost(monthly_consumption)
+    print("=" * 60)
+    print("Energy Efficiency Report")
+    print("=" * 60)
+    for i, building in enumerate(buildings):
+        print(f"{building}: {metrics['annual_intensity'][i]:.2f} kWh/m^2/year - "
+              f"Rating: {RATING_LABELS[metrics['rating'][i]]} - Tiered cost: ${monthly_total[i]:,.2f}/month")
+    summary = PortfolioSummary()
+    summary.update(np.array(buildings), metrics)
+    report = summary.report()
+    print(f"\nRating Summary: {report['ratings']} (most common: {report['most_common_rating']})")
+    print(f"Most efficient: {report['most_efficient'][0]}, least efficient: {report['least_efficient'][0]}")
+    print(f"Total Potential Savings: {report['savings_kwh']:,.0f} kWh/year (${report['savings_cost']:,.2f})")
+
+
+if __name__ == "__main__":
+    lab_report()
+    print()
+    benchmark()
@@ -48,14 +48,12 @@ def clean_data(df):
     df_cleaned = df.copy() # Make a copy of the DataFrame to avoid changing the original
     
     # TODO: Fill missing values in each specified column with the column mean
-    for col in ['soil_ph', 'nitrogen', 'phosphorus', 'moisture']:
-        if df_cleaned[col].isnull().any(): # Check if the current column has any missing values (NaN)
-            # .isnull() returns True/False for each row, and .any() checks if at least one True exists, if there is, it returns True.
-            mean_val = df_cleaned[col].mean() # Calculate the mean of the column (ignoring NaNs)
-            #df_cleaned[col].fillna(mean_val, inplace=True)
-            df_cleaned[col] = df_cleaned[col].fillna(mean_val) #changed the code due to a warning and to remove the warning in the output
-            # fillna() replaces missing (NaN) values with the mean value and assign the result back to the same column
-            print(f"Filled missing values in '{col}' with mean value {mean_val:.2f}") # Print info message
+    columns = ['soil_ph', 'nitrogen', 'phosphorus', 'moisture']
+    means = df_cleaned[columns].mean() # Mean of every column in one call (NaNs are ignored)
+    missing = df_cleaned[columns].isnull().any() # True for each column that has at least one missing value (NaN)
+    df_cleaned[columns] = df_cleaned[columns].fillna(means) # fillna() with a Series fills each column with its own mean in one step
+    for col in missing[missing].index: # Print info message only for the columns that were actually filled
+        print(f"Filled missing values in '{col}' with mean value {means[col]:.2f}")
     
     # TODO: Remove outliers in 'soil_ph': values more than 3 standard deviations from the mean
     ph_mean = df_cleaned['soil_ph'].mean() # Calculate mean of soil_ph column
@@ -99,6 +97,66 @@ def compute_statistics(df, column):
     print(f"  Median: {median_val:.2f}")
     print(f"  Standard Deviation: {std_val:.2f}")
 
+def compute_statistics_batch(df, columns):
+    """
+    Compute descriptive statistics for several columns at once.
+    
+    The columns are copied into one contiguous NumPy 2-D block (one row per column) and
+    every statistic is a single vectorized reduction over that block, so the work does not
+    grow with one extra scan per statistic per column. The median comes from a single
+    np.partition call instead of a full sort.
+    
+    Parameters:
+        df (pd.DataFrame): The DataFrame containing the data.
+        columns (list): The names of the columns for which to compute statistics.
+        
+    Returns:
+        pd.DataFrame: One row per column with 'min', 'max', 'mean', 'median', 'std' and 'count'.
+    """
+    block = np.ascontiguousarray(df[columns].to_numpy(dtype=np.float64).T) # Shape (columns, rows), each column is one contiguous row
+    
+    if block.shape[1] == 0: # No rows: NaN statistics and count 0, like DataFrame.describe() (min/max would raise)
+        count = np.zeros(block.shape[0], dtype=np.int64)
+        min_val = max_val = mean_val = median_val = std_val = np.full(block.shape[0], np.nan)
+    elif np.isnan(block).any(): # NaNs would end up inside the partition, fall back to the NaN-aware versions
+        count = (~np.isnan(block)).sum(axis=1)
+        min_val = np.nanmin(block, axis=1)
+        max_val = np.nanmax(block, axis=1)
+        mean_val = np.nanmean(block, axis=1)
+        median_val = np.nanmedian(block, axis=1)
+        std_val = np.nanstd(block, axis=1, ddof=1) # ddof=1 gives the sample std, same as pandas .std()
+    else:
+        n = block.shape[1]
+        count = np.full(block.shape[0], n)
+        min_val = block.min(axis=1)
+        max_val = block.max(axis=1)
+        mean_val = block.mean(axis=1)
+        std_val = np.sqrt(((block - mean_val[:, None]) ** 2).sum(axis=1) / (n - 1)) if n > 1 else np.full(block.shape[0], np.nan)
+        part = np.partition(block, n // 2, axis=1) # Upper middle value in place for every column at once, smaller values before it
+        median_val = part[:, n // 2]
+        if n % 2 == 0: # Even count: average with the largest value of the lower half
+            median_val = (median_val + part[:, :n // 2].max(axis=1)) / 2
+    
+    return pd.DataFrame(
+        {'min': min_val, 'max': max_val, 'mean': mean_val, 'median': median_val, 'std': std_val, 'count': count},
+        index=pd.Index(columns, name='column'),
+    )
+
+def print_statistics(stats):
+    """
+    Print the result of compute_statistics_batch in the same format as compute_statistics.
+    
+    Parameters:
+        stats (pd.DataFrame): One row per column, as returned by compute_statistics_batch.
+    """
+    for column, row in stats.iterrows():
+        print(f"\nDescriptive statistics for '{column}':")
+        print(f"  Minimum: {row['min']}")
+        print(f"  Maximum: {row['max']}")
+        print(f"  Mean: {row['mean']:.2f}")
+        print(f"  Median: {row['median']:.2f}")
+        print(f"  Standard Deviation: {row['std']:.2f}")
+
 def main():
     # TODO: Update the file path to point to your soil_test.csv file
     file_path = r"C:\Users\Asus\Downloads\soil_test.csv"  # The path to the CSV file containing the soil test data
@@ -113,10 +171,8 @@ def main():
     df_clean = clean_data(df) # Call function to clean data (handle NaN and outliers), clean_data was defined before
     
     # TODO: Compute and display statistics for the 'soil_ph' column
-    compute_statistics(df_clean, 'soil_ph') # Compute stats for soil_ph, compute_statistics was defined before 
-    compute_statistics(df_clean, 'nitrogen') # Compute stats for nitrogen
-    compute_statistics(df_clean, 'phosphorus') # Compute stats for phosphorus
-    compute_statistics(df_clean, 'moisture') # Compute stats for moisture
+    stats = compute_statistics_batch(df_clean, ['soil_ph', 'nitrogen', 'phosphorus', 'moisture']) # All columns in one call
+    print_statistics(stats) # Same output as calling compute_statistics once per column
     
     # TODO: (Optional) Compute statistics for other columns
     # compute_statistics(df_clean, 'nitrogen')
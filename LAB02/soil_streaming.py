@@ -0,0 +1,231 @@
+# CE 49X - Lab 2: Soil Test Data Analysis (streaming mode)
+#
+# Chunked, bounded-memory version of load_data + clean_data + compute_statistics
+# from lab02_soil_analysis.py, for soil_test.csv exports that do not fit in memory.
+#
+# Pass 1 reads the CSV in chunks and keeps mergeable running moments (Welford/Chan)
+# per column. That is enough to reproduce the column means used by fillna and the
+# 3-sigma 'soil_ph' bounds exactly.
+# Pass 2 re-reads the CSV, fills NaNs with those means, drops 'soil_ph' outliers and
+# accumulates min/max/mean/std with the same running moments, plus a fixed-range
+# histogram sketch for the median.
+#
+# Tolerance against the in-memory path (clean_data + compute_statistics):
+#   - min, max: exact
+#   - mean, std: exact up to floating point rounding (relative error ~1e-12)
+#   - median: within one histogram bin, i.e. (max - min) / n_bins of pass 1
+
+import sys
+
+import numpy as np
+import pandas as pd
+
+import lab02_soil_analysis
+
+SOIL_COLUMNS = ['soil_ph', 'nitrogen', 'phosphorus', 'moisture'] # Columns cleaned and summarised by clean_data
+DEFAULT_CHUNKSIZE = 1_000_000 # Rows per chunk, memory is O(chunksize * number of columns)
+DEFAULT_BINS = 1 << 16        # Histogram bins per column for the median sketch
+
+
+class RunningMoments:
+    """
+    Mergeable count / mean / M2 / min / max accumulator.
+
+    Each chunk is reduced with NumPy and merged with Chan's parallel update, so the
+    result does not depend on how the file was split into chunks.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = float('nan')  # NaN until a value arrives, as pandas gives for an all-NaN column
+        self.m2 = 0.0             # Sum of squared deviations from the mean
+        self.min = float('nan')
+        self.max = float('nan')
+
+    def update(self, values):
+        """Add a 1-D array of values (NaNs are ignored)."""
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        other = RunningMoments()
+        other.count = values.size
+        other.mean = float(values.mean())
+        other.m2 = float(((values - other.mean) ** 2).sum())
+        other.min = float(values.min())
+        other.max = float(values.max())
+        self.merge(other)
+
+    def merge(self, other):
+        """Merge another RunningMoments into this one (Chan et al.)."""
+        if other.count == 0:
+            return
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+            self.min, self.max = other.min, other.max
+            return
+        n = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / n
+        self.m2 += other.m2 + delta ** 2 * self.count * other.count / n
+        self.count = n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def std(self, ddof=1):
+        """Sample standard deviation (ddof=1, same as pandas)."""
+        if self.count <= ddof:
+            return float('nan')
+        return float(np.sqrt(self.m2 / (self.count - ddof)))
+
+
+class HistogramSketch:
+    """
+    Fixed-range histogram used as a mergeable approximate-quantile sketch.
+
+    The range comes from pass 1, so memory is n_bins counters per column no matter
+    how many rows are streamed. Quantiles are interpolated inside the bin holding
+    the target rank, so the error is at most one bin width.
+    """
+
+    def __init__(self, low, high, n_bins=DEFAULT_BINS):
+        if not high > low:        # Constant column: give the sketch a tiny non-empty range
+            high = low + 1.0
+        self.low = float(low)
+        self.high = float(high)
+        self.n_bins = n_bins
+        self.counts = np.zeros(n_bins, dtype=np.int64)
+
+    @property
+    def bin_width(self):
+        return (self.high - self.low) / self.n_bins
+
+    def update(self, values):
+        values = values[~np.isnan(values)]
+        idx = ((values - self.low) / self.bin_width).astype(np.int64)
+        np.clip(idx, 0, self.n_bins - 1, out=idx) # The max value lands exactly on the upper edge
+        self.counts += np.bincount(idx, minlength=self.n_bins)
+
+    def merge(self, other):
+        self.counts += other.counts
+
+    def quantile(self, q):
+        total = self.counts.sum()
+        if total == 0:
+            return float('nan')
+        target = q * (total - 1)  # Same rank convention as pandas' linear interpolation
+        cumulative = np.cumsum(self.counts)
+        b = int(np.searchsorted(cumulative, target, side='right'))
+        before = cumulative[b - 1] if b > 0 else 0
+        fraction = (target - before + 0.5) / self.counts[b]
+        return self.low + (b + min(fraction, 1.0)) * self.bin_width
+
+
+def _iter_chunks(file_path, columns, chunksize):
+    """Yield float64 chunks of only the requested columns."""
+    dtypes = {col: 'float64' for col in columns}
+    yield from pd.read_csv(file_path, usecols=columns, dtype=dtypes, chunksize=chunksize)
+
+
+def stream_clean_bounds(file_path, columns=SOIL_COLUMNS, chunksize=DEFAULT_CHUNKSIZE):
+    """
+    Pass 1: column means (used for fillna) and the 3-sigma 'soil_ph' bounds.
+
+    Filling NaNs with the mean keeps the mean and the sum of squared deviations
+    unchanged and only increases the count, so the post-fillna std used by
+    clean_data is sqrt(M2 / (rows - 1)).
+
+    Parameters:
+        file_path (str): The path to the CSV file.
+        columns (list): Columns to clean, must include 'soil_ph'.
+        chunksize (int): Rows per chunk.
+
+    Returns:
+        dict: 'means', 'moments' (RunningMoments per column), 'rows',
+              'lower_bound' and 'upper_bound'.
+    """
+    moments = {col: RunningMoments() for col in columns}
+    rows = 0
+    for chunk in _iter_chunks(file_path, columns, chunksize):
+        rows += len(chunk)
+        for col in columns:
+            moments[col].update(chunk[col].to_numpy())
+
+    means = {col: moments[col].mean for col in columns}
+    ph = moments['soil_ph']
+    ph_std = float(np.sqrt(ph.m2 / (rows - 1))) if rows > 1 else float('nan')
+    return {
+        'means': means,
+        'moments': moments,
+        'rows': rows,
+        'lower_bound': ph.mean - 3 * ph_std,
+        'upper_bound': ph.mean + 3 * ph_std,
+    }
+
+
+def stream_soil_statistics(file_path, columns=SOIL_COLUMNS, chunksize=DEFAULT_CHUNKSIZE,
+                           n_bins=DEFAULT_BINS):
+    """
+    Streaming equivalent of clean_data followed by compute_statistics for each column.
+
+    Parameters:
+        file_path (str): The path to the CSV file.
+        columns (list): Columns to clean and summarise, must include 'soil_ph'.
+        chunksize (int): Rows per chunk.
+        n_bins (int): Histogram bins per column for the median sketch.
+
+    Returns:
+        pd.DataFrame: One row per column with min, max, mean, median, std and count,
+                      plus the pass-1 info under .attrs ('means', 'lower_bound', 'upper_bound').
+    """
+    bounds = stream_clean_bounds(file_path, columns, chunksize)
+    lower, upper = bounds['lower_bound'], bounds['upper_bound']
+
+    moments = {col: RunningMoments() for col in columns}
+    sketches = {}
+    for col in columns:
+        m = bounds['moments'][col]
+        sketches[col] = HistogramSketch(m.min, m.max, n_bins) # Cleaned values never leave the raw [min, max]
+
+    for chunk in _iter_chunks(file_path, columns, chunksize):
+        block = chunk.to_numpy()  # (rows, columns) float64, filled in place below
+        for j, col in enumerate(columns):
+            np.copyto(block[:, j], bounds['means'][col], where=np.isnan(block[:, j]))
+        ph = block[:, columns.index('soil_ph')]
+        block = block[(ph >= lower) & (ph <= upper)]
+        for j, col in enumerate(columns):
+            moments[col].update(block[:, j])
+            sketches[col].update(block[:, j])
+
+    result = pd.DataFrame(
+        {
+            'min': [moments[col].min for col in columns],
+            'max': [moments[col].max for col in columns],
+            'mean': [moments[col].mean for col in columns],
+            'median': [sketches[col].quantile(0.5) for col in columns],
+            'std': [moments[col].std() for col in columns],
+            'count': [moments[col].count for col in columns],
+        },
+        index=pd.Index(columns, name='column'),
+    )
+    result.attrs.update(means=bounds['means'], lower_bound=lower, upper_bound=upper)
+    return result
+
+
+def print_statistics(result):
+    """Print a stream_soil_statistics result in the same format as compute_statistics."""
+    print(f"'soil_ph' values are within the range [{result.attrs['lower_bound']:.2f}, {result.attrs['upper_bound']:.2f}].")
+    lab02_soil_analysis.print_statistics(result) # Same columns as compute_statistics_batch, so reuse its formatter
+
+
+def main():
+    file_path = sys.argv[1] if len(sys.argv) > 1 else "soil_test.csv" # Pass the CSV path on the command line
+    try:
+        result = stream_soil_statistics(file_path)
+    except FileNotFoundError:
+        print(f"Error: File not found. Ensure the file exists at the specified path: {file_path}")
+        return
+    print_statistics(result)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+# Lab 3: ERA5 Weather Data Analysis - columnar load cache
+#
+# The first load of an ERA5 CSV parses it once (with an explicit timestamp format),
+# sorts it by time and writes every column as a typed .npy file into a small cache
+# directory. Later loads memory-map those files instead of re-parsing the CSV.
+#
+# The cache is invalidated when the source file changes: a different size always
+# rebuilds it, a different mtime with the same size is checked against a SHA-1 of
+# the file (so a plain "touch" or a fresh git checkout keeps the cache).
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'  # Format written by the ERA5 download script, e.g. 2024-04-01 06:00:00
+CACHE_DIR_NAME = '.era5_cache'          # Created next to the CSV files
+CACHE_VERSION = 1                       # Bump to invalidate every cache after a layout change
+
+
+def read_era5_csv(file_path, timestamp_format=TIMESTAMP_FORMAT):
+    """
+    Parse an ERA5 CSV into a DataFrame with a sorted DatetimeIndex.
+
+    Parameters:
+        file_path (str): Path to the CSV file.
+        timestamp_format (str or None): strptime format of the 'timestamp' column.
+            With a format pandas uses its fast fixed-format parser; None falls back
+            to format inference. Rows that do not parse become NaT in both cases.
+
+    Returns:
+        pd.DataFrame: Data indexed by 'timestamp', in chronological order.
+    """
+    df = pd.read_csv(file_path)
+    df['timestamp'] = pd.to_datetime(df['timestamp'], format=timestamp_format, errors='coerce')
+    df.set_index('timestamp', inplace=True)
+    df.sort_index(inplace=True)
+    return df
+
+
+def _file_sha1(file_path, block_size=1 << 20):
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _cache_path(file_path, cache_dir=None):
+    file_path = os.path.abspath(file_path)
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(file_path), CACHE_DIR_NAME)
+    return os.path.join(cache_dir, os.path.basename(file_path))
+
+
+def _read_meta(path):
+    try:
+        with open(os.path.join(path, 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _is_valid(meta, file_path, timestamp_format):
+    """Check the cache metadata against the current source file (may refresh the stored mtime)."""
+    if meta is None or meta.get('version') != CACHE_VERSION:
+        return False
+    if meta.get('timestamp_format') != timestamp_format:
+        return False
+    st = os.stat(file_path)
+    if st.st_size != meta['source_size']:
+        return False
+    if st.st_mtime_ns == meta['source_mtime_ns']:
+        return True
+    if _file_sha1(file_path) != meta['source_sha1']:  # Same size, new mtime: only the content decides
+        return False
+    meta['source_mtime_ns'] = st.st_mtime_ns
+    return True
+
+
+def write_cache(df, file_path, cache_dir=None, timestamp_format=TIMESTAMP_FORMAT):
+    """
+    Write a parsed ERA5 DataFrame into the columnar cache for file_path.
+
+    Each column, and the timestamp index, is saved as its own typed .npy file so it
+    can be memory-mapped on load. The directory is built next to the final location
+    and swapped in with a rename, so a crash never leaves a half-written cache.
+    """
+    path = _cache_path(file_path, cache_dir)
+    parent = os.path.dirname(path)
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+
+    columns = []
+    np.save(os.path.join(tmp, 'timestamp.npy'), df.index.values)  # datetime64, keeps the parsed resolution
+    for i, col in enumerate(df.columns):
+        values = df[col].to_numpy()
+        if values.dtype == object:
+            values = values.astype(str)  # Fixed-width unicode, still memory-mappable
+        np.save(os.path.join(tmp, f'col{i}.npy'), values)
+        columns.append(col)
+
+    st = os.stat(file_path)
+    meta = {
+        'version': CACHE_VERSION,
+        'timestamp_format': timestamp_format,
+        'source_size': st.st_size,
+        'source_mtime_ns': st.st_mtime_ns,
+        'source_sha1': _file_sha1(file_path),
+        'columns': columns,
+    }
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp, path)
+
+
+def read_cache(path, meta):
+    """Load a cache directory written by write_cache, memory-mapping every column."""
+    stamps = np.load(os.path.join(path, 'timestamp.npy'), mmap_mode='c')  # Copy-on-write: callers may modify the frame, the file never changes
+    index = pd.DatetimeIndex(np.asarray(stamps), name='timestamp')
+    data = {}
+    for i, col in enumerate(meta['columns']):
+        values = np.load(os.path.join(path, f'col{i}.npy'), mmap_mode='c')
+        data[col] = values.astype(object) if values.dtype.kind == 'U' else values
+    return pd.DataFrame(data, index=index, copy=False)
+
+
+def load_era5_cached(file_path, cache_dir=None, timestamp_format=TIMESTAMP_FORMAT, use_cache=True):
+    """
+    Load an ERA5 CSV through the columnar cache.
+
+    Parameters:
+        file_path (str): Path to the CSV file.
+        cache_dir (str or None): Where to keep the cache, defaults to '.era5_cache'
+            next to the CSV.
+        timestamp_format (str or None): Passed to read_era5_csv on a cache miss.
+        use_cache (bool): False always parses the CSV and leaves the cache alone.
+
+    Returns:
+        pd.DataFrame: Same result as read_era5_csv. Raises FileNotFoundError if the
+        CSV does not exist (a cache without its source is never used).
+    """
+    if not use_cache:
+        return read_era5_csv(file_path, timestamp_format)
+
+    path = _cache_path(file_path, cache_dir)
+    meta = _read_meta(path)
+    mtime_before = meta and meta.get('source_mtime_ns')
+    if _is_valid(meta, file_path, timestamp_format):
+        if meta['source_mtime_ns'] != mtime_before:  # Content unchanged, remember the new mtime
+            with open(os.path.join(path, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+        return read_cache(path, meta)
+
+    df = read_era5_csv(file_path, timestamp_format)
+    try:
+        write_cache(df, file_path, cache_dir, timestamp_format)
+    except OSError as e:  # Read-only folder etc.: the data is still fine, just not cached
+        print(f"Warning: could not write ERA5 cache for {file_path}: {e}")
+    return df
+
+
+def clear_cache(file_path, cache_dir=None):
+    """Remove the cached copy of file_path, if there is one."""
+    shutil.rmtree(_cache_path(file_path, cache_dir), ignore_errors=True)
+
+
+def benchmark_load(file_path, repeats=5, cache_dir=None):
+    """
+    Report cold (CSV parse + cache write) versus warm (memory-mapped cache) load times.
+
+    Returns:
+        dict: 'csv_infer' (old path, no format hint), 'cold' and 'warm' times in seconds.
+    """
+    def best_of(func):
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    csv_infer = best_of(lambda: read_era5_csv(file_path, timestamp_format=None))
+
+    def cold():
+        clear_cache(file_path, cache_dir)
+        load_era5_cached(file_path, cache_dir)
+    cold_time = best_of(cold)
+    warm_time = best_of(lambda: load_era5_cached(file_path, cache_dir))
+
+    print(f"{os.path.basename(file_path)}:")
+    print(f"  CSV, inferred timestamp format: {csv_infer * 1000:8.2f} ms")
+    print(f"  cold load (parse + cache write): {cold_time * 1000:8.2f} ms")
+    print(f"  warm load (memory-mapped cache): {warm_time * 1000:8.2f} ms  ({csv_infer / warm_time:.1f}x faster)")
+    return {'csv_infer': csv_infer, 'cold': cold_time, 'warm': warm_time}
+
+
+if __name__ == "__main__":
+    import sys
+    for path in sys.argv[1:]:
+        benchmark_load(path)
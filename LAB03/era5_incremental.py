@@ -0,0 +1,331 @@
+# Lab 3: ERA5 Weather Data Analysis - incremental aggregation state
+#
+# Keeps the Lab 3 results (monthly / seasonal / diurnal / daily means and the most
+# extreme days) up to date for daily ERA5 drops without re-reading the history.
+#
+# The state on disk is a folder with
+#   - meta.json: columns, top-n setting, first day, current top days, the file names
+#     of the current generation and a day -> ledger chunks map
+#   - aggregates_GGGGGG.npz: per-bucket sums, counts and row counts (a few KB)
+#   - ledger_XXXXXX_GGGGGG.npz: the timestamps and values already merged, one chunk
+#     per update
+#
+# New rows are bucketed with era5_stations.bucket_sums and added to the sums. Ledger
+# chunks are loaded lazily: an update reads and searches only the chunks that hold a
+# day of the batch (day -> chunks map), so it costs O(new rows + rows of those chunks),
+# not O(history). The ledger is what makes out-of-order and duplicate timestamps safe:
+# a timestamp that was already merged is not counted twice, its old contribution is
+# subtracted and the newest delivery wins (identical re-deliveries are skipped).
+#
+# save() never overwrites a file meta.json refers to: changed chunks and the aggregates
+# are written under new generation names, then meta.json is replaced (the single
+# commit point) and the superseded files are deleted. A crash at any point leaves the
+# previous or the new state, never a mix.
+
+import heapq
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from era5_cache import read_era5_csv
+from era5_stations import bucket_sums, means_table, prepare_station
+
+FIXED_AGGREGATIONS = {'monthly': np.arange(1, 13), 'seasonal': np.arange(1, 5), 'diurnal': np.arange(24)}
+NS_PER_DAY = 86_400 * 10**9
+
+
+def _days(stamps):
+    """Days since 1970-01-01 of int64 ns timestamps."""
+    return stamps // NS_PER_DAY
+
+
+def _atomic_savez(path, **arrays):
+    # Write next to the target and rename, so readers (and memory maps) never see a half-written file
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.npz')
+    with os.fdopen(fd, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(tmp, path)
+
+
+class AggregationState:
+    """
+    Append-only aggregation state for one station.
+
+    Parameters:
+        columns (tuple): Columns to average, the first one ranks the extreme days.
+        top_n (int): How many extreme days to keep track of.
+    """
+
+    def __init__(self, columns=('wind_speed',), top_n=5):
+        self.columns = list(columns)
+        self.top_n = top_n
+        k = len(self.columns)
+        self.sums = {name: np.zeros((len(labels), k)) for name, labels in FIXED_AGGREGATIONS.items()}
+        self.counts = {name: np.zeros((len(labels), k)) for name, labels in FIXED_AGGREGATIONS.items()}
+        self.rows = {name: np.zeros(len(labels), dtype=np.int64) for name, labels in FIXED_AGGREGATIONS.items()}
+        self.first_day = 0                   # Days since 1970-01-01 of daily_sums[0]
+        self.daily_sums = np.zeros((0, k))
+        self.daily_counts = np.zeros((0, k))
+        self.daily_rows = np.zeros(0, dtype=np.int64)
+        self.top = []                        # [(mean, day), ...] of the top_n days, largest first
+        self.chunks = []                     # Ledger: [(sorted int64 ns timestamps, values) or None if not loaded]
+        self.day_chunks = {}                 # Day -> indices of the ledger chunks with rows on that day
+        self._chunk_files = []               # File name of each chunk (None until saved)
+        self._dirty = set()                  # Chunks changed since the last save
+        self._path = None                    # Folder the unloaded chunks are read from
+        self._generation = 0                 # Suffix of the files written by the last save
+        self._aggregates_file = None         # Aggregates file meta.json currently refers to
+
+    # ---------------------------------------------------------------- merging
+
+    def _ensure_days(self, low, high):
+        """Grow the dense daily arrays so they cover days low..high."""
+        if len(self.daily_rows) == 0:
+            self.first_day = low
+        last = self.first_day + len(self.daily_rows) - 1
+        before = max(0, self.first_day - low)
+        after = max(0, high - last)
+        if before or after:
+            self.daily_sums = np.pad(self.daily_sums, ((before, after), (0, 0)))
+            self.daily_counts = np.pad(self.daily_counts, ((before, after), (0, 0)))
+            self.daily_rows = np.pad(self.daily_rows, (before, after))
+            self.first_day -= before
+
+    def _add(self, df, sign):
+        """Add (sign=1) or remove (sign=-1) the contribution of df; return the days it touched."""
+        parts = bucket_sums(df, self.columns)
+        for name in FIXED_AGGREGATIONS:
+            _, sums, counts, rows = parts[name]
+            self.sums[name] += sign * sums
+            self.counts[name] += sign * counts
+            self.rows[name] += sign * rows
+        labels, sums, counts, rows = parts['daily']
+        if len(labels) == 0:
+            return np.zeros(0, dtype=np.int64)
+        day0 = int(labels[:1].to_numpy().astype('datetime64[D]').view(np.int64)[0])
+        self._ensure_days(day0, day0 + len(labels) - 1)
+        start = day0 - self.first_day
+        self.daily_sums[start:start + len(labels)] += sign * sums
+        self.daily_counts[start:start + len(labels)] += sign * counts
+        self.daily_rows[start:start + len(labels)] += sign * rows
+        return day0 + np.flatnonzero(rows)
+
+    def _daily_mean(self, days):
+        pos = np.asarray(days) - self.first_day
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return self.daily_sums[pos, 0] / self.daily_counts[pos, 0]
+
+    def _rebuild_top(self):
+        """Full O(days) recomputation, only needed when a top day got smaller."""
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = self.daily_sums[:, 0] / self.daily_counts[:, 0]
+        days = np.flatnonzero(~np.isnan(means))
+        n = min(self.top_n, len(days))
+        if n == 0:
+            self.top = []
+            return
+        best = days[np.argpartition(-means[days], n - 1)[:n]]
+        self.top = sorted(((float(means[d]), int(d) + self.first_day) for d in best), reverse=True)
+
+    def _update_top(self, touched):
+        touched = np.unique(touched)
+        new_means = dict(zip(touched.tolist(), self._daily_mean(touched).tolist()))
+        # A top day that went down may now be beaten by a day we no longer track
+        if any(day in new_means and not new_means[day] >= mean for mean, day in self.top):
+            self._rebuild_top()
+            return
+        candidates = {day: mean for mean, day in self.top}
+        candidates.update((day, mean) for day, mean in new_means.items() if not np.isnan(mean))
+        self.top = heapq.nlargest(self.top_n, ((mean, day) for day, mean in candidates.items()))
+
+    def _chunk(self, i):
+        """Ledger chunk i, read from disk on first use."""
+        if self.chunks[i] is None:
+            with np.load(os.path.join(self._path, self._chunk_files[i])) as chunk:
+                self.chunks[i] = (chunk['stamps'], chunk['values'])
+        return self.chunks[i]
+
+    def update(self, df):
+        """
+        Merge new rows (a DataFrame indexed by timestamp, e.g. from prepare_station).
+
+        Rows may arrive in any order. A timestamp seen before replaces the earlier
+        values; within df the last row for a timestamp wins.
+
+        Returns:
+            dict: Number of 'new', 'replaced' and 'unchanged' rows.
+        """
+        df = df[df.index.notna()]
+        df = df[~df.index.duplicated(keep='last')][self.columns]
+        stamps = df.index.to_numpy().astype('datetime64[ns]').view(np.int64)
+        values = df.to_numpy(dtype=np.float64)
+
+        is_new = np.ones(len(stamps), dtype=bool)
+        old_stamps, old_values, changed_rows = [], [], []
+        # Only the chunks holding a day of this batch can contain one of its timestamps
+        candidates = sorted({i for day in np.unique(_days(stamps)).tolist() for i in self.day_chunks.get(day, ())})
+        for i in candidates:
+            chunk_stamps, chunk_values = self._chunk(i)
+            pos = np.searchsorted(chunk_stamps, stamps).clip(max=len(chunk_stamps) - 1)
+            hit = np.flatnonzero(is_new & (chunk_stamps[pos] == stamps))
+            if len(hit) == 0:
+                continue
+            is_new[hit] = False
+            previous = chunk_values[pos[hit]]
+            same = ((previous == values[hit]) | (np.isnan(previous) & np.isnan(values[hit]))).all(axis=1)
+            hit, previous = hit[~same], previous[~same]
+            if len(hit):
+                old_stamps.append(stamps[hit])
+                old_values.append(previous)
+                changed_rows.append(hit)
+                chunk_values[pos[hit]] = values[hit]
+                self._dirty.add(i)
+
+        def frame(ts, vals):
+            return pd.DataFrame(vals, index=pd.DatetimeIndex(ts.astype('datetime64[ns]')), columns=self.columns)
+
+        touched = [np.zeros(0, dtype=np.int64)]
+        replaced = np.concatenate(changed_rows) if changed_rows else np.zeros(0, dtype=np.int64)
+        if len(replaced):
+            touched.append(self._add(frame(np.concatenate(old_stamps), np.concatenate(old_values)), -1))
+            touched.append(self._add(frame(stamps[replaced], values[replaced]), 1))
+        if is_new.any():
+            order = np.argsort(stamps[is_new], kind='stable')
+            new_stamps, new_values = stamps[is_new][order], values[is_new][order]
+            touched.append(self._add(frame(new_stamps, new_values), 1))
+            self.chunks.append((new_stamps, new_values))
+            self._chunk_files.append(None)
+            self._dirty.add(len(self.chunks) - 1)
+            for day in np.unique(_days(new_stamps)).tolist():
+                self.day_chunks.setdefault(day, []).append(len(self.chunks) - 1)
+        self._update_top(np.concatenate(touched))
+
+        n_new = int(is_new.sum())
+        return {'new': n_new, 'replaced': len(replaced), 'unchanged': len(stamps) - n_new - len(replaced)}
+
+    # ---------------------------------------------------------------- results
+
+    def results(self):
+        """Current (aggregation, bucket) table, same layout as era5_stations.aggregate_station."""
+        parts = {name: (labels, self.sums[name], self.counts[name], self.rows[name])
+                 for name, labels in FIXED_AGGREGATIONS.items()}
+        days = pd.DatetimeIndex(np.datetime64(self.first_day, 'D') + np.arange(len(self.daily_rows)), name='timestamp')
+        parts['daily'] = (days, self.daily_sums, self.daily_counts, self.daily_rows)
+        return means_table(parts, self.columns)
+
+    def extreme_days(self):
+        """The top_n days with the largest daily mean of the first column, largest first."""
+        days = pd.DatetimeIndex([np.datetime64(day, 'D') for _, day in self.top], name='bucket')
+        return pd.Series([mean for mean, _ in self.top], index=days, name=self.columns[0])
+
+    # ---------------------------------------------------------------- persistence
+
+    def save(self, path):
+        """
+        Write the state folder. Only ledger chunks changed since the last save are
+        written, under new names; replacing meta.json commits the new generation.
+        """
+        os.makedirs(path, exist_ok=True)
+        if self._path is not None and os.path.abspath(path) != os.path.abspath(self._path):
+            for i in range(len(self.chunks)):       # Saving elsewhere: the new folder needs every chunk
+                self._chunk(i)
+                self._dirty.add(i)
+        generation = self._generation + 1
+        superseded = []
+        for i in sorted(self._dirty):
+            if self._chunk_files[i] is not None:
+                superseded.append(self._chunk_files[i])
+            self._chunk_files[i] = f'ledger_{i:06d}_{generation:06d}.npz'
+            stamps, values = self.chunks[i]
+            _atomic_savez(os.path.join(path, self._chunk_files[i]), stamps=stamps, values=values)
+
+        arrays = {'daily_sums': self.daily_sums, 'daily_counts': self.daily_counts, 'daily_rows': self.daily_rows}
+        for name in FIXED_AGGREGATIONS:
+            arrays[f'{name}_sums'] = self.sums[name]
+            arrays[f'{name}_counts'] = self.counts[name]
+            arrays[f'{name}_rows'] = self.rows[name]
+        aggregates = f'aggregates_{generation:06d}.npz'
+        _atomic_savez(os.path.join(path, aggregates), **arrays)
+
+        meta = {'columns': self.columns, 'top_n': self.top_n, 'first_day': self.first_day,
+                'top': self.top, 'generation': generation, 'aggregates': aggregates,
+                'chunks': self._chunk_files, 'day_chunks': self.day_chunks}
+        fd, tmp = tempfile.mkstemp(dir=path, suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, os.path.join(path, 'meta.json')) # The commit point: before it the old generation is intact
+
+        # Only now the files of the previous generation are unused
+        if self._path is not None and os.path.abspath(path) == os.path.abspath(self._path):
+            superseded.append(self._aggregates_file)
+            for file_name in superseded:
+                try:
+                    os.remove(os.path.join(path, file_name))
+                except FileNotFoundError:
+                    pass
+        self._dirty.clear()
+        self._path = path
+        self._generation = generation
+        self._aggregates_file = aggregates
+
+    @classmethod
+    def load(cls, path):
+        """Read a state folder written by save(); ledger chunks are read when an update needs them."""
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        state = cls(meta['columns'], meta['top_n'])
+        state.first_day = meta['first_day']
+        state.top = [tuple(item) for item in meta['top']]
+        state._path = path
+        # Folders from before the generation files have no generation or day map
+        state._generation = meta.get('generation', 0)
+        state._aggregates_file = meta.get('aggregates', 'aggregates.npz')
+        with np.load(os.path.join(path, state._aggregates_file)) as arrays:
+            state.daily_sums = arrays['daily_sums']
+            state.daily_counts = arrays['daily_counts']
+            state.daily_rows = arrays['daily_rows']
+            for name in FIXED_AGGREGATIONS:
+                state.sums[name] = arrays[f'{name}_sums']
+                state.counts[name] = arrays[f'{name}_counts']
+                state.rows[name] = arrays[f'{name}_rows']
+        state._chunk_files = list(meta['chunks'])
+        state.chunks = [None] * len(state._chunk_files)
+        if 'day_chunks' in meta:
+            state.day_chunks = {int(day): chunks for day, chunks in meta['day_chunks'].items()}
+        else:
+            for i in range(len(state.chunks)):
+                for day in np.unique(_days(state._chunk(i)[0])).tolist():
+                    state.day_chunks.setdefault(day, []).append(i)
+        return state
+
+
+def update_from_csv(state_path, csv_path, columns=('wind_speed',), top_n=5):
+    """
+    Merge one new ERA5 CSV drop into the state folder (created on the first call).
+
+    Returns:
+        AggregationState: The updated state, already saved.
+    """
+    if os.path.exists(os.path.join(state_path, 'meta.json')):
+        state = AggregationState.load(state_path)
+    else:
+        state = AggregationState(columns, top_n)
+    counts = state.update(prepare_station(read_era5_csv(csv_path)))
+    state.save(state_path)
+    print(f"{os.path.basename(csv_path)}: {counts['new']} new, {counts['replaced']} replaced, "
+          f"{counts['unchanged']} unchanged rows")
+    return state
+
+
+if __name__ == "__main__":
+    import sys
+    if len(sys.argv) < 3:
+        print("Usage: python era5_incremental.py STATE_FOLDER NEW_DROP.csv [MORE.csv ...]")
+        sys.exit(1)
+    for csv_path in sys.argv[2:]:
+        state = update_from_csv(sys.argv[1], csv_path)
+    print(f"\n=== Top {state.top_n} Extreme Wind Speed Days ===")
+    print(state.extreme_days())
@@ -0,0 +1,230 @@
+# Lab 3: ERA5 Weather Data Analysis - multi-station pipeline
+#
+# Runs the Lab 3 analysis (cleaning, wind speed, monthly / seasonal / diurnal / daily
+# averages) for any number of station CSVs instead of the hard-coded Berlin and Munich
+# frames. Every station is independent, so the files are spread over a process pool
+# and the per-station results are stacked into one tidy table indexed by
+# (station, aggregation, bucket). Several files of one station (e.g. one per year)
+# are merged into that station's time series before aggregating.
+
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from era5_cache import load_era5_cached
+
+SEASON_LABELS = {1: 'Winter', 2: 'Spring', 3: 'Summer', 4: 'Autumn'} # Season codes of SEASON_OF_MONTH (1-4, as in the seasonal buckets)
+
+
+def station_name(file_path):
+    """Station name from the file name, e.g. 'berlin_era5_wind_20241231_20241231.csv' -> 'berlin'."""
+    stem = os.path.splitext(os.path.basename(file_path))[0]
+    return stem.split('_era5')[0]
+
+
+def expand_paths(sources):
+    """Turn a directory, a glob pattern or a list of either into a sorted list of CSV paths."""
+    if isinstance(sources, str):
+        sources = [sources]
+    paths = []
+    for source in sources:
+        if os.path.isdir(source):
+            paths.extend(glob.glob(os.path.join(source, '*_era5_*.csv')))
+        elif glob.has_magic(source):
+            paths.extend(glob.glob(source))
+        else:
+            paths.append(source)
+    return sorted(set(paths))
+
+
+def calculate_wind_speed(u, v):
+    # u: east-west wind component, v: north-south wind component
+    return np.sqrt(u**2 + v**2)
+
+
+# Season code of each month number, SEASON_OF_MONTH[month] (index 0 is unused)
+# 1 = winter (12, 1, 2), 2 = spring (3, 4, 5), 3 = summer (6, 7, 8), 4 = autumn (9, 10, 11)
+SEASON_OF_MONTH = np.array([0, 1, 1, 2, 2, 2, 3, 3, 3, 4, 4, 4, 1])
+
+
+def prepare_station(df):
+    """Lab 3 cleaning step: drop incomplete rows and add the 'wind_speed' column."""
+    df = df.dropna()
+    df['wind_speed'] = calculate_wind_speed(df['u10m'], df['v10m'])
+    return df
+
+
+def bucket_codes(index):
+    """
+    Integer bucket code of every row for each aggregation, computed with array lookups.
+
+    Hours and days come from integer arithmetic on the timestamps. Month and season
+    are looked up per calendar day (a table of n_days entries) and then gathered per
+    row, so no Python-level call is made per row.
+
+    Returns:
+        dict: aggregation -> (codes, labels). codes[i] is the bucket of row i as a
+        position in labels; labels are month numbers, season codes, hours and days.
+    """
+    hours = index.to_numpy().astype('datetime64[h]').view(np.int64) # Hours since 1970-01-01
+    if len(hours):
+        first_day = hours.min() // 24
+        n_days = int(hours.max() // 24 - first_day) + 1
+    else:
+        first_day, n_days = 0, 0
+    day = hours // 24 - first_day
+    days = np.datetime64(int(first_day), 'D') + np.arange(n_days) # Calendar days covered by the data
+    month_of_day = days.astype('datetime64[M]').view(np.int64) % 12 + 1
+    season_of_day = SEASON_OF_MONTH[month_of_day]
+    return {
+        'monthly': (month_of_day[day] - 1, np.arange(1, 13)),
+        'seasonal': (season_of_day[day] - 1, np.arange(1, 5)),
+        'diurnal': (hours % 24, np.arange(24)),
+        'daily': (day, pd.DatetimeIndex(days, name=index.name)),
+    }
+
+
+def bucket_sums(df, columns):
+    """
+    Per-bucket sums and counts of the given columns for every aggregation.
+
+    All columns of one aggregation are accumulated by a single np.bincount over the
+    flattened (row, column) block, so the data is scanned once per aggregation no
+    matter how many columns are requested. NaNs are left out of both sums and counts.
+
+    Returns:
+        dict: aggregation -> (labels, sums, counts, rows). sums and counts have shape
+        (buckets, columns); rows is the number of rows that fell into each bucket.
+    """
+    if df.index.hasnans:
+        df = df[df.index.notna()] # Rows without a valid timestamp cannot be bucketed
+    values = df[list(columns)].to_numpy(dtype=np.float64)
+    n_cols = values.shape[1]
+    valid = ~np.isnan(values)
+    all_valid = bool(valid.all())
+    if not all_valid:
+        values = np.where(valid, values, 0.0)
+    weights = values.ravel()
+
+    result = {}
+    for name, (codes, labels) in bucket_codes(df.index).items():
+        n_buckets = len(labels)
+        flat = codes if n_cols == 1 else (codes[:, None] * n_cols + np.arange(n_cols)).ravel() # Bucket b, column j -> slot b * n_cols + j
+        sums = np.bincount(flat, weights=weights, minlength=n_buckets * n_cols).reshape(n_buckets, n_cols)
+        rows = np.bincount(codes, minlength=n_buckets)
+        if all_valid:
+            counts = np.repeat(rows[:, None], n_cols, axis=1)
+        else:
+            counts = np.bincount(flat, weights=valid.ravel(), minlength=n_buckets * n_cols).reshape(n_buckets, n_cols)
+        result[name] = (labels, sums, counts, rows)
+    return result
+
+
+def means_table(sums_by_aggregation, columns):
+    """
+    Turn bucket_sums output into the tidy (aggregation, bucket) table of means and counts.
+
+    Monthly, seasonal and diurnal tables keep only buckets that have data (like
+    groupby); the daily table keeps every calendar day in range (like resample('D')).
+    """
+    names, means, rows, agg_codes, label_codes = [], [], [], [], []
+    daily_labels = pd.DatetimeIndex([])
+    for name, (labels, sums, counts, bucket_rows) in sums_by_aggregation.items():
+        keep = np.ones(len(labels), dtype=bool) if name == 'daily' else bucket_rows > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means.append((sums / counts)[keep]) # Empty buckets give NaN, same as pandas
+        rows.append(bucket_rows[keep])
+        agg_codes.append(np.full(keep.sum(), len(names)))
+        if name == 'daily':
+            daily_labels = labels
+            label_codes.append(24 + np.flatnonzero(keep)) # Days come after the small integer labels 0..23
+        else:
+            label_codes.append(np.asarray(labels)[keep])
+        names.append(name)
+
+    # Build the MultiIndex from codes: the shared bucket level is 0..23 followed by the days
+    bucket_level = pd.Index(list(range(24)) + list(daily_labels), dtype=object)
+    index = pd.MultiIndex(levels=[names, bucket_level],
+                          codes=[np.concatenate(agg_codes), np.concatenate(label_codes)],
+                          names=['aggregation', 'bucket'], verify_integrity=False)
+    table = pd.DataFrame(np.concatenate(means), index=index, columns=list(columns))
+    table['count'] = np.concatenate(rows)
+    return table
+
+
+def aggregate_station(df, columns=('wind_speed',)):
+    """
+    Monthly, seasonal, diurnal and daily means (plus counts) of the given columns.
+
+    Only the requested columns are read; lat/lon and other columns are never averaged.
+
+    Returns:
+        pd.DataFrame: Index (aggregation, bucket); one mean column per entry of
+        columns and a 'count' column with the number of rows in each bucket.
+    """
+    return means_table(bucket_sums(df, columns), columns)
+
+
+def analyze_station(file_paths, columns=('wind_speed',)):
+    """
+    Load the CSVs of one station (through the cache) and return its aggregation table.
+
+    Several files are merged in time order; a timestamp that is in more than one file
+    (overlapping date ranges) is counted once, with the values of the last file.
+    """
+    if isinstance(file_paths, str):
+        file_paths = [file_paths]
+    frames = [load_era5_cached(path) for path in file_paths]
+    df = frames[0]
+    if len(frames) > 1:
+        df = pd.concat(frames)
+        df = df[~df.index.duplicated(keep='last')].sort_index()
+    return aggregate_station(prepare_station(df), columns)
+
+
+def _analyze_item(item):
+    # Module-level helper so the process pool can pickle it
+    file_paths, columns = item
+    return analyze_station(list(file_paths), columns)
+
+
+def run_stations(sources, columns=('wind_speed',), processes=None):
+    """
+    Run the full aggregation set for every station in a process pool. Files with the
+    same station name (see station_name) are analyzed together as one station.
+
+    Parameters:
+        sources (str or list): CSV paths, directories or glob patterns.
+        columns (tuple): Columns to average (must exist after prepare_station).
+        processes (int or None): Worker processes; None uses all cores, 1 runs in
+            this process without a pool.
+
+    Returns:
+        pd.DataFrame: Index (station, aggregation, bucket); mean columns plus 'count'.
+    """
+    paths = expand_paths(sources)
+    if not paths:
+        raise FileNotFoundError(f"No ERA5 CSV files found for {sources!r}")
+    by_station = {}
+    for path in paths:                              # Sorted, so every station's files are in name (date) order
+        by_station.setdefault(station_name(path), []).append(path)
+    items = [(tuple(files), tuple(columns)) for files in by_station.values()]
+
+    if processes == 1 or len(items) == 1:
+        results = [_analyze_item(item) for item in items]
+    else:
+        workers = processes or os.cpu_count() or 1
+        chunksize = max(1, len(items) // (workers * 4)) # Few large tasks per worker keep the pickling overhead small
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_analyze_item, items, chunksize=chunksize))
+
+    return pd.concat(results, keys=list(by_station), names=['station'])
+
+
+def extreme_days(result, column='wind_speed', n=5):
+    """Top n daily means per station, e.g. the 5 most extreme wind days."""
+    daily = result.xs('daily', level='aggregation')[column]
+    return daily.groupby(level='station', group_keys=False).nlargest(n)
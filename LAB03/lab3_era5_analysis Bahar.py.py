@@ -1,109 +1,44 @@
-
 # Lab 3: ERA5 Weather Data Analysis
 # Nur Bahar Gürsoy
 # 2022403117
 
-import pandas as pd
-import numpy as np
-import matplotlib.pyplot as plt
-
-
-# 1. LOAD DATA FROM FILE
-
-def load_era5_data(file_path): # Define a function to load ERA5 CSV data and set timestamp as index
-    try:
-        df = pd.read_csv(file_path)  # Read CSV file into a pandas DataFrame
-    except FileNotFoundError:
-        print(f"Error: File not found at {file_path}")
-        return None  # Return None if file does not exist
-    
-    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce') 
-    # Convert the 'timestamp' column to datetime objects, this allows you to perform time-based operations on the column 
-    # Invalid parsing will be set as NaT (Not a Time), the code will continue
-    df.set_index('timestamp', inplace=True)
-    # Set 'timestamp' as the DataFrame index for time-based operations, so when you call a date from timestamp column, you get the data for the given date
-    # Set 'timestamp' as index directly in the existing DataFrame (no new copy is created)
-    df.sort_index(inplace=True) # Sort the DataFrame by its datetime index (chronological order)
-    
-    return df
-
-berlin_file = r"C:\Users\Asus\Documents\GitHub\CE49X_Fall2025_Gursoy_Nur-Bahar\LAB03\berlin_era5_wind_20241231_20241231.csv"
-munich_file = r"C:\Users\Asus\Documents\GitHub\CE49X_Fall2025_Gursoy_Nur-Bahar\LAB03\munich_era5_wind_20241231_20241231.csv"
-
-df_berlin = load_era5_data(berlin_file) # Load Berlin ERA5 CSV data as a time-indexed DataFrame, we call the previous function
-df_munich = load_era5_data(munich_file) # Load Munich ERA5 CSV data as a time-indexed DataFrame
-
-# 2. CLEAN DATA
-
-df_berlin.dropna(inplace=True)  # Remove rows with NaN
-df_munich.dropna(inplace=True)  # Remove rows with NaN
-
-# 3. WIND SPEED CALCULATION
-
-def main():
-    def calculate_wind_speed(u,v): 
-        # u: east-west wind component (pandas Series)
-        # v: north-south wind component (pandas Series)
-        return np.sqrt(u**2 + v**2)
-
-    df_berlin['wind_speed'] = calculate_wind_speed(df_berlin['u10m'], df_berlin['v10m']) 
-    # Calculate wind speed for Berlin using u10m and v10m components and store as a new column
-    df_munich['wind_speed'] = calculate_wind_speed(df_munich['u10m'], df_munich['v10m'])
-    # Calculate wind speed for Munich using u10m and v10m components and store as a new column
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-# 4. TEMPORAL AGGREGATIONS (monthly wind speed avergae, seasonal wind speed average)
-
-    def monthly_average(df: pd.DataFrame, column):
-        return df.groupby(df.index.month)[column].mean()
-    # Group data by month (from DatetimeIndex) and select the column, compute the mean for each month
-
-    berlin_monthly_wind = monthly_average(df_berlin, 'wind_speed') # Calculate monthly average wind speed for Berlin and store as a pandas Series
-    munich_monthly_wind = monthly_average(df_munich, 'wind_speed') # Calculate monthly average wind speed for Munich and store as a pandas Series
-
-    def get_season(month): # this function converts a month number to a season code
-    
-        if month in [12, 1, 2]: # winter 
-            return 1
-        elif month in [3, 4, 5]: # spring
-            return 2
-        elif month in [6, 7, 8]: # summer
-            return 3
-        else:                    # autumn
-            return 4
-
-    df_berlin['season'] = df_berlin.index.month.map(get_season)
-    # Convert month numbers to season codes and store in new 'season' column for Berlin
-    # map() applies the get_season function to each month number
-    df_munich['season'] = df_munich.index.month.map(get_season)
-    #Convert month numbers to season codes and store in new 'season' column for Munich
-
-    berlin_seasonal_wind = df_berlin.groupby('season')['wind_speed'].mean() # Group by the 'season' column and compute mean of 'wind_speed'
-    munich_seasonal_wind = df_munich.groupby('season')['wind_speed'].mean()
+import matplotlib.pyplot as plt
 
-    # 5. STATISTICAL ANALYSIS (hourly wind speed)
+from era5_stations import SEASON_LABELS, extreme_days, run_stations
 
-    df_berlin_daily = df_berlin.resample('D').mean(numeric_only=True)
-    # Resample Berlin data to daily frequency and compute daily mean for numeric columns
-    # Numeric_only=True ensures only numeric columns are used for mean
-    df_munich_daily = df_munich.resample('D').mean(numeric_only=True)
-    # Resample Munich data to daily frequency and compute daily mean for numeric columns
-    # Numeric_only=True ensures only numeric columns are used for mean
 
-    print("\n=== Top 5 Extreme Wind Speed Days (Berlin) ===")
-    print(df_berlin_daily['wind_speed'].nlargest(5)) # Select the 'wind_speed' column from daily Berlin data and print the 5 largest values
+# 1. LOAD DATA FROM FILE, 2. CLEAN DATA, 3. WIND SPEED CALCULATION, 4. TEMPORAL AGGREGATIONS
+# These steps live in era5_stations.py so they can run for any number of stations:
+# each CSV is read with era5_cache.load_era5_cached (fixed timestamp format, binary column cache),
+# prepare_station() drops rows with NaN and adds 'wind_speed' = sqrt(u10m^2 + v10m^2),
+# aggregate_station() computes the monthly, seasonal, diurnal (hourly) and daily averages.
+# run_stations() does this for every CSV in a process pool and returns one table
+# indexed by (station, aggregation, bucket), e.g. result.loc[('berlin', 'monthly')]
 
-    print("\n=== Top 5 Extreme Wind Speed Days (Munich) ===")
-    print(df_munich_daily['wind_speed'].nlargest(5)) # Select the 'wind_speed' column from daily Munich data and print the 5 largest values
- 
-    df_berlin['hour'] = df_berlin.index.hour # Extract the hour (0-23) from the timestamp index and store it in a new column 'hour'
-    df_munich['hour'] = df_munich.index.hour
+# 6. VISUALIZATIONS (each function takes the combined result of run_stations)
 
-    berlin_hourly_pattern = df_berlin.groupby('hour')['wind_speed'].mean() # Group by the 'hour' column and compute mean of 'wind_speed'
-    munich_hourly_pattern = df_munich.groupby('hour')['wind_speed'].mean()
+RENDER_DIR = None # None: show figures on screen (plt.show), folder path: save them as PNG files there (batch mode)
 
+def set_render_dir(path):
+    # Switch to headless batch mode: Agg backend (draws into memory, no window, no blocking), figures saved under path
+    global RENDER_DIR
+    plt.switch_backend('Agg')
+    os.makedirs(path, exist_ok=True)
+    RENDER_DIR = path
 
-# 6. VISUALIZATIONS
+def show_or_save(fig, name):
+    if RENDER_DIR is None:
+        plt.show()
+    else:
+        fig.savefig(os.path.join(RENDER_DIR, f"{name}.png"))
+    # The figure is not closed: the next call with the same name reuses it (num=name, clear=True)
 
+def set_plot_style():
     # Customize default settings for matplotlib plots (figure size, fonts, colors, etc.)
     plt.rcParams['figure.facecolor'] = 'white'  # White background for figures
     plt.rcParams['axes.facecolor']   = 'white'  # White background for axes
@@ -115,51 +50,98 @@ def main():
         'font.size'        : 15,      # Increase default font size
     })
 
-    # 1st Figure - Monthly Average Wind Speed
-
-    plt.figure(figsize=(10, 6)) # Create a new figure with specified size (width=10 inches, height=6 inches)
-    plt.plot(berlin_monthly_wind.index, berlin_monthly_wind.values, marker='o', label='Berlin') 
-    # Plot Berlin monthly average wind speed
-    # x-axis: month numbers, y-axis: average wind speed, marker='o' to show points, label for legend
-    plt.plot(munich_monthly_wind.index, munich_monthly_wind.values, marker='o', label='Munich')
-    plt.title("Monthly Average Wind Speed (2024)", fontsize=18, pad=10) # Set the plot title, with font size 16 and padding of 10 points above the plot
+def plot_monthly(result, stations=None, column='wind_speed'):
+    fig = plt.figure('Monthly average wind speed', figsize=(10, 6), clear=True) # Create (or reuse and clear) the figure with this name, size width=10 inches, height=6 inches
+    for station in stations or result.index.unique('station'):
+        monthly = result.loc[(station, 'monthly'), column] # Monthly average of this station, index = month number
+        plt.plot(monthly.index, monthly.values, marker='o', label=station.capitalize())
+        # x-axis: month numbers, y-axis: average wind speed, marker='o' to show points, label for legend
+    plt.title("Monthly Average Wind Speed (2024)", fontsize=18, pad=10) # Set the plot title, with font size 18 and padding of 10 points above the plot
     plt.xlabel("Month", fontsize=14) # Set the label for the x-axis as "Month" with font size 14
     plt.ylabel("Wind Speed (m/s)", fontsize=14)
     plt.xticks(range(1, 13)) # Set x-axis ticks to show months from 1 to 12
     plt.legend(fontsize=12)
-    plt.show()
-
-    # 2nd Figure - Seasonal Average Wind Speed
-
-    season_labels = {1: 'Winter', 2: 'Spring', 3: 'Summer', 4: 'Autumn'}
-    # Define a dictionary to map season codes to season names
-
-    plt.figure(figsize=(10, 6))
-    plt.bar(berlin_seasonal_wind.index - 0.15, berlin_seasonal_wind.values, width=0.3, label='Berlin')
-    # Plot Berlin seasonal average wind speed as a bar chart
-    # Subtract 0.15 from x positions to slightly shift bars to the left for visibility
-    plt.bar(munich_seasonal_wind.index + 0.15, munich_seasonal_wind.values, width=0.3, label='Munich')
+    show_or_save(fig, 'Monthly average wind speed')
+
+def plot_seasonal(result, stations=None, column='wind_speed'):
+    stations = list(stations or result.index.unique('station'))
+    width = 0.8 / len(stations) # All bars of one season share 0.8 of the x-axis unit
+    fig = plt.figure('Seasonal average wind speed', figsize=(10, 6), clear=True)
+    for i, station in enumerate(stations):
+        seasonal = result.loc[(station, 'seasonal'), column]
+        offset = (i - (len(stations) - 1) / 2) * width # Shift each station's bars so they sit side by side
+        plt.bar(seasonal.index.astype(int) + offset, seasonal.values, width=width, label=station.capitalize())
     plt.title("Seasonal Average Wind Speed (2024)", fontsize=16, pad=10)
     plt.xlabel("Season", fontsize=14)
     plt.ylabel("Wind Speed (m/s)", fontsize=14)
-    plt.xticks([1, 2, 3, 4], [season_labels[s] for s in [1, 2, 3, 4]], fontsize=12)
-    # Set x-axis ticks at positions 1, 2, 3, 4 and replace them with season names from season_labels dictionary
+    plt.xticks([1, 2, 3, 4], [SEASON_LABELS[s] for s in [1, 2, 3, 4]], fontsize=12)
+    # Set x-axis ticks at positions 1, 2, 3, 4 and replace them with season names from SEASON_LABELS dictionary
     plt.legend(fontsize=12)
-    plt.show()
-
-    # 3- Diurnal (Hourly) Pattern
+    show_or_save(fig, 'Seasonal average wind speed')
 
-    plt.figure(figsize=(10, 6))
-    plt.plot(berlin_hourly_pattern.index, berlin_hourly_pattern.values, marker='o', label='Berlin')
-    plt.plot(munich_hourly_pattern.index, munich_hourly_pattern.values, marker='o', label='Munich')
+def plot_diurnal(result, stations=None, column='wind_speed'):
+    fig = plt.figure('Average Diurnal Wind Speed', figsize=(10, 6), clear=True)
+    for station in stations or result.index.unique('station'):
+        hourly = result.loc[(station, 'diurnal'), column]
+        plt.plot(hourly.index, hourly.values, marker='o', label=station.capitalize())
     plt.title("Average Diurnal (Hourly) Wind Speed", fontsize=16, pad=10)
     plt.xlabel("Hour of the Day", fontsize=14)
     plt.ylabel("Wind Speed (m/s)", fontsize=14)
     plt.xticks(range(0, 24))
     plt.legend(fontsize=12)
-    plt.show()
+    show_or_save(fig, 'Average Diurnal Wind Speed')
+
+def _render_figure(job):
+    # Worker: draw one figure into output_dir and return how long it took
+    func, result, output_dir = job
+    if RENDER_DIR != output_dir:
+        set_render_dir(output_dir)
+        set_plot_style()
+    start = time.perf_counter()
+    func(result)
+    return func.__name__, time.perf_counter() - start
+
+def render_all(result, output_dir, processes=None):
+    # Render the three figures as PNG files into output_dir, each one in its own worker process
+    jobs = [(plot_monthly, result, output_dir), (plot_seasonal, result, output_dir), (plot_diurnal, result, output_dir)]
+    start = time.perf_counter()
+    if processes == 1: # Same process, figures are reused between calls
+        timings = [_render_figure(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            timings = list(pool.map(_render_figure, jobs))
+    for name, seconds in timings:
+        print(f"Rendered {name} in {seconds:.2f} s")
+    print(f"All {len(jobs)} figures written to {output_dir} in {time.perf_counter() - start:.2f} s (wall time)")
+    return dict(timings)
+
+def main(sources=None, processes=None, output_dir=None):
+    if sources is None: # Default: every *_era5_*.csv next to this script (Berlin and Munich)
+        sources = os.path.dirname(os.path.abspath(__file__))
+    result = run_stations(sources, processes=processes) # One process per station (its files merged), results combined into one table
+
+    # 5. STATISTICAL ANALYSIS (extreme days)
+
+    top_days = extreme_days(result, n=5) # 5 largest daily mean wind speeds of every station
+    for station, days in top_days.groupby(level='station'):
+        print(f"\n=== Top 5 Extreme Wind Speed Days ({station.capitalize()}) ===")
+        print(days.droplevel('station'))
+
+    if output_dir is not None: # Batch mode: no windows, every figure saved as PNG
+        render_all(result, output_dir, processes)
+    else:
+        set_plot_style()
+        plot_monthly(result)  # 1st Figure - Monthly Average Wind Speed
+        plot_seasonal(result) # 2nd Figure - Seasonal Average Wind Speed
+        plot_diurnal(result)  # 3rd Figure - Diurnal (Hourly) Pattern
+
 
     print("\nDone! All calculations and plots use the 'timestamp' column as DatetimeIndex.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Lab 3 ERA5 wind analysis")
+    parser.add_argument('sources', nargs='*', help="CSV files, folders or glob patterns (default: the CSVs next to this script)")
+    parser.add_argument('--render', metavar='DIR', help="save all figures as PNG files in DIR instead of showing them")
+    parser.add_argument('--processes', type=int, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+    main(args.sources or None, args.processes, args.render)
\ No newline at end of file
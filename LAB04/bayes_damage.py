@@ -0,0 +1,95 @@
+"""
+Lab 4: Statistical Analysis
+Batched Bayes posteriors for structural damage detection
+
+Every structure i has its own prior P(damage) and a sequence of test results; every
+test can have its own sensitivity P(positive | damage) and specificity
+P(negative | no damage). Posteriors are computed in log-odds space:
+
+    log-odds after a positive test = log-odds before + log(sens / (1 - spec))
+    log-odds after a negative test = log-odds before + log((1 - sens) / spec)
+
+so sequential updating over T tests is one cumulative sum along the test axis and
+the whole fleet is handled with array operations, no Python loop over structures.
+Working in log space also avoids the underflow of multiplying many small likelihoods.
+"""
+
+import time
+
+import numpy as np
+
+MISSING = -1   # Observation code for "no test result" (the posterior is carried over unchanged)
+
+
+def _log_odds(p):
+    with np.errstate(divide='ignore'):
+        return np.log(p) - np.log1p(-p)
+
+
+def _sigmoid(x):
+    # 1 / (1 + exp(-x)) without overflow for large |x|
+    return np.exp(-np.logaddexp(0.0, -x))
+
+
+def damage_posteriors(prior, sensitivity, specificity, observations, history=False):
+    """
+    P(damage | test results) for many structures at once.
+
+    Parameters:
+        prior (array-like): Prior damage probability, shape (n,) or a scalar.
+        sensitivity, specificity (array-like): Scalars, shape (n,) (one test type per
+            structure) or shape (n, T) (one value per structure and test).
+        observations (array-like): Shape (n, T) test results, 1 = positive, 0 = negative,
+            MISSING (-1) = not tested. A 1-D array is read as one test per structure.
+        history (bool): Also return the posterior after every test.
+
+    Returns:
+        np.ndarray: Final posteriors, shape (n,); with history=True a tuple
+        (final, posteriors of shape (n, T)).
+    """
+    obs = np.asarray(observations)
+    if obs.ndim == 1:
+        obs = obs[:, None]
+    n, _ = obs.shape
+    prior = np.broadcast_to(np.asarray(prior, dtype=np.float64), (n,))
+    sens = np.asarray(sensitivity, dtype=np.float64)
+    spec = np.asarray(specificity, dtype=np.float64)
+    if sens.ndim == 1:
+        sens = sens[:, None]                        # One value per structure, same for all its tests
+    if spec.ndim == 1:
+        spec = spec[:, None]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        positive = np.log(sens) - np.log1p(-spec)   # Log likelihood ratio of a positive result
+        negative = np.log1p(-sens) - np.log(spec)   # ... and of a negative result
+    step = np.where(obs == 1, positive, np.where(obs == 0, negative, 0.0))
+
+    prior_log_odds = _log_odds(prior)
+    if history:
+        log_odds = prior_log_odds[:, None] + np.cumsum(step, axis=1)
+        posteriors = _sigmoid(log_odds)
+        return posteriors[:, -1], posteriors
+    return _sigmoid(prior_log_odds + step.sum(axis=1))
+
+
+def benchmark(n=1_000_000, tests=5, seed=0):
+    """Time damage_posteriors on a synthetic fleet of n structures with `tests` results each."""
+    rng = np.random.default_rng(seed)
+    prior = rng.uniform(0.01, 0.2, n)
+    sensitivity = rng.uniform(0.85, 0.99, (n, tests))
+    specificity = rng.uniform(0.80, 0.95, (n, tests))
+    damaged = rng.random(n) < prior
+    p_positive = np.where(damaged[:, None], sensitivity, 1 - specificity)
+    observations = (rng.random((n, tests)) < p_positive).astype(np.int8)
+    observations[rng.random((n, tests)) < 0.1] = MISSING            # Some tests not done yet
+
+    start = time.perf_counter()
+    final, _ = damage_posteriors(prior, sensitivity, specificity, observations, history=True)
+    seconds = time.perf_counter() - start
+    print(f"{n:,} structures x {tests} tests: {seconds * 1000:.1f} ms "
+          f"({n * tests / seconds / 1e6:.1f} M updates/s)")
+    return seconds
+
+
+if __name__ == "__main__":
+    benchmark()
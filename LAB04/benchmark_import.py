@@ -0,0 +1,77 @@
+"""
+Lab 4: Statistical Analysis
+Import-time benchmark for the compute-only path of lab4_statistical_analysis
+
+Runs `python -X importtime` in a fresh interpreter (cold start), prints the slowest
+imports and fails when the compute-only path pulls in a plotting/scipy module or
+goes over the time budget. Use it after changing imports in lab4_statistical_analysis.py:
+
+    python benchmark_import.py                 # report + check
+    python benchmark_import.py --budget-ms 800 # also fail above 800 ms
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+MODULE = 'lab4_statistical_analysis'
+# Code run after the import: the compute-only functions must work without plotting modules
+COMPUTE_PATH = (
+    f"import {MODULE} as lab4\n"
+    "lab4.calculate_probabilities()\n"
+)
+HEAVY_MODULES = ('matplotlib', 'seaborn', 'scipy')   # Must only be imported by the plotting functions
+
+
+def measure_import(code=COMPUTE_PATH):
+    """
+    Run code in a new interpreter with -X importtime.
+
+    Returns:
+        list: (cumulative_us, self_us, module) for every top-level and nested import.
+    """
+    dir_path = os.path.dirname(os.path.abspath(__file__))
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                          cwd=dir_path, capture_output=True, text=True, check=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, module = line[len('import time:'):].split('|')
+        rows.append((int(cumulative_us), int(self_us), module[1:].rstrip()))  # Nested imports keep their extra indent
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=f"Cold-start import benchmark for {MODULE}")
+    parser.add_argument('--budget-ms', type=float, help="fail if importing the module takes longer than this")
+    parser.add_argument('--top', type=int, default=10, help="number of slowest imports to show")
+    args = parser.parse_args()
+
+    rows = measure_import()
+    total_us = sum(cumulative for cumulative, _, module in rows if not module.startswith(' '))  # Top-level imports only
+    module_us = next(cumulative for cumulative, _, module in rows if module.strip() == MODULE)
+
+    print(f"Cold start of the compute-only path: {total_us / 1000:.1f} ms in total, "
+          f"{MODULE}: {module_us / 1000:.1f} ms")
+    print("\nSlowest imports (cumulative ms):")
+    for cumulative, _, module in sorted(rows, reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.1f}  {module.strip()}")
+
+    loaded = {module.strip().split('.')[0] for _, _, module in rows}
+    heavy = [name for name in HEAVY_MODULES if name in loaded]
+    failed = False
+    if heavy:
+        print(f"\nREGRESSION: compute-only path imports {', '.join(heavy)}")
+        failed = True
+    if args.budget_ms is not None and module_us / 1000 > args.budget_ms:
+        print(f"\nREGRESSION: import takes {module_us / 1000:.1f} ms, budget is {args.budget_ms:.1f} ms")
+        failed = True
+    if not failed:
+        print("\nOK: no plotting or scipy modules on the compute-only path")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,402 @@
+"""
+Lab 4: Statistical Analysis
+Distribution fitting with candidate-model selection
+
+Fits normal, lognormal, Weibull, gamma and Gumbel distributions to a sample (or to
+every group of a DataFrame, e.g. every material or batch) and ranks them by AIC or
+by the Kolmogorov-Smirnov statistic.
+
+scipy.stats.<dist>.fit runs a general-purpose optimizer for every fit. Here every
+family is fitted by maximum likelihood without one:
+    - normal and lognormal have closed-form estimates
+    - Weibull, gamma and Gumbel reduce to one equation in one parameter, solved with
+      a few Newton steps that start from a moment-based estimate
+The positive families are fitted with loc = 0 (two parameters each), which is the
+usual form for strengths; they are skipped for samples with values <= 0.
+
+Parameters are reported like scipy.stats (shape, loc, scale), so a fit can be drawn
+with getattr(scipy.stats, SCIPY_NAMES[family])(*shape, loc=loc, scale=scale).
+Fits are cached by a hash of the sorted sample, and groups are fitted in parallel
+processes.
+"""
+
+import hashlib
+import math
+import os
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+FAMILIES = ('normal', 'lognormal', 'weibull', 'gamma', 'gumbel')
+SCIPY_NAMES = {'normal': 'norm', 'lognormal': 'lognorm', 'weibull': 'weibull_min',
+               'gamma': 'gamma', 'gumbel': 'gumbel_r'}
+POSITIVE_FAMILIES = ('lognormal', 'weibull', 'gamma')   # Only defined for x > 0
+N_PARAMS = 2                                            # Free parameters of every candidate (for AIC)
+NEWTON_STEPS = 50
+NEWTON_TOL = 1e-10
+MIN_DISTINCT = 3                                        # Fewer distinct values: no spread to fit
+
+CACHE_SIZE = 4096
+_cache = OrderedDict()   # (sample hash, families) -> list of fits, least recently used first
+
+
+# -------------------------------
+# Maximum-likelihood fits
+# -------------------------------
+def _check_spread(spread, family):
+    """A sample without spread has no maximum-likelihood fit (log(0) / division by 0)."""
+    if not spread > 0:
+        raise ValueError(f"Cannot fit {family}: the sample has no spread (all values equal)")
+
+
+def _newton(f_and_df, x0, lower=0.0):
+    """Solve f(x) = 0 from x0; steps that would leave (lower, inf) are halved."""
+    x = x0
+    for _ in range(NEWTON_STEPS):
+        f, df = f_and_df(x)
+        step = f / df
+        while x - step <= lower:
+            step /= 2
+        x -= step
+        if abs(step) <= NEWTON_TOL * abs(x):
+            break
+    return x
+
+
+def _fit_normal(x, logs):
+    mean, std = x.mean(), x.std()                   # MLE uses ddof=0
+    _check_spread(std, 'normal')
+    n = len(x)
+    loglik = -n / 2 * (math.log(2 * math.pi * std**2) + 1)
+    return (), mean, std, loglik
+
+
+def _fit_lognormal(x, logs):
+    mu, sigma = logs.mean(), logs.std()
+    _check_spread(sigma, 'lognormal')
+    n = len(x)
+    loglik = -n / 2 * (math.log(2 * math.pi * sigma**2) + 1) - logs.sum()
+    return (sigma,), 0.0, math.exp(mu), loglik
+
+
+def _fit_weibull(x, logs):
+    # Profile likelihood equation for the shape k:
+    #   sum(x^k ln x) / sum(x^k) - 1/k - mean(ln x) = 0
+    # x^k is computed as exp(k (ln x - mean ln x)), the constant factor cancels in the ratio.
+    centered = logs - logs.mean()
+    _check_spread(centered.std(), 'weibull')
+
+    def f_and_df(k):
+        w = np.exp(k * (centered - centered.max()))
+        sw, swy, swy2 = w.sum(), w @ centered, w @ centered**2
+        ratio = swy / sw
+        return ratio - 1 / k, swy2 / sw - ratio**2 + 1 / k**2
+
+    k0 = math.pi / (math.sqrt(6) * centered.std())  # Moment estimate from the std of ln x (Gumbel of ln x)
+    k = _newton(f_and_df, k0)
+    n = len(x)
+    scale = math.exp(logs.mean() + math.log(np.mean(np.exp(k * centered))) / k)
+    loglik = n * math.log(k) - n * k * math.log(scale) + (k - 1) * logs.sum() - n   # sum((x/scale)^k) = n at the MLE
+    return (k,), 0.0, scale, loglik
+
+
+def _fit_gamma(x, logs):
+    from scipy.special import digamma, polygamma
+
+    mean = x.mean()
+    s = math.log(mean) - logs.mean()                # > 0 unless all values are equal
+    _check_spread(s, 'gamma')
+    k0 = (3 - s + math.sqrt((s - 3)**2 + 24 * s)) / (12 * s)   # Closed-form approximation (Minka)
+    k = _newton(lambda k: (math.log(k) - digamma(k) - s, 1 / k - polygamma(1, k)), k0)
+    scale = mean / k
+    n = len(x)
+    loglik = -n * math.lgamma(k) - n * k * math.log(scale) + (k - 1) * logs.sum() - n * k   # sum(x)/scale = n k
+    return (k,), 0.0, scale, loglik
+
+
+def _fit_gumbel(x, logs):
+    # Likelihood equation for the scale b:  b - mean(x) + sum(x e^(-x/b)) / sum(e^(-x/b)) = 0
+    mean, xmin = x.mean(), x.min()
+    _check_spread(x.std(), 'gumbel')
+    shifted = x - xmin                              # Keeps e^(-x/b) in range
+
+    def f_and_df(b):
+        w = np.exp(-shifted / b)
+        sw, swx, swx2 = w.sum(), w @ shifted, w @ shifted**2
+        ratio = swx / sw
+        return b - (mean - xmin) + ratio, 1 + (swx2 / sw - ratio**2) / b**2
+
+    b = _newton(f_and_df, x.std() * math.sqrt(6) / math.pi)   # Start: moment estimate
+    loc = xmin - b * math.log(np.mean(np.exp(-shifted / b)))
+    n = len(x)
+    loglik = -n * math.log(b) - (mean - loc) * n / b - n    # sum(e^(-z)) = n at the MLE
+    return (), loc, b, loglik
+
+
+_FITTERS = {'normal': _fit_normal, 'lognormal': _fit_lognormal, 'weibull': _fit_weibull,
+            'gamma': _fit_gamma, 'gumbel': _fit_gumbel}
+
+
+def cdf(family, shape, loc, scale, x):
+    """CDF of a fitted candidate at x (NumPy/scipy.special, no scipy.stats objects)."""
+    from scipy.special import gammainc, ndtr
+
+    z = (np.asarray(x, dtype=np.float64) - loc) / scale
+    if family == 'normal':
+        return ndtr(z)
+    if family == 'gumbel':
+        return np.exp(-np.exp(-z))
+    with np.errstate(divide='ignore'):
+        if family == 'lognormal':
+            return ndtr(np.log(z) / shape[0])
+        if family == 'weibull':
+            return -np.expm1(-z ** shape[0])
+    return gammainc(shape[0], z)
+
+
+def _ks_statistic(sorted_x, family, shape, loc, scale):
+    """Largest distance between the empirical CDF of sorted_x and the fitted CDF."""
+    n = len(sorted_x)
+    F = cdf(family, shape, loc, scale, sorted_x)
+    return float(max((np.arange(1, n + 1) / n - F).max(), (F - np.arange(n) / n).max()))
+
+
+# -------------------------------
+# Candidate comparison
+# -------------------------------
+def _distinct(sorted_x):
+    """Number of distinct values of a sorted sample."""
+    return int(len(sorted_x) > 0) + int(np.count_nonzero(np.diff(sorted_x)))
+
+
+def _sample_key(sorted_x, families):
+    return hashlib.sha1(sorted_x.tobytes()).hexdigest(), tuple(families)
+
+
+def _fit_sorted(sorted_x, families):
+    """Fit every family to an already sorted, NaN-free float64 sample."""
+    positive = sorted_x[0] > 0
+    logs = np.log(sorted_x) if positive else None
+    fits = []
+    for family in families:
+        if family in POSITIVE_FAMILIES and not positive:
+            continue
+        shape, loc, scale, loglik = _FITTERS[family](sorted_x, logs)
+        fits.append({
+            'family': family,
+            'shape': float(shape[0]) if shape else np.nan,
+            'loc': float(loc),
+            'scale': float(scale),
+            'loglik': float(loglik),
+            'aic': 2 * N_PARAMS - 2 * float(loglik),
+            'ks': _ks_statistic(sorted_x, family, shape, loc, scale),
+        })
+    return fits
+
+
+def _prepare(values):
+    x = np.asarray(values, dtype=np.float64)
+    return np.sort(x[~np.isnan(x)])
+
+
+def fit_candidates(values, families=FAMILIES, use_cache=True):
+    """
+    Fit every candidate family to one sample.
+
+    Parameters:
+        values (array-like): The sample; NaNs are dropped. Needs at least MIN_DISTINCT (3)
+            distinct values, otherwise ValueError.
+        families (tuple): Candidates to fit, a subset of FAMILIES.
+        use_cache (bool): Reuse the fits of an identical sample (same values in any order).
+
+    Returns:
+        list: One dict per fitted family (family, shape, loc, scale, loglik, aic, ks).
+    """
+    sorted_x = _prepare(values)
+    if _distinct(sorted_x) < MIN_DISTINCT:
+        raise ValueError(f"Need at least {MIN_DISTINCT} distinct values to fit, got {_distinct(sorted_x)}")
+    key = _sample_key(sorted_x, families)
+    if use_cache and key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+    fits = _fit_sorted(sorted_x, families)
+    if use_cache:
+        _store(key, fits)
+    return fits
+
+
+def _store(key, fits):
+    _cache[key] = fits
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+
+
+def clear_cache():
+    _cache.clear()
+
+
+def _fit_job(job):
+    """Worker: fit one sorted sample."""
+    sorted_x, families = job
+    return _fit_sorted(sorted_x, families)
+
+
+def _comparison_table(keys, results, names, criterion):
+    """One DataFrame for all groups (building one per group would cost more than the fits)."""
+    import pandas as pd
+
+    rows = [dict(zip(names, key), **fit) for key, fits in zip(keys, results) for fit in fits]
+    table = pd.DataFrame(rows, columns=names + ['family', 'shape', 'loc', 'scale', 'loglik', 'aic', 'ks'])
+    table['rank'] = table.groupby(names, sort=False)[criterion].rank(method='first').astype(int)
+    table['best'] = table['rank'] == 1
+    return table.sort_values(names + ['rank']).set_index(names + ['family'])
+
+
+def fit_groups(data, column, group_columns=None, families=FAMILIES, criterion='aic',
+               processes=None, use_cache=True):
+    """
+    Fit every candidate family to column, for every group, and rank them.
+
+    Parameters:
+        data (pd.DataFrame): Input table.
+        column (str): Column to fit (e.g. 'yield_strength_mpa').
+        group_columns (str, list or None): Group keys (e.g. 'material_type'); None fits the whole column.
+        families (tuple): Candidates, a subset of FAMILIES.
+        criterion (str): 'aic' or 'ks', lower is better.
+        processes (int or None): Worker processes for uncached groups, None uses all cores, 1 runs in-process.
+        use_cache (bool): Reuse fits of samples seen before.
+
+    Returns:
+        pd.DataFrame: One row per (group, family) with shape, loc, scale, loglik, aic,
+        ks, rank and best. Groups with fewer than MIN_DISTINCT distinct values are not
+        fitted; their keys are listed in table.attrs['skipped']. table.attrs also holds
+        fits, cache_hits, seconds and fits_per_second.
+    """
+    start = time.perf_counter()
+    if group_columns is None:
+        groups = [((column,), data[column])]
+        names = ['sample']
+    else:
+        groups = [(key if isinstance(key, tuple) else (key,), values)
+                  for key, values in data.groupby(group_columns, sort=True)[column]]
+        names = [group_columns] if isinstance(group_columns, str) else list(group_columns)
+
+    samples = [_prepare(values) for _, values in groups]
+    fittable = [_distinct(x) >= MIN_DISTINCT for x in samples]
+    skipped = [key for (key, _), ok in zip(groups, fittable) if not ok]
+    groups = [group for group, ok in zip(groups, fittable) if ok]
+    samples = [x for x, ok in zip(samples, fittable) if ok]
+    keys = [_sample_key(x, families) for x in samples]
+    results = [_cache.get(key) if use_cache else None for key in keys]
+    todo = [i for i, result in enumerate(results) if result is None]
+
+    workers = processes or os.cpu_count() or 1
+    jobs = [(samples[i], families) for i in todo]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            fitted = list(pool.map(_fit_job, jobs, chunksize=max(1, len(jobs) // (4 * workers))))
+    else:
+        fitted = [_fit_job(job) for job in jobs]
+    for i, fits in zip(todo, fitted):
+        results[i] = fits
+        if use_cache:
+            _store(keys[i], fits)
+
+    table = _comparison_table([key for key, _ in groups], results, names, criterion)
+    seconds = time.perf_counter() - start
+    n_fits = sum(len(fits) for fits in fitted)
+    table.attrs.update(fits=n_fits, cache_hits=len(groups) - len(todo), skipped=skipped, seconds=seconds,
+                       fits_per_second=n_fits / seconds if seconds > 0 else math.inf)
+    return table
+
+
+def best_fits(table):
+    """The best family of every group of a fit_groups table."""
+    return table[table['best']].reset_index(level='family')
+
+
+# -------------------------------
+# Self-test
+# -------------------------------
+def selftest(seed=0):
+    """Constant and single-value groups are skipped, the other groups are still fitted."""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({'group': ['normal'] * 50 + ['constant'] * 20 + ['single'],
+                         'value': np.r_[rng.lognormal(math.log(40), 0.15, 50), np.full(20, 42.0), 7.0]})
+    table = fit_groups(data, 'value', 'group', processes=1, use_cache=False)
+    assert table.attrs['skipped'] == [('constant',), ('single',)], table.attrs['skipped']
+    assert set(table.index.get_level_values('group')) == {'normal'}
+    assert best_fits(table).shape[0] == 1
+    for family in FAMILIES:
+        try:
+            _FITTERS[family](np.full(5, 42.0), np.full(5, math.log(42.0)))
+        except ValueError:
+            continue
+        raise AssertionError(f"{family} fitted a constant sample")
+    try:
+        fit_candidates([42.0] * 10)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("fit_candidates accepted a constant sample")
+    print("selftest OK: constant and single-value groups skipped:", table.attrs['skipped'])
+
+
+# -------------------------------
+# Benchmark
+# -------------------------------
+def benchmark(groups=200, size=100, scipy_groups=20, seed=0):
+    """
+    Fit all candidates to synthetic lognormal groups, compared with scipy.stats.<dist>.fit.
+
+    Returns:
+        dict: fits per second of this module and of scipy, and the largest relative
+              difference between the two sets of parameters.
+    """
+    import pandas as pd
+    import scipy.stats
+
+    rng = np.random.default_rng(seed)
+    data = pd.DataFrame({'group': np.repeat(np.arange(groups), size),
+                         'value': rng.lognormal(math.log(40), 0.15, groups * size)})
+
+    clear_cache()
+    table = fit_groups(data, 'value', 'group', processes=1, use_cache=False)
+    ours = table.attrs['fits_per_second']
+
+    start = time.perf_counter()
+    worst = 0.0
+    for group in range(scipy_groups):
+        x = data.loc[data['group'] == group, 'value'].to_numpy()
+        for family in FAMILIES:
+            dist = getattr(scipy.stats, SCIPY_NAMES[family])
+            fixed = {'floc': 0} if family in POSITIVE_FAMILIES else {}
+            params = dist.fit(x, **fixed)
+            row = table.loc[(group, family)]
+            expected = ([row['shape']] if family in ('lognormal', 'weibull', 'gamma') else []) + [row['loc'], row['scale']]
+            for a, b in zip(params, expected):
+                if a != 0:
+                    worst = max(worst, abs(a - b) / abs(a))
+    scipy_rate = scipy_groups * len(FAMILIES) / (time.perf_counter() - start)
+
+    print(f"{groups} groups x {size} values, {len(FAMILIES)} families")
+    print(f"  distribution_fitting: {ours:10.0f} fits/s")
+    print(f"  scipy.stats fit:      {scipy_rate:10.0f} fits/s -> {ours / scipy_rate:.0f}x faster here")
+    print(f"  largest relative parameter difference to scipy: {worst:.1e}")
+    return {'fits_per_second': ours, 'scipy_fits_per_second': scipy_rate, 'max_rel_diff': worst}
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    dir_path = os.path.dirname(os.path.abspath(__file__))
+    materials = pd.read_csv(os.path.join(dir_path, 'material_properties.csv'))
+    table = fit_groups(materials, 'yield_strength_mpa', 'material_type')
+    print(table.round(4).to_string())
+    print(f"\n{table.attrs['fits']} fits, {table.attrs['fits_per_second']:.0f} fits/s\n")
+    selftest()
+    benchmark()
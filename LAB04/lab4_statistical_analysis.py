@@ -5,10 +5,21 @@ Descriptive Statistics and Probability Distributions
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
-from scipy.stats import norm, binom, poisson, expon
+import argparse
+import math
+import time
+from statistics import NormalDist
+
+from strength_stats import describe, describe_grouped
+from bayes_damage import damage_posteriors
+from distribution_fitting import fit_groups, best_fits, SCIPY_NAMES
+from load_timeseries import LoadMonitor
+from concurrent.futures import ProcessPoolExecutor
+
+# matplotlib, seaborn and scipy.stats take about a second to import, so they are imported
+# inside the functions that draw figures. Loading data, descriptive statistics and
+# calculate_probabilities only need pandas, numpy and the standard library.
+# benchmark_import.py checks that this stays true.
 
 # -------------------------------
 # Data Loading
@@ -21,23 +32,39 @@ def load_data(filename):
     file_path = os.path.join(dir_path, filename)           # Dosya yolu oluştur
     return pd.read_csv(file_path)
 
+# -------------------------------
+# Figure Output
+# -------------------------------
+RENDER_DIR = None   # None: show figures on screen (plt.show), folder path: save them as PNG files there (batch mode)
+
+def set_render_dir(path):
+    """Switch to headless batch mode: Agg backend, every figure is saved under path instead of shown."""
+    global RENDER_DIR
+    import matplotlib
+    matplotlib.use('Agg')                        # Agg draws into memory only, no window and no blocking
+    os.makedirs(path, exist_ok=True)
+    RENDER_DIR = path
+
+def show_or_save(fig, name):
+    """Show the figure, or in batch mode write it to RENDER_DIR/<name>.png."""
+    if RENDER_DIR is None:
+        import matplotlib.pyplot as plt
+        plt.show()
+    else:
+        fig.savefig(os.path.join(RENDER_DIR, f"{name}.png"))
+    # The figure is not closed: the next call with the same name reuses it (num=name, clear=True)
+
 # -------------------------------
 # Descriptive Statistics
 # -------------------------------
 def calculate_descriptive_stats(data, column):  # Function to calculate descriptive statistics for a specified column in a DataFrame.
-    col = data[column].dropna()                 # Drop missing values from the specified column
-    mean = col.mean()                           
-    median = col.median()
-    mode_val = col.mode()[0]                    # Take the first mode if multiple exist.
-    std = col.std()
-    var = col.var()
-    rng = col.max() - col.min()                 # Calculate the range (max - min) of the column.
-    q1 = col.quantile(0.25)
-    q2 = col.quantile(0.5)
-    q3 = col.quantile(0.75)                     # Calculate the first quartile (Q1), median (Q2), and third quartile (Q3)
-    iqr = q3 - q1                               # Calculate the interquartile range (IQR = Q3 - Q1).
-    skew = col.skew()                           # Calculate skewness to measure the asymmetry of the distribution.
-    kurt = col.kurtosis()                       # Calculate kurtosis to measure the flatness / sharpness of the distribution.
+    stats = describe(data[column].to_numpy())   # One sort (min, max, quartiles, median, mode) and one moments pass (mean, std, var, skewness, kurtosis), NaNs dropped
+    mean, median, mode_val = stats['mean'], stats['median'], stats['mode'] # Mode: first (smallest) one if multiple exist
+    std, var, rng = stats['std'], stats['var'], stats['range']             # Range = max - min
+    q1, q2, q3 = stats['q1'], stats['q2'], stats['q3']                     # First quartile (Q1), median (Q2), third quartile (Q3)
+    iqr = stats['iqr']                          # Interquartile range (IQR = Q3 - Q1)
+    skew = stats['skew']                        # Skewness: asymmetry of the distribution
+    kurt = stats['kurt']                        # Kurtosis: flatness / sharpness of the distribution
     
     print(f"=== Descriptive Statistics for {column} ===")
     print(f"mean: {mean:.2f}")
@@ -49,22 +76,59 @@ def calculate_descriptive_stats(data, column):  # Function to calculate descript
     print(f"IQR: {iqr:.2f}")
     print(f"skewness: {skew:.2f}")
     print(f"kurtosis: {kurt:.2f}")
-    print(f"min: {col.min():.2f}")
+    print(f"min: {stats['min']:.2f}")
     print(f"Q1: {q1:.2f}")
     print(f"Q2: {q2:.2f}")
     print(f"Q3: {q3:.2f}")
-    print(f"max: {col.max():.2f}\n")
+    print(f"max: {stats['max']:.2f}\n")
     
     return mean, std, q1, q2, q3                # Return key statistics for further use
 
+# -------------------------------
+# Grouped Descriptive Statistics
+# -------------------------------
+def calculate_grouped_stats(data, column, group_columns):  # Descriptive statistics of column for every group (e.g. every batch) in one call
+    table = describe_grouped(data, column, group_columns)   # Sorts once by (group, value), then computes every statistic for all groups together
+    print(f"=== Descriptive Statistics for {column} by {group_columns} ===")
+    print(table[['n', 'mean', 'median', 'std', 'min', 'q1', 'q3', 'max', 'skew', 'kurt']].round(2).to_string())
+    print()
+    return table                                            # One row per group, same statistics as calculate_descriptive_stats
+
+# -------------------------------
+# Distribution Fitting
+# -------------------------------
+def calculate_fit_comparison(data, column, group_columns=None):  # Fit normal, lognormal, Weibull, gamma and Gumbel and rank them by AIC
+    table = fit_groups(data, column, group_columns)               # Newton/closed-form MLE fits, cached by a hash of the data, groups in parallel
+    print(f"=== Distribution Fits for {column}" + (f" by {group_columns}" if group_columns else "") + " ===")
+    print(table[['shape', 'loc', 'scale', 'aic', 'ks', 'rank']].round(3).to_string())
+    print(f"{table.attrs['fits']} fits in {table.attrs['seconds']:.3f} s ({table.attrs['fits_per_second']:.0f} fits/s)")
+    if table.attrs['skipped']:                                    # Groups with fewer than 3 distinct values are not fitted
+        print(f"Skipped (fewer than 3 distinct values): {table.attrs['skipped']}")
+    print()
+    return table                                                  # One row per (group, family), best = lowest AIC
+
+# -------------------------------
+# Load Time Series
+# -------------------------------
+def analyze_structural_loads(data, window='24h', thresholds=(30.0, 35.0)):  # Rolling mean/max, exceedances and rainflow cycles per component
+    monitor = LoadMonitor(window, thresholds)   # O(1) per sample (running sums, monotonic deque), can also be fed chunk by chunk
+    rolling = monitor.update(data)              # rolling_mean / rolling_max for every row
+    print(f"=== Load Time Series by component_type (window {window}) ===")
+    print(monitor.summary().round(2).to_string())
+    print("\nRainflow cycles by load range (kN):")
+    print(monitor.cycle_histogram(bins=5).to_string())
+    print()
+    return rolling, monitor
+
 # -------------------------------
 # Distribution Plot
 # -------------------------------
 def plot_distribution(data, column):
+    import matplotlib.pyplot as plt
     col = data[column].dropna()
     mean, median, mode_val = col.mean(), col.median(), col.mode()[0]
     
-    plt.figure(figsize=(8,5))
+    fig = plt.figure('Strength Distribution', figsize=(8,5), clear=True)
     plt.hist(col, bins=30, density=True, color='skyblue', alpha=0.7, edgecolor='black')
     # Plot histogram of data: 30 intervals, 70% opacity for better visibility with overlays
     plt.axvline(mean, color='red', linestyle='--', label='Mean')
@@ -74,73 +138,118 @@ def plot_distribution(data, column):
     plt.xlabel(column)
     plt.ylabel('Density')
     plt.legend()
-    plt.show()
+    show_or_save(fig, 'Strength Distribution')
 
 # -------------------------------
 # Distribution Fitting
 # -------------------------------
-def plot_distribution_fitting(data, column, fitted_dist):
+def plot_distribution_fitting(data, column, fitted_dist, best_fit=None):
+    import matplotlib.pyplot as plt
+    import scipy.stats
+    from scipy.stats import norm
     col = data[column].dropna()
-    plt.figure(figsize=(8,5))
+    fig = plt.figure('strength distr with fitted normal', figsize=(8,5), clear=True)
     plt.hist(col, bins=30, density=True, color='skyblue', alpha=0.7, edgecolor='black')
     x = np.linspace(col.min(), col.max(), 100)                                                   # Generate 100 evenly spaced values within data range
     plt.plot(x, norm.pdf(x, fitted_dist[0], fitted_dist[1]), 'r--', lw=2, label='Fitted Normal') # Overlay fitted normal distribution curve
                                                                                                  # fitted_dist[0] = mean, fitted_dist[1] = standard deviation 
+    if best_fit is not None and best_fit['family'] != 'normal':                                  # Best candidate by AIC (see calculate_fit_comparison)
+        dist = getattr(scipy.stats, SCIPY_NAMES[best_fit['family']])
+        shape = () if np.isnan(best_fit['shape']) else (best_fit['shape'],)
+        plt.plot(x, dist.pdf(x, *shape, loc=best_fit['loc'], scale=best_fit['scale']), 'g-', lw=2,
+                 label=f"Best fit ({best_fit['family']})")
     plt.title(f'{column} Distribution with Fitted Normal')
     plt.xlabel(column)
     plt.ylabel('Density')
     plt.legend()
-    plt.show()
+    show_or_save(fig, 'strength distr with fitted normal')
 
 # -------------------------------
 # Material Comparison Boxplot
 # -------------------------------
 def plot_material_comparison(data, column='yield_strength_mpa', group_column='material_type'):
-    plt.figure(figsize=(8,5))
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    fig = plt.figure('material strength comparison', figsize=(8,5), clear=True)
     sns.boxplot(x=group_column, y=column, hue=group_column, data=data, palette='Set2', dodge=False, legend=False)
     # hue = which variable to use for coloring. Each group gets a different color.
     # dodge = whether boxes should be side by side or stacked. False stacks them, True puts them side by side.
     plt.title('Material Strength Comparison')
     plt.xlabel(group_column)
     plt.ylabel(column)
-    plt.show()
+    show_or_save(fig, 'material strength comparison')
+
+# -------------------------------
+# Probability Calculations
+# -------------------------------
+# Scenario parameters shared by the calculations and the plot
+N_BIN, P_BIN = 100, 0.05           # Binomial: 100 components, 5% defect probability
+LAMBDA_POIS = 10                   # Poisson: average of 10 trucks per hour
+MU_NORM, SIGMA_NORM = 250, 15      # Normal: steel yield strength mean and standard deviation (MPa)
+MEAN_EXP = 1000                    # Exponential: mean component lifetime (hours)
+
+def calculate_probabilities():
+    """
+    Probabilities of the four scenarios, from closed-form formulas (standard library only).
+    Gives the same numbers as scipy.stats binom / poisson / norm / expon without importing scipy.
+    """
+    def binom_pmf(k):
+        return math.comb(N_BIN, k) * P_BIN**k * (1 - P_BIN)**(N_BIN - k)
+
+    def poisson_pmf(k):
+        return math.exp(-LAMBDA_POIS) * LAMBDA_POIS**k / math.factorial(k)
+
+    normal = NormalDist(MU_NORM, SIGMA_NORM)
+    return {
+        'binomial_eq3': binom_pmf(3),
+        'binomial_le5': sum(binom_pmf(k) for k in range(6)),
+        'poisson_eq8': poisson_pmf(8),
+        'poisson_gt15': 1 - sum(poisson_pmf(k) for k in range(16)),
+        'normal_gt280': 1 - normal.cdf(280),
+        'normal_p95': normal.inv_cdf(0.95),
+        'exponential_lt500': 1 - math.exp(-500 / MEAN_EXP),   # P(X <= x) = 1 - exp(-x / mean)
+        'exponential_gt1500': math.exp(-1500 / MEAN_EXP),     # P(X > x) = exp(-x / mean)
+    }
 
 # -------------------------------
 # Probability Distributions Plot
 # -------------------------------
 def plot_probability_distributions():
+    import matplotlib.pyplot as plt
+    from scipy.stats import norm, binom, poisson, expon
+
     # --------------------
     # Binomial Scenario
     # --------------------
-    n_bin = 100
-    p_bin = 0.05
+    n_bin = N_BIN
+    p_bin = P_BIN
     x_bin = np.arange(0, 16)  # 0-15 defekt için
     y_bin = binom.pmf(x_bin, n_bin, p_bin)
 
     # --------------------
     # Poisson Scenario
     # --------------------
-    lambda_pois = 10          # Average rate of events (e.g., 10 trucks per hour)
+    lambda_pois = LAMBDA_POIS # Average rate of events (e.g., 10 trucks per hour)
     x_pois = np.arange(0, 25) # Possible number of events (0 to 24 trucks)
     y_pois = poisson.pmf(x_pois, lambda_pois) # Probability for each number of events
 
     # --------------------
     # Normal Scenario
     # --------------------
-    mu_norm = 250             # Mean of the distribution (average steel strength)
-    sigma_norm = 15           # Standard deviation (spread of steel strength)
+    mu_norm = MU_NORM         # Mean of the distribution (average steel strength)
+    sigma_norm = SIGMA_NORM   # Standard deviation (spread of steel strength)
     x_norm = np.linspace(200, 300, 400) # 400 points from 200 to 300 for plotting
     y_norm = norm.pdf(x_norm, mu_norm, sigma_norm) # PDF values for each x
 
     # --------------------
     # Exponential Scenario
     # --------------------
-    mean_exp = 1000            # Mean lifetime of a component (1000 hours)
+    mean_exp = MEAN_EXP        # Mean lifetime of a component (1000 hours)
     x_exp = np.linspace(0, 3000, 400) # 400 points from 0 to 3000 hours for plotting
     y_exp = expon.pdf(x_exp, scale=mean_exp) # PDF values for each x
 
     # 2x2 subplot
-    fig, axs = plt.subplots(2, 2, figsize=(14,10))
+    fig, axs = plt.subplots(2, 2, figsize=(14,10), num='possibility distributions', clear=True)
 
     # Binomial
     axs[0,0].bar(x_bin, y_bin, color='skyblue', edgecolor='black')
@@ -178,38 +287,32 @@ def plot_probability_distributions():
     axs[1,1].legend()
 
     plt.tight_layout(pad=3.0)
-    plt.show()
+    show_or_save(fig, 'possibility distributions')
 
     # --------------------
     # Probability Calculations 
     # --------------------
-    prob_bin_3 = binom.pmf(3, n_bin, p_bin)
-    prob_bin_le5 = binom.cdf(5, n_bin, p_bin)
-    prob_pois_8 = poisson.pmf(8, lambda_pois)
-    prob_pois_gt15 = 1 - poisson.cdf(15, lambda_pois)
-    prob_norm_gt280 = 1 - norm.cdf(280, mu_norm, sigma_norm)
-    percentile_95_norm = norm.ppf(0.95, mu_norm, sigma_norm)
-    prob_exp_lt500 = expon.cdf(500, scale=mean_exp) # Calculate the probability that the component fails before 500 hours
-                                                    # expon.cdf(x, scale=mean_exp) gives P(X <= x), i.e., the probability that lifetime X is less than or equal to x
-    prob_exp_gt1500 = 1 - expon.cdf(1500, scale=mean_exp) # Calculate the probability that the component survives beyond 1500 hours
-                                                          # expon.cdf(1500, scale=mean_exp) gives P(X <= 1500), so subtracting from 1 gives P(X > 1500)
+    probs = calculate_probabilities()
 
     # Printing the probabilities
-    print(f"Binomial: P(X=3) = {prob_bin_3:.3f}")
-    print(f"Binomial: P(X≤5) = {prob_bin_le5:.3f}")
-    print(f"Poisson: P(X=8) = {prob_pois_8:.3f}")
-    print(f"Poisson: P(X>15) = {prob_pois_gt15:.3f}")
-    print(f"Normal: P(X>280) = {prob_norm_gt280:.3f}")
-    print(f"Normal: 95th percentile = {percentile_95_norm:.3f}")
-    print(f"Exponential: P(X<500) = {prob_exp_lt500:.3f}")
-    print(f"Exponential: P(X>1500) = {prob_exp_gt1500:.3f}")
+    print(f"Binomial: P(X=3) = {probs['binomial_eq3']:.3f}")
+    print(f"Binomial: P(X≤5) = {probs['binomial_le5']:.3f}")
+    print(f"Poisson: P(X=8) = {probs['poisson_eq8']:.3f}")
+    print(f"Poisson: P(X>15) = {probs['poisson_gt15']:.3f}")
+    print(f"Normal: P(X>280) = {probs['normal_gt280']:.3f}")
+    print(f"Normal: 95th percentile = {probs['normal_p95']:.3f}")
+    print(f"Exponential: P(X<500) = {probs['exponential_lt500']:.3f}")
+    print(f"Exponential: P(X>1500) = {probs['exponential_gt1500']:.3f}")
 
 # -------------------------------
 # Statistical Summary Dashboard
 # -------------------------------
 def plot_statistical_dashboard(concrete_data):
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+    from scipy import stats
     col = concrete_data['strength_mpa'].dropna()
-    fig, axs = plt.subplots(2,2, figsize=(12,8))        # Create a 2x2 grid of subplots
+    fig, axs = plt.subplots(2,2, figsize=(12,8), num='summary statistics', clear=True) # Create a 2x2 grid of subplots
     
     # Histogram
     axs[0,0].hist(col, bins=20, color='skyblue', edgecolor='black')
@@ -242,41 +345,44 @@ def plot_statistical_dashboard(concrete_data):
     axs[1,1].set_title('Density Plot')
     
     plt.tight_layout()
-    plt.show()
+    show_or_save(fig, 'summary statistics')
 
 # -------------------------------
 # Bayes Theorem Application
 # -------------------------------
-def bayes_structural_damage():
-
-    # Given
-    P_damage = 0.05
-    P_no_damage = 1 - P_damage
-    sensitivity = 0.95                                                  # Test sensitivity: P(Test positive | Damage)
-    specificity = 0.90                                                  # Test specificity: P(Test negative | No damage)
-    false_positive = 1 - specificity                                    
-
-    # Bayes Calculation
-    P_positive = sensitivity*P_damage + false_positive*P_no_damage      # Total probability of a positive test
-    P_damage_given_positive = (sensitivity*P_damage) / P_positive       # Bayes' theorem: P(Damage | Positive test)
+def bayes_structural_damage(P_damage=0.05, sensitivity=0.95, specificity=0.90, draw=True):
+    """
+    P(Damage | Positive Test) for one structure, optionally with the probability tree.
+
+    The calculation uses the batched evaluator in bayes_damage.py (the same code that
+    handles whole sensor fleets); the tree is drawn by plot_bayes_tree.
+    """
+    # sensitivity: P(Test positive | Damage), specificity: P(Test negative | No damage)
+    P_damage_given_positive = damage_posteriors(P_damage, sensitivity, specificity, [1])[0]
     print(f"P(Damage | Positive Test) = {P_damage_given_positive:.3f}")
+    if draw:
+        plot_bayes_tree(P_damage, sensitivity, specificity)
+    return P_damage_given_positive
+
+def plot_bayes_tree(P_damage=0.05, sensitivity=0.95, specificity=0.90):
+    import matplotlib.pyplot as plt
 
     # Probability Tree Görselleştirme
-    fig, ax = plt.subplots(figsize=(10,6))
+    fig, ax = plt.subplots(figsize=(10,6), num='bayes theorem tree', clear=True)
     # Root
     ax.text(0.1, 0.9, "Structure", fontsize=12, ha='center')
 
     # Branches
-    ax.text(0.3, 0.8, "Damage\n0.05", fontsize=10, ha='center')
-    ax.text(0.3, 0.6, "No Damage\n0.95", fontsize=10, ha='center')
+    ax.text(0.3, 0.8, f"Damage\n{P_damage:.2f}", fontsize=10, ha='center')
+    ax.text(0.3, 0.6, f"No Damage\n{1 - P_damage:.2f}", fontsize=10, ha='center')
 
     # Outcomes for Damage
-    ax.text(0.55, 0.85, "Positive\n0.95", fontsize=10, ha='center')
-    ax.text(0.55, 0.75, "Negative\n0.05", fontsize=10, ha='center')
+    ax.text(0.55, 0.85, f"Positive\n{sensitivity:.2f}", fontsize=10, ha='center')
+    ax.text(0.55, 0.75, f"Negative\n{1 - sensitivity:.2f}", fontsize=10, ha='center')
 
     # Outcomes for No Damage (geniş aralık verdik)
-    ax.text(0.55, 0.58, "Positive\n0.10", fontsize=10, ha='center')
-    ax.text(0.55, 0.48, "Negative\n0.90", fontsize=10, ha='center')
+    ax.text(0.55, 0.58, f"Positive\n{1 - specificity:.2f}", fontsize=10, ha='center')
+    ax.text(0.55, 0.48, f"Negative\n{specificity:.2f}", fontsize=10, ha='center')
 
     # Oklar
     # Root -> Damage / No Damage
@@ -293,7 +399,7 @@ def bayes_structural_damage():
     
     ax.axis('off')    # Hide axis for cleaner visualization
     plt.title("Probability Tree: Structural Damage Detection")
-    plt.show()
+    show_or_save(fig, 'bayes theorem tree')
 
 # -------------------------------
 # Report File
@@ -306,10 +412,43 @@ def create_statistical_report(mean,std,q1,q2,q3,file='lab4_statistical_report.tx
         f.write(f"Q1: {q1:.2f}, Q2: {q2:.2f}, Q3: {q3:.2f}\n") # Write quartiles
     print(f"Report saved to {file}")
 
+# -------------------------------
+# Batch Rendering
+# -------------------------------
+def _render_figure(job):
+    """Worker: draw one figure into output_dir and return how long it took."""
+    func, args, output_dir = job
+    if RENDER_DIR != output_dir:
+        set_render_dir(output_dir)
+    start = time.perf_counter()
+    func(*args)
+    return func.__name__, time.perf_counter() - start
+
+def render_all(concrete_data, material_data, fitted_dist, output_dir, processes=None, best_fit=None):
+    """Render every Lab 4 figure as PNG into output_dir; independent figures are drawn in parallel processes."""
+    jobs = [
+        (plot_distribution, (concrete_data, 'strength_mpa'), output_dir),
+        (plot_distribution_fitting, (concrete_data, 'strength_mpa', fitted_dist, best_fit), output_dir),
+        (plot_material_comparison, (material_data,), output_dir),
+        (plot_probability_distributions, (), output_dir),
+        (plot_statistical_dashboard, (concrete_data,), output_dir),
+        (plot_bayes_tree, (), output_dir),
+    ]
+    start = time.perf_counter()
+    if processes == 1:                         # Same process, figures are reused between calls
+        timings = [_render_figure(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            timings = list(pool.map(_render_figure, jobs))
+    for name, seconds in timings:
+        print(f"Rendered {name} in {seconds:.2f} s")
+    print(f"All {len(jobs)} figures written to {output_dir} in {time.perf_counter() - start:.2f} s (wall time)")
+    return dict(timings)
+
 # -------------------------------
 # Main Execution
 # -------------------------------
-def main():
+def main(output_dir=None, processes=None):
     # Load datasets
     concrete_data = load_data("concrete_strength.csv")
     material_data = load_data("material_properties.csv")
@@ -317,8 +456,23 @@ def main():
     
     # 1. Concrete Strength Analysis
     mean, std, q1, q2, q3 = calculate_descriptive_stats(concrete_data, 'strength_mpa')
+    calculate_grouped_stats(concrete_data, 'strength_mpa', 'batch_id')              # Per batch
+    calculate_grouped_stats(concrete_data, 'strength_mpa', ['mix_type', 'age_days']) # Per mix design and test age
+    calculate_grouped_stats(material_data, 'yield_strength_mpa', 'material_type')    # Per material
+    calculate_grouped_stats(structural_data, 'load_kN', 'component_type')            # Per structural component
+    analyze_structural_loads(structural_data)                                        # Rolling statistics and fatigue cycles of the load record
+    fits = calculate_fit_comparison(concrete_data, 'strength_mpa')                   # Best of the candidate distributions
+    calculate_fit_comparison(material_data, 'yield_strength_mpa', 'material_type')   # ... for every material
+    best_fit = best_fits(fits).iloc[0].to_dict()
+
+    if output_dir is not None:                # Batch mode: no windows, every figure saved as PNG
+        bayes_structural_damage(draw=False)   # The tree itself is drawn by render_all
+        render_all(concrete_data, material_data, (mean, std), output_dir, processes, best_fit)
+        create_statistical_report(mean,std,q1,q2,q3)
+        return
+
     plot_distribution(concrete_data, 'strength_mpa')
-    plot_distribution_fitting(concrete_data, 'strength_mpa', (mean,std))
+    plot_distribution_fitting(concrete_data, 'strength_mpa', (mean,std), best_fit)
     
     # 2. Material Comparison
     plot_material_comparison(material_data)
@@ -336,4 +490,8 @@ def main():
     create_statistical_report(mean,std,q1,q2,q3) # Save key statistics to a text file
 
 if __name__=="__main__": # Run the main function
-    main()
+    parser = argparse.ArgumentParser(description="Lab 4 statistical analysis")
+    parser.add_argument('--render', metavar='DIR', help="save all figures as PNG files in DIR instead of showing them")
+    parser.add_argument('--processes', type=int, help="worker processes for --render (default: all cores)")
+    args = parser.parse_args()
+    main(args.render, args.processes)
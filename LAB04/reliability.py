@@ -0,0 +1,212 @@
+"""
+Lab 4: Statistical Analysis
+Monte Carlo reliability engine (load vs. resistance)
+
+Estimates the failure probability pf = P(R - S <= 0) of a member, where the load S is
+fitted from structural_loads.csv and the resistance R from the material strength
+data (strength x cross-section area), together with the reliability index beta.
+
+- Samples are drawn in fixed-size batches, so memory does not depend on how many
+  samples are needed.
+- Every batch has its own RNG stream, derived from the seed and the batch number
+  with NumPy's SeedSequence. The result only depends on the seed and the number of
+  batches, not on how many processes ran them.
+- Batches are run in rounds of a fixed number of batches (batches_per_check) over a
+  process pool. After every round the 95% confidence interval of pf is checked and
+  the run stops once its relative half width is below the target (or max_samples is
+  reached). The round size does not depend on the number of processes, so neither
+  does the batch at which the run stops.
+"""
+
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+EULER_GAMMA = 0.5772156649015329
+Z_95 = NormalDist().inv_cdf(0.975)
+
+
+class Distribution:
+    """
+    A random variable that can draw samples with a NumPy Generator.
+
+    family: 'normal' (mean, std), 'lognormal' (mu_ln, sigma_ln),
+            'gumbel' (loc, scale) or 'empirical' (the observed values, resampled).
+    """
+
+    FAMILIES = ('normal', 'lognormal', 'gumbel', 'empirical')
+
+    def __init__(self, family, *params):
+        if family not in self.FAMILIES:
+            raise ValueError(f"Unknown distribution family {family!r}, use one of {self.FAMILIES}")
+        self.family = family
+        self.params = params
+
+    def __repr__(self):
+        if self.family == 'empirical':
+            return f"Distribution('empirical', <{len(self.params[0])} values>)"
+        return f"Distribution({self.family!r}, {', '.join(f'{p:.4g}' for p in self.params)})"
+
+    def sample(self, rng, size):
+        if self.family == 'normal':
+            return rng.normal(self.params[0], self.params[1], size)
+        if self.family == 'lognormal':
+            return rng.lognormal(self.params[0], self.params[1], size)
+        if self.family == 'gumbel':
+            return rng.gumbel(self.params[0], self.params[1], size)
+        return rng.choice(self.params[0], size)
+
+    def scaled(self, factor):
+        """The distribution of factor * X, e.g. strength (MPa) x area (mm^2) / 1000 -> kN."""
+        if self.family == 'normal':
+            return Distribution('normal', self.params[0] * factor, self.params[1] * factor)
+        if self.family == 'lognormal':
+            return Distribution('lognormal', self.params[0] + math.log(factor), self.params[1])
+        if self.family == 'gumbel':
+            return Distribution('gumbel', self.params[0] * factor, self.params[1] * factor)
+        return Distribution('empirical', np.asarray(self.params[0]) * factor)
+
+
+def fit_moments(values, family):
+    """
+    Method-of-moments fit of a Distribution to data (closed form, no optimizer).
+
+    Lognormal is the usual choice for strengths, Gumbel (largest values) for loads.
+    """
+    x = np.asarray(values, dtype=np.float64)
+    x = x[~np.isnan(x)]
+    mean, std = float(x.mean()), float(x.std(ddof=1))
+    if family == 'normal':
+        return Distribution('normal', mean, std)
+    if family == 'lognormal':
+        sigma_ln = math.sqrt(math.log(1 + (std / mean) ** 2))
+        return Distribution('lognormal', math.log(mean) - sigma_ln**2 / 2, sigma_ln)
+    if family == 'gumbel':
+        scale = std * math.sqrt(6) / math.pi
+        return Distribution('gumbel', mean - EULER_GAMMA * scale, scale)
+    if family == 'empirical':
+        return Distribution('empirical', x)
+    raise ValueError(f"Unknown distribution family {family!r}")
+
+
+def _run_batch(job):
+    """Worker: one batch of samples on its own RNG stream; returns (failures, sum of g, sum of g^2)."""
+    resistance, load, batch_size, seed, batch_index = job
+    rng = np.random.Generator(np.random.PCG64(np.random.SeedSequence(seed, spawn_key=(batch_index,))))
+    g = resistance.sample(rng, batch_size)
+    g -= load.sample(rng, batch_size)               # Limit state g = R - S, failure when g <= 0
+    return int(np.count_nonzero(g <= 0)), float(g.sum()), float(np.dot(g, g))
+
+
+def estimate_failure_probability(resistance, load, target_rel_ci=0.05, max_samples=100_000_000,
+                                 batch_size=1_000_000, seed=0, processes=None, batches_per_check=16, pool=None):
+    """
+    Monte Carlo estimate of pf = P(R - S <= 0) with early stopping.
+
+    Parameters:
+        resistance, load (Distribution): R and S in the same unit (e.g. kN).
+        target_rel_ci (float): Stop when the 95% CI half width is below this fraction of pf.
+        max_samples (int): Hard limit on the number of samples.
+        batch_size (int): Samples per batch (memory is about 16 bytes x batch_size per worker).
+        seed (int): Base seed of all RNG streams.
+        processes (int or None): Worker processes, None uses all cores, 1 runs in-process.
+        batches_per_check (int): Batches between two convergence checks (one round).
+        pool (ProcessPoolExecutor or None): Pool to run the batches on (not shut down here),
+            None creates one for this call if processes > 1.
+
+    Returns:
+        dict: pf, ci_low, ci_high, beta (= -Phi^-1(pf)), beta_cornell (= mean(g) / std(g)),
+              failures, samples, seconds, samples_per_min, converged.
+    """
+    workers = processes or os.cpu_count() or 1
+    max_batches = max(1, math.ceil(max_samples / batch_size))
+    failures, sum_g, sum_g2, batches = 0, 0.0, 0.0, 0
+    converged = False
+    start = time.perf_counter()
+
+    own_pool = pool is None and workers > 1
+    if own_pool:
+        pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        while batches < max_batches and not converged:
+            jobs = [(resistance, load, batch_size, seed, i)
+                    for i in range(batches, min(batches + batches_per_check, max_batches))]
+            results = pool.map(_run_batch, jobs) if pool else map(_run_batch, jobs)
+            for batch_failures, batch_sum, batch_sum2 in results:
+                failures += batch_failures
+                sum_g += batch_sum
+                sum_g2 += batch_sum2
+            batches += len(jobs)
+            n = batches * batch_size
+            pf = failures / n
+            half_width = Z_95 * math.sqrt(pf * (1 - pf) / n)
+            converged = failures > 0 and half_width <= target_rel_ci * pf
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+    seconds = time.perf_counter() - start
+    n = batches * batch_size
+    pf = failures / n
+    half_width = Z_95 * math.sqrt(pf * (1 - pf) / n)
+    mean_g = sum_g / n
+    std_g = math.sqrt(max(sum_g2 / n - mean_g**2, 0.0) * n / (n - 1))
+    return {
+        'pf': pf,
+        'ci_low': max(pf - half_width, 0.0),
+        'ci_high': pf + half_width,
+        'beta': -NormalDist().inv_cdf(pf) if 0 < pf < 1 else math.copysign(math.inf, 0.5 - pf),
+        'beta_cornell': mean_g / std_g if std_g > 0 else math.inf,
+        'failures': failures,
+        'samples': n,
+        'seconds': seconds,
+        'samples_per_min': n / seconds * 60,
+        'converged': converged,
+    }
+
+
+def component_reliability(load_data, strength_values, area_mm2, load_family='gumbel',
+                          strength_family='lognormal', **kwargs):
+    """
+    pf and beta for every component_type in structural_loads.csv against one material.
+
+    Parameters:
+        load_data (pd.DataFrame): structural_loads.csv (load_kN, component_type).
+        strength_values (array-like): Strength samples in MPa (e.g. yield_strength_mpa).
+        area_mm2 (float): Cross-section area, R = strength x area / 1000 in kN.
+        **kwargs: Passed to estimate_failure_probability.
+
+    Returns:
+        pd.DataFrame: One row per component_type.
+    """
+    import pandas as pd
+
+    resistance = fit_moments(strength_values, strength_family).scaled(area_mm2 / 1000)
+    workers = kwargs.get('processes') or os.cpu_count() or 1
+    rows = {}
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None   # One pool for all components
+    try:
+        for component, loads in load_data.groupby('component_type')['load_kN']:
+            rows[component] = estimate_failure_probability(resistance, fit_moments(loads, load_family),
+                                                           pool=pool, **kwargs)
+    finally:
+        if pool:
+            pool.shutdown()
+    return pd.DataFrame.from_dict(rows, orient='index').rename_axis('component_type')
+
+
+if __name__ == "__main__":
+    import pandas as pd
+
+    dir_path = os.path.dirname(os.path.abspath(__file__))
+    loads = pd.read_csv(os.path.join(dir_path, 'structural_loads.csv'))
+    materials = pd.read_csv(os.path.join(dir_path, 'material_properties.csv'))
+    steel = materials.loc[materials['material_type'] == 'Steel', 'yield_strength_mpa']
+
+    # Steel tie with a 100 mm^2 cross-section (about 40 kN capacity) under the measured loads
+    table = component_reliability(loads, steel, area_mm2=100)
+    print(table[['pf', 'ci_low', 'ci_high', 'beta', 'beta_cornell', 'samples', 'samples_per_min', 'converged']].to_string())
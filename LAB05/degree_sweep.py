@@ -0,0 +1,277 @@
+"""
+CE49X - Lab 5: Bias-Variance Tradeoff
+Polynomial-degree sweep with one design matrix and shared QR factorizations
+
+The notebook runs cross_validate(PolynomialFeatures(d) + LinearRegression) for every
+degree d = 1..10, so the polynomial features and a full least-squares fit are
+recomputed for every degree and every fold. This module gives the same numbers with
+much less work:
+
+    - The design matrix is built once, for the highest degree. PolynomialFeatures
+      orders its columns by degree, so the features of degree d are the first
+      n_features(d) columns of it.
+    - Least squares is solved through the R factor of the QR decomposition of
+      [1 | X_poly | y]. The R factor of a column prefix is the leading block of the
+      full R factor, so one factorization per fold serves every degree. (Putting the
+      column of ones first makes the rest of R the factor of the *centered* data,
+      which is what LinearRegression fits.)
+    - For K-fold CV the rows are split into K blocks. Every block is factorized once
+      and the factor of a training set (all blocks but one) is obtained by merging
+      small R factors (prefix/suffix products) instead of refactorizing ~90% of the
+      rows for every fold.
+    - Folds are evaluated in parallel processes; the jobs only carry small R factors
+      and the test rows.
+
+LinearRegression solves with scipy.linalg.lstsq(cond=tol), i.e. singular values below
+tol * largest are dropped. The singular values of a column prefix of the centered
+data are those of the matching block of R, so the same cutoff is applied there and
+the results agree with sklearn to rounding (about 1e-13), also for the high degrees
+where the unscaled polynomial features are badly conditioned.
+"""
+
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations_with_replacement
+
+import numpy as np
+
+FEATURES = ['T', 'RH', 'AH']
+TARGET = 'CO(GT)'
+DEGREES = range(1, 11)
+CV_FOLDS = 10
+TOL = 1e-6   # Same default as sklearn LinearRegression(tol=1e-6)
+
+
+def load_air_quality(file_path=None):
+    """AirQualityUCI.csv with float64 measurements, i.e. the same values as the notebook's read_csv."""
+    from air_quality import load_air_quality as load_typed
+
+    return load_typed(file_path, float_dtype=np.float64, columns=FEATURES + [TARGET])
+
+
+def prepare_xy(df, features=FEATURES, target=TARGET):
+    """Feature matrix and target of the rows where none of them is missing."""
+    data = df[features + [target]].dropna()
+    return data[features].to_numpy(np.float64), data[target].to_numpy(np.float64)
+
+
+def n_poly_features(n_features, degree):
+    """Columns of PolynomialFeatures(degree, include_bias=False) for n_features inputs."""
+    return math.comb(n_features + degree, degree) - 1
+
+
+def polynomial_design(X, max_degree):
+    """
+    All monomials of X up to max_degree, in the column order of PolynomialFeatures
+    (include_bias=False), so the design for degree d is design[:, :n_poly_features(m, d)].
+    """
+    X = np.asarray(X, dtype=np.float64)
+    n, m = X.shape
+    design = np.empty((n, n_poly_features(m, max_degree)))
+    position = {}                                   # Monomial (tuple of feature indices) -> column
+    col = 0
+    for degree in range(1, max_degree + 1):
+        for combo in combinations_with_replacement(range(m), degree):
+            if degree == 1:
+                design[:, col] = X[:, combo[0]]
+            else:
+                np.multiply(design[:, position[combo[:-1]]], X[:, combo[-1]], out=design[:, col])
+            position[combo] = col
+            col += 1
+    return design
+
+
+# -------------------------------
+# QR factors
+# -------------------------------
+def _r_factor(design, y):
+    """R factor of [1 | design | y] (the column of ones makes the rest the centered fit)."""
+    return np.linalg.qr(np.column_stack([np.ones(len(y)), design, y]), mode='r')
+
+
+def _merge(*factors):
+    """R factor of the stacked rows of several R factors (= of all their original rows)."""
+    factors = [r for r in factors if r is not None]
+    if len(factors) == 1:
+        return factors[0]
+    return np.linalg.qr(np.vstack(factors), mode='r')
+
+
+def _evaluate_fold(job):
+    """
+    Worker: train and test MSE of every degree for one fold.
+
+    R is the factor of the training rows of [1 | design | y], design_test/y_test the
+    held-out rows, widths the number of design columns of every degree.
+    """
+    R, column_means, y_mean, design_test, y_test, widths, n_train, tol = job
+    R_xx, z, r_yy = R[1:-1, 1:-1], R[1:-1, -1], R[-1, -1]   # Centered design, Q^T y, residual of the full fit
+    test_centered = design_test - column_means
+    train_mse, test_mse = [], []
+    for p in widths:
+        beta = np.linalg.lstsq(R_xx[:p, :p], z[:p], rcond=tol)[0]
+        # ||y_c - X_c beta||^2 = ||z[:p] - R[:p,:p] beta||^2 + ||z[p:]||^2 + r_yy^2
+        rss = np.sum((z[:p] - R_xx[:p, :p] @ beta) ** 2) + np.sum(z[p:] ** 2) + r_yy ** 2
+        train_mse.append(rss / n_train)
+        test_mse.append(np.mean((test_centered[:, :p] @ beta + y_mean - y_test) ** 2))
+    return train_mse, test_mse
+
+
+def _kfold_factors(design, y, folds):
+    """
+    Training-set R factors of contiguous K-fold CV (like KFold without shuffling) from K
+    block factors, with the training column means, training size and test rows.
+    """
+    blocks = np.array_split(np.arange(len(y)), folds)
+    block_r = [_r_factor(design[rows], y[rows]) for rows in blocks]
+    prefix, suffix = [None] * (folds + 1), [None] * (folds + 1)   # prefix[i]: blocks < i, suffix[i]: blocks >= i
+    for i in range(folds):
+        prefix[i + 1] = _merge(prefix[i], block_r[i])
+        suffix[folds - 1 - i] = _merge(block_r[folds - 1 - i], suffix[folds - i])
+    data = np.column_stack([design, y])
+    total = data.sum(axis=0)
+    for i, test in enumerate(blocks):
+        n_train = len(y) - len(test)
+        yield _merge(prefix[i], suffix[i + 1]), (total - data[test].sum(axis=0)) / n_train, n_train, test
+
+
+def _split_factors(design, y, cv):
+    """Training-set R factors, column means and sizes for explicit (train, test) index pairs."""
+    for train, test in cv:
+        train_means = np.r_[design[train].mean(axis=0), y[train].mean()]
+        yield _r_factor(design[train], y[train]), train_means, len(train), np.asarray(test)
+
+
+def degree_sweep(X, y, degrees=DEGREES, cv=CV_FOLDS, tol=TOL, processes=None):
+    """
+    Cross-validated train and test MSE of polynomial regression for every degree.
+
+    Parameters:
+        X (np.ndarray): Features, shape (n, m).
+        y (np.ndarray): Target, shape (n,).
+        degrees (iterable): Polynomial degrees to evaluate.
+        cv (int or iterable): Number of contiguous folds (same as cross_validate(cv=int)
+            for a regressor) or (train_index, test_index) pairs, e.g. from a KFold with
+            shuffling or a single train_test_split.
+        tol (float): Relative singular value cutoff, as LinearRegression(tol).
+        processes (int or None): Worker processes for the folds, None uses all cores, 1 runs in-process.
+
+    Returns:
+        pd.DataFrame: train_mse and test_mse (mean over folds) per degree, plus
+        train_std / test_std over folds. attrs holds the per-fold errors and seconds.
+    """
+    import pandas as pd
+
+    start = time.perf_counter()
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    degrees = list(degrees)
+    design = polynomial_design(X, max(degrees))
+    widths = [n_poly_features(X.shape[1], d) for d in degrees]
+
+    if isinstance(cv, int):
+        factors = _kfold_factors(design, y, cv)
+    else:
+        factors = _split_factors(design, y, cv)
+    jobs = []
+    for R, train_means, n_train, test in factors:
+        jobs.append((R, train_means[:-1], train_means[-1], design[test], y[test], widths, n_train, tol))
+
+    workers = processes or os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            results = list(pool.map(_evaluate_fold, jobs))
+    else:
+        results = [_evaluate_fold(job) for job in jobs]
+
+    train = np.array([r[0] for r in results])       # Shape (folds, degrees)
+    test = np.array([r[1] for r in results])
+    table = pd.DataFrame({'train_mse': train.mean(axis=0), 'test_mse': test.mean(axis=0),
+                          'train_std': train.std(axis=0), 'test_std': test.std(axis=0)},
+                         index=pd.Index(degrees, name='degree'))
+    table.attrs.update(train_folds=train, test_folds=test, seconds=time.perf_counter() - start)
+    return table
+
+
+def sklearn_sweep(X, y, degrees=DEGREES, cv=CV_FOLDS):
+    """The notebook's loop (PolynomialFeatures + LinearRegression in cross_validate), as the reference."""
+    import pandas as pd
+    from sklearn.linear_model import LinearRegression
+    from sklearn.model_selection import cross_validate
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import PolynomialFeatures
+
+    start = time.perf_counter()
+    rows = {}
+    for d in degrees:
+        pipeline = Pipeline([
+            ('poly', PolynomialFeatures(degree=d, include_bias=False)),
+            ('model', LinearRegression())
+        ])
+        scores = cross_validate(pipeline, X, y, cv=cv, scoring='neg_mean_squared_error',
+                                return_train_score=True)
+        rows[d] = {'train_mse': -np.mean(scores['train_score']), 'test_mse': -np.mean(scores['test_score'])}
+    table = pd.DataFrame.from_dict(rows, orient='index').rename_axis('degree')
+    table.attrs['seconds'] = time.perf_counter() - start
+    return table
+
+
+def plot_validation_curve(table, title='Bias–Variance Tradeoff (with 10-Fold Cross-Validation)', file=None):
+    """Training and test error per degree with the optimal degree marked (same figure as the notebook)."""
+    import matplotlib.pyplot as plt
+
+    degrees = list(table.index)
+    best_degree = table['test_mse'].idxmin()
+    min_test_error = table['test_mse'].min()
+
+    plt.figure(figsize=(12, 7))
+    plt.plot(degrees, table['train_mse'], 'o-', label='Training Error (Avg)', color='blue', markersize=8)
+    plt.plot(degrees, table['test_mse'], 's-', label='Test Error (Avg)', color='red', markersize=8)
+    plt.axvline(x=best_degree, linestyle='--', color='green', label=f'Optimal Degree = {best_degree}')
+    plt.plot(best_degree, min_test_error, 'g*', markersize=15, label=f'Min Test Error = {min_test_error:.4f}')
+    plt.axvspan(0.5, best_degree - 0.5, alpha=0.1, color='blue', label='Underfitting (High Bias)')
+    plt.axvspan(best_degree + 0.5, degrees[-1] + 0.5, alpha=0.1, color='red', label='Overfitting (High Variance)')
+    plt.xlabel('Polynomial Degree')
+    plt.ylabel('Mean Squared Error (MSE)')
+    plt.title(title)
+    plt.xticks(degrees)
+    plt.grid(True, which='both', linestyle='--', linewidth=0.5)
+    plt.legend()
+    if file:
+        plt.savefig(file, dpi=150, bbox_inches='tight')
+        plt.close()
+    else:
+        plt.show()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cross-validated polynomial-degree sweep on AirQualityUCI.csv")
+    parser.add_argument('--folds', type=int, default=CV_FOLDS)
+    parser.add_argument('--max-degree', type=int, default=max(DEGREES))
+    parser.add_argument('--processes', type=int, help="worker processes for the folds (default: all cores)")
+    parser.add_argument('--compare', action='store_true', help="also run the sklearn loop and compare results and time")
+    parser.add_argument('--plot', metavar='FILE', help="save the validation curve to FILE")
+    args = parser.parse_args()
+
+    X, y = prepare_xy(load_air_quality())
+    degrees = range(1, args.max_degree + 1)
+    table = degree_sweep(X, y, degrees, cv=args.folds, processes=args.processes)
+    for d, row in table.iterrows():
+        print(f"Degree {d} (CV={args.folds}): Train MSE = {row['train_mse']:.4f}, Test MSE = {row['test_mse']:.4f}")
+    print(f"Sweep: {table.attrs['seconds']:.2f} s, optimal degree = {table['test_mse'].idxmin()}")
+
+    if args.compare:
+        reference = sklearn_sweep(X, y, degrees, cv=args.folds)
+        diff = ((table[['train_mse', 'test_mse']] - reference) / reference).abs().to_numpy().max()
+        print(f"sklearn cross_validate: {reference.attrs['seconds']:.2f} s "
+              f"({reference.attrs['seconds'] / table.attrs['seconds']:.1f}x slower), "
+              f"largest relative difference {diff:.1e}")
+    if args.plot:
+        plot_validation_curve(table, file=args.plot)
+
+
+if __name__ == '__main__':
+    main()